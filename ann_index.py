@@ -0,0 +1,175 @@
+"""
+ANN Index Module
+
+Choose, build and tune the FAISS index type used for the knowledge base.
+
+Supported index types:
+- flat: exact L2 search (IndexFlatL2), cost grows linearly with chunk count
+- ivf_flat: inverted file with exact vectors, searches nprobe of nlist clusters
+- hnsw: graph index, tuned with efSearch
+- ivf_pq: inverted file with product-quantized vectors, for very large corpora
+- auto: pick one of the above from the chunk count (see choose_index_type)
+
+The chosen type and its search settings are saved to index_meta.json
+next to index.faiss and re-applied every time the index is loaded.
+"""
+
+import json
+import math
+import os
+import faiss
+
+INDEX_META_FILE = 'index_meta.json'
+INDEX_TYPES = ('flat', 'ivf_flat', 'hnsw', 'ivf_pq')
+
+# Chunk counts at which 'auto' switches to a cheaper index type
+AUTO_IVF_THRESHOLD = 20000
+AUTO_IVF_PQ_THRESHOLD = 1000000
+
+# FAISS k-means wants at least this many training points per cluster
+MIN_POINTS_PER_CENTROID = 39
+
+HNSW_M = 32
+HNSW_EF_CONSTRUCTION = 200
+DEFAULT_EF_SEARCH = 64
+
+
+def get_index_type():
+    """Get the index type to build from the FAISS_INDEX_TYPE env var (default: auto)"""
+    return os.getenv('FAISS_INDEX_TYPE', 'auto').lower()
+
+
+def choose_index_type(num_vectors):
+    """
+    Pick an index type for the 'auto' policy.
+
+    Args:
+        num_vectors (int): Number of chunks that will be indexed
+
+    Returns:
+        str: 'flat', 'ivf_flat' or 'ivf_pq'
+    """
+    if num_vectors < AUTO_IVF_THRESHOLD:
+        return 'flat'
+    if num_vectors < AUTO_IVF_PQ_THRESHOLD:
+        return 'ivf_flat'
+    return 'ivf_pq'
+
+
+def build_index(vectors, index_type='auto'):
+    """
+    Create, train and fill a FAISS index.
+
+    Args:
+        vectors (np.ndarray): float32 matrix of shape (num_chunks, dimension)
+        index_type (str): One of INDEX_TYPES or 'auto'
+
+    Returns:
+        tuple: (faiss.Index, meta dict to save with save_index_meta)
+    """
+    num_vectors, dimension = vectors.shape
+    if index_type == 'auto':
+        index_type = choose_index_type(num_vectors)
+    if index_type not in INDEX_TYPES:
+        raise ValueError(f"Unsupported FAISS_INDEX_TYPE: {index_type}. Use 'auto', {', '.join(repr(t) for t in INDEX_TYPES)}")
+
+    meta = {'index_type': index_type, 'dimension': dimension}
+
+    if index_type in ('ivf_flat', 'ivf_pq'):
+        nlist = _choose_nlist(num_vectors)
+        if nlist < 2:
+            print(f"⚠️ Only {num_vectors} chunks - too few to train {index_type}. Using flat index instead.")
+            return build_index(vectors, 'flat')
+
+        quantizer = faiss.IndexFlatL2(dimension)
+        if index_type == 'ivf_flat':
+            index = faiss.IndexIVFFlat(quantizer, dimension, nlist)
+        else:
+            pq_m = _choose_pq_m(dimension)
+            nbits = 8 if num_vectors >= 256 * MIN_POINTS_PER_CENTROID else 4
+            index = faiss.IndexIVFPQ(quantizer, dimension, nlist, pq_m, nbits)
+            meta.update({'pq_m': pq_m, 'pq_nbits': nbits})
+
+        print(f"Training {index_type} index ({nlist} clusters) on {num_vectors} vectors...")
+        index.train(vectors)
+        meta.update({'nlist': nlist, 'nprobe': _default_nprobe(nlist)})
+    elif index_type == 'hnsw':
+        index = faiss.IndexHNSWFlat(dimension, HNSW_M)
+        index.hnsw.efConstruction = HNSW_EF_CONSTRUCTION
+        meta.update({'hnsw_m': HNSW_M, 'ef_search': DEFAULT_EF_SEARCH})
+    else:
+        index = faiss.IndexFlatL2(dimension)
+
+    index.add(vectors)
+    apply_search_params(index, meta)
+    return index, meta
+
+
+def apply_search_params(index, meta):
+    """
+    Apply the saved search settings to a loaded index.
+
+    FAISS_NPROBE and FAISS_EF_SEARCH env vars override the saved values,
+    so recall/latency can be tuned without re-ingesting.
+
+    Args:
+        index (faiss.Index): The index to tune
+        meta (dict): Settings loaded from index_meta.json
+    """
+    nprobe = os.getenv('FAISS_NPROBE') or meta.get('nprobe')
+    ef_search = os.getenv('FAISS_EF_SEARCH') or meta.get('ef_search')
+
+    ivf = faiss.try_extract_index_ivf(index)
+    if ivf is not None and nprobe:
+        ivf.nprobe = int(nprobe)
+
+    hnsw_index = try_extract_hnsw(index)
+    if hnsw_index is not None and ef_search:
+        hnsw_index.hnsw.efSearch = int(ef_search)
+
+
+def load_index_meta(index_path):
+    """
+    Load index_meta.json from an index folder.
+
+    Indexes built before index types were configurable have no meta file
+    and are treated as flat.
+    """
+    meta_file = os.path.join(index_path, INDEX_META_FILE)
+    if not os.path.exists(meta_file):
+        return {'index_type': 'flat'}
+    with open(meta_file, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def save_index_meta(meta, meta_file):
+    """Write index settings as JSON"""
+    with open(meta_file, 'w', encoding='utf-8') as f:
+        json.dump(meta, f, indent=2)
+
+
+def _choose_nlist(num_vectors):
+    # ~4*sqrt(n) clusters, capped so every cluster gets enough training points
+    nlist = int(4 * math.sqrt(num_vectors))
+    return min(nlist, num_vectors // MIN_POINTS_PER_CENTROID)
+
+
+def _default_nprobe(nlist):
+    return max(1, min(nlist, max(8, nlist // 16)))
+
+
+def _choose_pq_m(dimension):
+    # Aim for ~16 dimensions per sub-quantizer; m must divide the dimension
+    target = max(1, dimension // 16)
+    for m in range(target, 0, -1):
+        if dimension % m == 0:
+            return m
+    return 1
+
+
+def try_extract_hnsw(index):
+    """Get the IndexHNSW inside an index, or None if it isn't an HNSW index"""
+    index = faiss.downcast_index(index)
+    if isinstance(index, (faiss.IndexIDMap, faiss.IndexIDMap2)):
+        index = faiss.downcast_index(index.index)
+    return index if isinstance(index, faiss.IndexHNSW) else None
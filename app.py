@@ -1,11 +1,11 @@
 import streamlit as st
-from brain import ask_auditor, load_faiss_index
+from brain import ask_auditor_stream
 from ingest import ingest_documents, ingest_from_confluence
 from reviewer import run_audit
 from confluence import fetch_page_content, validate_confluence_config
 import confluence_sync
+import failover
 import config
-import os
 
 # Page configuration
 st.set_page_config(
@@ -23,9 +23,9 @@ with st.sidebar:
     st.title(f"{config.ORG_ICON} {config.ORG_NAME}")
     st.markdown("---")
     
-    # Display active model configuration
-    provider = os.getenv('MODEL_PROVIDER', 'bedrock').upper()
-    model_name = os.getenv('MODEL_NAME', 'us.deepseek.r1-v1:0')
+    # Display active model configuration (the primary one with LLM_PROVIDERS)
+    provider, model_name = failover.get_targets()[0]
+    provider = provider.upper()
     
     # Format model name for display
     if 'deepseek' in model_name.lower():
@@ -61,9 +61,10 @@ with st.sidebar:
                     success, message, num_pages = ingest_from_confluence()
                     
                     if success:
-                        # Clear cached vectorstore to force reload
+                        # Swap in the new index generation now; other workers
+                        # pick it up from their index watcher within seconds
                         import brain
-                        brain._vectorstore = None
+                        brain.reload_faiss_index()
                         
                         st.success(message)
                         st.info(f"📊 Synced {num_pages} page(s) into knowledge base")
@@ -82,9 +83,10 @@ with st.sidebar:
                 # Run the ingestion process
                 ingest_documents()
                 
-                # Clear the cached vectorstore to force reload
+                # Swap in the new index generation now; other workers
+                # pick it up from their index watcher within seconds
                 import brain
-                brain._vectorstore = None
+                brain.reload_faiss_index()
                 
                 st.success("✅ Knowledge base updated successfully!")
                 st.info("The FAISS index has been refreshed with the latest documents.")
@@ -111,6 +113,18 @@ tab1, tab2 = st.tabs(["📚 Knowledge Bot", "🔍 Solution Auditor"])
 with tab1:
     st.markdown("### Ask questions about architecture standards, security policies, and design decisions")
     
+    # Optional search scope (applied inside the FAISS search)
+    search_scopes = {
+        "All documents": None,
+        "ADRs only": {"doc_type": "adr"},
+        "Standards only": {"doc_type": "standard"},
+        "Policies only": {"doc_type": "policy"},
+        "Confluence pages only": {"source_prefix": "confluence:"},
+    }
+    if config.CONFLUENCE_SPACE_KEY:
+        search_scopes[f"Confluence space {config.CONFLUENCE_SPACE_KEY} only"] = {"space": config.CONFLUENCE_SPACE_KEY}
+    search_scope = st.selectbox("Search scope:", list(search_scopes.keys()))
+    
     # Display chat history
     for message in st.session_state.messages:
         with st.chat_message(message["role"]):
@@ -127,39 +141,45 @@ with tab1:
         
         # Get response from auditor
         with st.chat_message("assistant"):
-            with st.spinner("Searching architecture documents and generating response..."):
-                try:
-                    answer, sources = ask_auditor(prompt)
-                    st.markdown(answer)
+            try:
+                with st.spinner("Searching architecture documents..."):
+                    answer_stream, sources = ask_auditor_stream(prompt, filters=search_scopes[search_scope])
+                
+                # Show the answer as it is generated (reasoning is stripped on the fly)
+                with st.spinner("Generating response..."):
+                    answer = st.write_stream(answer_stream)
+                
+                # Enhanced Evidence section with confidence scores
+                if sources:
+                    st.markdown("---")
+                    st.markdown("### 📊 Evidence")
                     
-                    # Enhanced Evidence section with confidence scores
-                    if sources:
-                        st.markdown("---")
-                        st.markdown("### 📊 Evidence")
+                    for idx, src in enumerate(sources, 1):
+                        filename = src.get("filename", "unknown")
+                        content = src.get("content", "")
+                        confidence = src.get("confidence", "Unknown")
+                        similarity_score = src.get("similarity_score", 0.0)
+                        
+                        # Create expander with filename and confidence badge
+                        confidence_emoji = src.get("confidence_emoji", "⚪")
                         
-                        for idx, src in enumerate(sources, 1):
-                            filename = src.get("filename", "unknown")
-                            content = src.get("content", "")
-                            confidence = src.get("confidence", "Unknown")
-                            similarity_score = src.get("similarity_score", 0.0)
-                            
-                            # Create expander with filename and confidence badge
-                            confidence_emoji = src.get("confidence_emoji", "⚪")
-                            
-                            with st.expander(f"{confidence_emoji} **Source {idx}: {filename}** | Confidence: {confidence}"):
-                                st.markdown(f"**Filename:** {filename}")
+                        with st.expander(f"{confidence_emoji} **Source {idx}: {filename}** | Confidence: {confidence}"):
+                            st.markdown(f"**Filename:** {filename}")
+                            if similarity_score is None:
+                                st.markdown(f"**Confidence Score:** {confidence} _(found by keyword / ADR id)_")
+                            else:
                                 st.markdown(f"**Confidence Score:** {confidence} _(FAISS distance: {similarity_score:.3f})_")
-                                st.markdown("**Relevant Content:**")
-                                st.markdown(f"> _{content}_")
-                    else:
-                        st.info("No sources retrieved.")
-                    
-                    # Add assistant response to chat history
-                    st.session_state.messages.append({"role": "assistant", "content": answer})
-                except Exception as e:
-                    error_message = f"❌ Error: {str(e)}"
-                    st.error(error_message)
-                    st.session_state.messages.append({"role": "assistant", "content": error_message})
+                            st.markdown("**Relevant Content:**")
+                            st.markdown(f"> _{content}_")
+                else:
+                    st.info("No sources retrieved.")
+                
+                # Add assistant response to chat history
+                st.session_state.messages.append({"role": "assistant", "content": answer})
+            except Exception as e:
+                error_message = f"❌ Error: {str(e)}"
+                st.error(error_message)
+                st.session_state.messages.append({"role": "assistant", "content": error_message})
 
 # ===================================================================
 # TAB 2: SOLUTION AUDITOR
@@ -0,0 +1,144 @@
+"""
+Batch Embedding Module
+
+Parallel, batched document embedding for ingest.
+
+Chunks are split into batches of EMBED_BATCH_SIZE and embedded by a pool
+of EMBED_WORKERS threads, within the EMBED_RPM / EMBED_TPM rate limits of
+the embedding provider and model, with throttled batches retried (see
+rate_limit). OpenAI and HuggingFace embed a whole batch in one request;
+Bedrock Titan takes one text per request, so there a batch is a group of
+requests and the parallelism comes from the workers.
+"""
+
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from langchain_core.embeddings import Embeddings
+import rate_limit
+
+# Texts per batch by provider when EMBED_BATCH_SIZE is not set
+DEFAULT_BATCH_SIZES = {
+    'bedrock': 16,
+    'openai': 256,
+    'huggingface': 64
+}
+
+# Providers whose embed_documents() sends one request per text
+ONE_REQUEST_PER_TEXT = ('bedrock',)
+
+# Progress is printed every this many chunks
+PROGRESS_EVERY = 500
+
+
+def get_embed_workers():
+    """Get the number of parallel embedding workers from EMBED_WORKERS (default: 8)"""
+    return int(os.getenv('EMBED_WORKERS', '8'))
+
+
+def get_embed_batch_size(provider):
+    """Get the texts per batch from EMBED_BATCH_SIZE (default: per provider)"""
+    batch_size = os.getenv('EMBED_BATCH_SIZE')
+    if batch_size:
+        return int(batch_size)
+    return DEFAULT_BATCH_SIZES.get(provider, 32)
+
+
+class BatchEmbeddings(Embeddings):
+    """
+    Embeddings wrapper that embeds documents in parallel batches.
+
+    Every call is rate-limited and retried here, so the wrapped embeddings
+    should be built without SDK retries (get_embeddings(sdk_retries=False)).
+
+    Args:
+        embeddings (Embeddings): The provider embeddings
+        provider (str, optional): Embedding provider. Defaults to EMBEDDING_PROVIDER
+        model_name (str, optional): Embedding model. Defaults to EMBEDDING_MODEL
+        max_workers (int, optional): Defaults to EMBED_WORKERS
+        batch_size (int, optional): Defaults to EMBED_BATCH_SIZE or the provider default
+    """
+
+    def __init__(self, embeddings, provider=None, model_name=None, max_workers=None, batch_size=None):
+        self.embeddings = embeddings
+        self.provider = (provider or os.getenv('EMBEDDING_PROVIDER', 'bedrock')).lower()
+        self.model_name = model_name or os.getenv('EMBEDDING_MODEL', 'amazon.titan-embed-text-v2:0')
+        self.max_workers = max_workers or get_embed_workers()
+        self.batch_size = batch_size or get_embed_batch_size(self.provider)
+        self.limiter = rate_limit.get_limiter(
+            self.provider,
+            self.model_name,
+            float(os.getenv('EMBED_RPM', '0')),
+            float(os.getenv('EMBED_TPM', '0'))
+        )
+
+    def embed_documents(self, texts):
+        """
+        Embed texts in parallel batches, keeping their order.
+
+        Args:
+            texts (list[str]): Chunk texts
+
+        Returns:
+            list[list[float]]: One vector per text
+        """
+        if not texts:
+            return []
+
+        batches = [texts[start:start + self.batch_size] for start in range(0, len(texts), self.batch_size)]
+        progress = _Progress(len(texts))
+        workers = min(self.max_workers, len(batches))
+        print(f"Embedding {len(texts)} chunks in {len(batches)} batches with {workers} workers...")
+
+        def embed_batch(batch):
+            vectors = rate_limit.call_with_retry(
+                lambda: self.embeddings.embed_documents(batch),
+                self.limiter,
+                sum(len(text) for text in batch) // rate_limit.CHARS_PER_TOKEN,
+                len(batch) if self.provider in ONE_REQUEST_PER_TEXT else 1
+            )
+            progress.add(len(batch))
+            return vectors
+
+        if workers == 1:
+            results = [embed_batch(batch) for batch in batches]
+        else:
+            with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='embed') as executor:
+                results = list(executor.map(embed_batch, batches))
+
+        progress.report()
+        return [vector for vectors in results for vector in vectors]
+
+    def embed_query(self, text):
+        """Embed one query with the provider embeddings, within the rate limit"""
+        return rate_limit.call_with_retry(
+            lambda: self.embeddings.embed_query(text),
+            self.limiter,
+            len(text) // rate_limit.CHARS_PER_TOKEN
+        )
+
+
+class _Progress:
+    """Thread-safe chunk counter that prints throughput"""
+
+    def __init__(self, total):
+        self.total = total
+        self.done = 0
+        self.started = time.monotonic()
+        self._next_report = PROGRESS_EVERY
+        self._lock = threading.Lock()
+
+    def add(self, count):
+        with self._lock:
+            self.done += count
+            if self.done < self._next_report or self.done >= self.total:
+                return
+            self._next_report += PROGRESS_EVERY
+            done = self.done
+        elapsed = time.monotonic() - self.started
+        print(f"  Embedded {done}/{self.total} chunks ({done / elapsed:.1f} chunks/sec)")
+
+    def report(self):
+        elapsed = max(time.monotonic() - self.started, 1e-9)
+        print(f"✅ Embedded {self.total} chunks in {elapsed:.1f}s ({self.total / elapsed:.1f} chunks/sec)")
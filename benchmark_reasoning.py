@@ -0,0 +1,126 @@
+"""
+Reasoning Stripper Benchmark
+
+Time reasoning.strip_reasoning() and the streaming ReasoningStripper on
+long synthetic DeepSeek-R1 outputs, against the previous line-by-line
+cleanup that scanned every line once per phrase.
+
+Usage:
+    python benchmark_reasoning.py
+    python benchmark_reasoning.py --lines 20000 --chunk-size 8
+"""
+
+import argparse
+import random
+import timeit
+from reasoning import (
+    ANSWER_STARTERS,
+    INSTRUCTION_ECHOES,
+    REASONING_MARKERS,
+    REASONING_STARTERS,
+    ReasoningStripper,
+    strip_reasoning
+)
+
+REASONING_LINES = [
+    "Okay, let's see. The user is asking about data residency.",
+    "Wait, the context mentions two decision records on this.",
+    "Looking at the first chunk, it covers encryption at rest.",
+    "Hmm, I should check whether the second one supersedes it.",
+    "So, the answer should list both and explain the difference.",
+    "But wait, the instructions say not to mention the context."
+]
+
+ANSWER_LINES = [
+    "Based on ADR-003, all customer data must stay in the home region.",
+    "1. Encrypt data at rest with customer-managed KMS keys.",
+    "2. Replicate only anonymized aggregates across regions.",
+    "Cross-region backups need an approved exception.",
+    ""
+]
+
+
+def make_r1_output(reasoning_lines, answer_lines, seed=0):
+    """Build a DeepSeek-R1 style response: a long <think> block, then the answer"""
+    rng = random.Random(seed)
+    thinking = [rng.choice(REASONING_LINES) for _ in range(reasoning_lines)]
+    answer = [rng.choice(ANSWER_LINES) for _ in range(answer_lines)]
+    return "<think>\n" + "\n".join(thinking) + "\n</think>\n\n" + "\n".join(answer)
+
+
+def legacy_clean(answer):
+    """The previous cleanup: marker replaces and one substring scan per phrase per line"""
+    lower = answer.lower()
+    for marker in ("</think>", "</thinking>"):
+        if marker in lower:
+            answer = answer[lower.rindex(marker) + len(marker):].strip()
+            break
+    for marker in REASONING_MARKERS:
+        answer = answer.replace(marker, "")
+
+    filtered_lines = []
+    in_reasoning_block = False
+    found_answer_content = False
+    for line in answer.splitlines():
+        line_stripped = line.strip()
+        if not line_stripped:
+            if found_answer_content:
+                filtered_lines.append("")
+            continue
+        line_lower = line_stripped.lower()
+        if any(echo in line_lower for echo in INSTRUCTION_ECHOES):
+            continue
+        is_reasoning = any(starter in line_lower for starter in REASONING_STARTERS)
+        is_answer = (
+            any(starter in line_lower for starter in ANSWER_STARTERS) or
+            line_stripped.startswith(("ADR-", "adr-", "- ADR", "* ADR", "1.", "2.", "3.", "4.", "5."))
+        )
+        if is_answer:
+            in_reasoning_block = False
+            found_answer_content = True
+            filtered_lines.append(line)
+        elif is_reasoning:
+            if not found_answer_content:
+                in_reasoning_block = True
+                continue
+            filtered_lines.append(line)
+        elif not in_reasoning_block or found_answer_content:
+            filtered_lines.append(line)
+    return "\n".join(filtered_lines).strip()
+
+
+def stream_strip(text, chunk_size):
+    """Feed text to a ReasoningStripper in fixed-size chunks, as a token stream would"""
+    stripper = ReasoningStripper(expect_reasoning_block=True)
+    parts = [stripper.feed(text[i:i + chunk_size]) for i in range(0, len(text), chunk_size)]
+    parts.append(stripper.finish())
+    return "".join(parts)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the reasoning stripper")
+    parser.add_argument('--lines', type=int, default=5000, help="Reasoning lines per response")
+    parser.add_argument('--answer-lines', type=int, default=200, help="Answer lines per response")
+    parser.add_argument('--chunk-size', type=int, default=16, help="Characters per streamed chunk")
+    parser.add_argument('--repeat', type=int, default=5, help="Timing runs (best is reported)")
+    args = parser.parse_args()
+
+    text = make_r1_output(args.lines, args.answer_lines)
+    print(f"📏 Response: {len(text):,} characters, {text.count(chr(10)) + 1:,} lines")
+
+    # Both stream and batch must agree before timing means anything
+    if stream_strip(text, args.chunk_size).strip() != strip_reasoning(text, expect_reasoning_block=True):
+        print("⚠️  Streamed and batch output differ")
+
+    benchmarks = [
+        ("legacy line-by-line", lambda: legacy_clean(text)),
+        ("strip_reasoning", lambda: strip_reasoning(text)),
+        (f"stream ({args.chunk_size}-char chunks)", lambda: stream_strip(text, args.chunk_size))
+    ]
+    for name, func in benchmarks:
+        best = min(timeit.repeat(func, number=1, repeat=args.repeat))
+        print(f"⏱️  {name:<28} {best * 1000:8.2f} ms   {len(text) / best / 1e6:6.1f} MB/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,47 +1,328 @@
-import boto3
+import asyncio
+import importlib.util
+import itertools
 import json
 import os
+import threading
+import time
 from dotenv import load_dotenv
-from langchain_community.vectorstores import FAISS
-from embeddings import get_embeddings
+from embeddings import get_embeddings, get_embedding_info
+import embedding_cache
+import failover
+import index_store
+import keyword_index
+import llm_cache
+import llm_clients
+import rate_limit
+import reasoning
+import semantic_cache
+import sharded_index
+import singleflight
 import config
 
 # Load environment variables from .env file
 load_dotenv()
 
-# Global variable to store the loaded FAISS index
+# Global variable to store the loaded FAISS index (all shards)
 _vectorstore = None
 
-def load_faiss_index(index_path=None):
+# Where the index was loaded from, for reloading a newer generation
+_index_path = None
+_use_mmap = False
+_watcher = None
+
+# Serializes index loads so concurrent first callers share one load
+_index_lock = threading.RLock()
+
+# In-flight LLM calls by cache key, so identical concurrent calls share one request
+_llm_flights = singleflight.Group()
+
+# Questions naming an ADR id that the keyword index knows are answered
+# from fewer chunks, the named ADRs' own first
+EXACT_MATCH_K = 3
+
+
+def get_retrieval_mode():
+    """Get the retrieval mode from the RETRIEVAL_MODE env var: 'vector' (default) or 'hybrid'"""
+    return os.getenv('RETRIEVAL_MODE', 'vector').lower()
+
+def get_index_watch_interval():
+    """Get how often (seconds) to check for a newly published index from INDEX_WATCH_INTERVAL (default: 5, 0 disables)"""
+    return float(os.getenv('INDEX_WATCH_INTERVAL', '5'))
+
+def load_faiss_index(index_path=None, use_mmap=None):
     """
     Load the FAISS index from local storage.
     
+    Every shard (local docs, each Confluence space) of the live index
+    generation is loaded and searched together as one knowledge base.
+    A background thread then watches for newer generations published by
+    ingest.py and swaps them in (see reload_faiss_index).
+    
     Args:
         index_path (str, optional): Path to the FAISS index folder. 
                                    Defaults to 'faiss_index' in the script directory.
+        use_mmap (bool, optional): Memory-map the index read-only so worker processes
+                                   share page-cache pages. Defaults to the FAISS_MMAP env var.
     
     Returns:
-        FAISS: The loaded FAISS vectorstore
+        ShardedIndex: The loaded FAISS shards
     """
-    global _vectorstore
-    
     if _vectorstore is not None:
         return _vectorstore
     
+    with _index_lock:
+        # Another thread may have finished loading while this one waited
+        if _vectorstore is not None:
+            return _vectorstore
+        return _load_faiss_index(index_path, use_mmap)
+
+def _load_faiss_index(index_path, use_mmap):
+    """Load the index; the caller holds _index_lock"""
+    global _vectorstore, _index_path, _use_mmap
+    
     if index_path is None:
-        index_path = os.path.join(os.path.dirname(__file__), 'faiss_index')
+        index_path = index_store.default_index_path()
     
     if not os.path.exists(index_path):
         raise FileNotFoundError(f"FAISS index not found at: {index_path}. Please run ingest.py first.")
     
-    # Initialize embeddings using configured provider
-    embeddings = get_embeddings()
+    if use_mmap is None:
+        use_mmap = index_store.mmap_enabled()
+    
+    # Initialize embeddings using configured provider; repeated questions
+    # are served from the query-embedding cache, concurrent identical ones
+    # share one provider call
+    embedding_info = get_embedding_info()
+    embeddings = embedding_cache.cached_query_embeddings(
+        get_embeddings(),
+        f"{embedding_info['provider'].lower()}:{embedding_info['raw_model']}"
+    )
     
-    # Load the FAISS index
-    _vectorstore = FAISS.load_local(index_path, embeddings, allow_dangerous_deserialization=True)
+    # Load the FAISS shards
+    _vectorstore = sharded_index.load_sharded_index(index_path, embeddings, use_mmap=use_mmap)
+    _index_path, _use_mmap = index_path, use_mmap
+    _start_index_watcher()
     
     return _vectorstore
 
+def reload_faiss_index():
+    """
+    Load the live index generation and swap it in.
+    
+    The new generation is fully loaded before the swap; queries already
+    running keep the index object they started with, so no request ever
+    sees a mix of old and new shards.
+    
+    Returns:
+        ShardedIndex: The newly loaded index
+    """
+    global _vectorstore
+    
+    if _vectorstore is None:
+        return load_faiss_index()
+    
+    # Queries read _vectorstore without the lock; only other loads wait
+    with _index_lock:
+        new_index = sharded_index.load_sharded_index(_index_path, _vectorstore.embedding_function, use_mmap=_use_mmap)
+        old_index, _vectorstore = _vectorstore, new_index
+    old_index.close()
+    return new_index
+
+def get_index_generation():
+    """Get the knowledge-base generation answers are built from (the loaded one, else the published one)"""
+    if _vectorstore is not None:
+        return _vectorstore.generation
+    return index_store.current_generation(_index_path or index_store.default_index_path())
+
+def _start_index_watcher():
+    """Start the background thread that picks up newly published index generations"""
+    global _watcher
+    
+    interval = get_index_watch_interval()
+    if _watcher is not None or interval <= 0:
+        return
+    
+    _watcher = threading.Thread(target=_watch_index, args=(interval,), name='index-watcher', daemon=True)
+    _watcher.start()
+
+def _watch_index(interval):
+    while True:
+        time.sleep(interval)
+        try:
+            generation = index_store.current_generation(_index_path)
+            if generation != _vectorstore.generation:
+                print(f"🔄 Loading index generation {generation}...")
+                reload_faiss_index()
+        except Exception as e:
+            # Keep serving the loaded generation; retry on the next poll
+            print(f"⚠️ Could not load new index generation: {e}")
+
+def search_many(questions, k=6, vectorstore=None, filters=None):
+    """
+    Run several similarity searches at once.
+    
+    All questions are embedded as queries (cached ones read from the query
+    cache in one lookup) and searched with a single FAISS call per shard
+    over the stacked query matrix, instead of one search dispatch per question.
+    
+    Args:
+        questions (list[str]): The questions to search for
+        k (int, optional): Number of hits per question. Defaults to 6
+        vectorstore (ShardedIndex, optional): Index to search. Defaults to load_faiss_index()
+        filters (dict, optional): Metadata filters, e.g. {'doc_type': 'adr'} or
+                                  {'source_prefix': 'confluence:', 'space': 'ARCH'}.
+                                  See chunk_store.FILTER_KEYS.
+    
+    Returns:
+        list[list[tuple]]: For each question, a list of (Document, L2 distance)
+        ordered from best to worst match
+    """
+    if not questions:
+        return []
+    
+    if vectorstore is None:
+        vectorstore = load_faiss_index()
+    
+    query_vectors = vectorstore.embedding_function.embed_queries(questions)
+    return search_by_vectors(query_vectors, k, vectorstore, filters)
+
+def search_by_vectors(query_vectors, k=6, vectorstore=None, filters=None):
+    """
+    Search already embedded queries in all shards.
+    
+    Shards are searched in parallel threads and their top-k lists merged
+    by distance. Filters are applied inside FAISS through a precomputed
+    FAISS id bitmap, so every one of the k hits matches (no over-fetching
+    and discarding).
+    
+    Args:
+        query_vectors (list[list[float]]): Embedded queries
+        k (int, optional): Number of hits per query. Defaults to 6
+        vectorstore (ShardedIndex, optional): Index to search. Defaults to load_faiss_index()
+        filters (dict, optional): Metadata filters (see search_many)
+    
+    Returns:
+        list[list[tuple]]: For each query, a list of (Document, L2 distance), best first
+    """
+    if vectorstore is None:
+        vectorstore = load_faiss_index()
+    
+    return vectorstore.search_by_vectors(query_vectors, k, filters)
+
+def hybrid_search(question, k=6, vectorstore=None, query_vector=None, filters=None):
+    """
+    Retrieve chunks by merging BM25 keyword hits and vector hits with
+    reciprocal-rank fusion.
+    
+    If the question names ADR ids (e.g. "ADR-007") that appear in the
+    keyword index, only EXACT_MATCH_K chunks are returned, which keeps the
+    prompt small: the named ADRs' chunks from the ADR-id index closest to
+    the question come first (the best chunk of each ADR before the second
+    best of any), and the fused ranking fills the remaining slots.
+    
+    Falls back to plain vector search for indexes without a keyword index.
+    
+    Args:
+        question (str): The user's question
+        k (int, optional): Number of chunks to return. Defaults to 6
+        vectorstore (ShardedIndex, optional): Index to search. Defaults to load_faiss_index()
+        query_vector (list[float], optional): Already embedded question
+        filters (dict, optional): Metadata filters (see search_many)
+    
+    Returns:
+        list[tuple]: (Document, L2 distance) pairs, best first. The distance is None
+        for keyword-only hits whose vector cannot be reconstructed from the index.
+    """
+    if vectorstore is None:
+        vectorstore = load_faiss_index()
+    
+    if query_vector is None:
+        query_vector = vectorstore.embedding_function.embed_query(question)
+    
+    vector_hits = search_by_vectors([query_vector], k, vectorstore, filters)[0]
+    if not vectorstore.has_keyword_index:
+        return vector_hits
+    
+    lexical_hits = vectorstore.keyword_search(question, k, filters, query_vector)
+    
+    docs_by_id = {doc.id: (doc, distance) for doc, distance in vector_hits}
+    for doc, score, distance in lexical_hits:
+        docs_by_id.setdefault(doc.id, (doc, distance))
+    
+    vector_ranking = [doc.id for doc, distance in vector_hits]
+    lexical_ranking = [doc.id for doc, score, distance in lexical_hits]
+    fused = [docs_by_id[doc_id] for doc_id, score in keyword_index.reciprocal_rank_fusion(vector_ranking, lexical_ranking)]
+    
+    # Exact identifier lookups need only a handful of chunks, and RRF keeps
+    # no score magnitudes, so the named ADRs are put first explicitly
+    adr_ids = keyword_index.find_adr_ids(question)
+    if not adr_ids or not all(vectorstore.adr_id_known(adr_id) for adr_id in adr_ids):
+        return fused[:k]
+    
+    k = min(k, EXACT_MATCH_K)
+    per_adr = [vectorstore.adr_hits(adr_id, k, filters, query_vector) for adr_id in adr_ids]
+    exact_hits = [hit for rank in itertools.zip_longest(*per_adr) for hit in rank if hit is not None]
+    hits = []
+    seen = set()
+    for hit in exact_hits + fused:
+        if hit[0].id not in seen:
+            seen.add(hit[0].id)
+            hits.append(hit)
+    return hits[:k]
+
+def has_adr_index():
+    """Check whether the loaded index has an ADR-id index (indexes built before it don't)"""
+    return load_faiss_index().has_keyword_index
+
+def get_adr_documents(adr_id, vectorstore=None):
+    """
+    Fetch every chunk that belongs to or mentions an ADR, using the ADR-id
+    index built at ingest time (no vector search involved).
+    
+    Args:
+        adr_id (str): ADR identifier, e.g. 'ADR-007'
+        vectorstore (ShardedIndex, optional): Index to read from. Defaults to load_faiss_index()
+    
+    Returns:
+        list[Document]: The ADR's chunks. Empty if the ADR is unknown or the
+        index predates the ADR-id index.
+    """
+    if vectorstore is None:
+        vectorstore = load_faiss_index()
+    
+    return [doc for doc, distance in vectorstore.adr_documents(adr_id)]
+
+def priority_adr_hits(query_vector, vectorstore=None, adr_ids=None, filters=None):
+    """
+    Get the chunk of each priority ADR that best matches a query.
+    
+    Chunks come straight from the ADR-id index, so priority ADRs are in
+    context even when they would not land in the top k of vector search.
+    
+    Args:
+        query_vector (list[float]): Embedded question
+        vectorstore (ShardedIndex, optional): Index to read from. Defaults to load_faiss_index()
+        adr_ids (list[str], optional): ADRs to fetch. Defaults to config.PRIORITY_ADRS
+        filters (dict, optional): Metadata filters; ADR chunks outside them are skipped
+    
+    Returns:
+        list[tuple]: (Document, L2 distance or None) for each ADR found, best first
+    """
+    if vectorstore is None:
+        vectorstore = load_faiss_index()
+    
+    if adr_ids is None:
+        adr_ids = config.PRIORITY_ADRS
+    
+    hits = []
+    for adr_id in adr_ids:
+        # Closest chunk wins; without distances the ADR's first chunk is kept
+        hits.extend(vectorstore.adr_hits(adr_id, 1, filters, query_vector))
+    
+    hits.sort(key=lambda hit: hit[1] if hit[1] is not None else float('inf'))
+    return hits
+
 def invoke_llm(prompt, max_tokens=1024, temperature=0.7, top_p=0.9):
     """
     Invoke LLM based on configured provider (model-agnostic).
@@ -54,6 +335,16 @@ def invoke_llm(prompt, max_tokens=1024, temperature=0.7, top_p=0.9):
     Configuration via environment variables:
     - MODEL_PROVIDER: 'bedrock', 'openai', or 'anthropic'
     - MODEL_NAME: specific model ID/name
+    - LLM_PROVIDERS: optional ordered provider:model list, used instead of the
+      two above, with hedging of slow calls and failover (see failover)
+    
+    With LLM_CACHE=true, responses are cached by provider, model, sampling
+    parameters, knowledge-base generation and prompt (see llm_cache), so a
+    repeated question with the same retrieved context costs nothing.
+    A response is stored under the target that answered it, and only the
+    first target's responses are looked up, so a failover or hedge answer
+    is never served as the primary model's.
+    Identical concurrent calls share one provider request (see singleflight).
     
     Args:
         prompt (str): The prompt to send to the LLM
@@ -64,9 +355,45 @@ def invoke_llm(prompt, max_tokens=1024, temperature=0.7, top_p=0.9):
     Returns:
         str: The response from the LLM
     """
-    provider = os.getenv('MODEL_PROVIDER', 'bedrock').lower()
-    model_name = os.getenv('MODEL_NAME', 'us.deepseek.r1-v1:0')
+    targets = failover.get_targets()
+    provider, model_name = targets[0]
     
+    cache = llm_cache.get_cache()
+    cache_key = _llm_cache_key(provider, model_name, prompt, max_tokens, temperature, top_p)
+    if cache is not None:
+        cached = cache.get(cache_key)
+        if cached is not None:
+            return cached
+    
+    def attempt(provider, model_name):
+        target_key = _llm_cache_key(provider, model_name, prompt, max_tokens, temperature, top_p)
+        response = _invoke_provider(provider, prompt, model_name, max_tokens, temperature, top_p)
+        if cache is not None and isinstance(response, str) and response:
+            cache.put(target_key, response)
+        return response
+    
+    return _llm_flights.do(cache_key, lambda: failover.invoke(targets, attempt))
+
+def _llm_cache_key(provider, model_name, prompt, max_tokens, temperature, top_p):
+    """Build the llm_cache (and single-flight) key of a call against the current index generation"""
+    return llm_cache.make_key(
+        provider,
+        model_name,
+        {'max_tokens': max_tokens, 'temperature': temperature, 'top_p': top_p},
+        get_index_generation(),
+        prompt
+    )
+
+def _invoke_provider(provider, prompt, model_name, max_tokens, temperature, top_p):
+    """Send a prompt to the configured provider within its rate limit, retrying throttled calls"""
+    return rate_limit.call_with_retry(
+        lambda: _call_provider(provider, prompt, model_name, max_tokens, temperature, top_p),
+        rate_limit.get_limiter(provider, model_name),
+        rate_limit.estimate_tokens(prompt, max_tokens)
+    )
+
+def _call_provider(provider, prompt, model_name, max_tokens, temperature, top_p):
+    """Send a prompt to the configured provider"""
     if provider == 'bedrock':
         return _invoke_bedrock(prompt, model_name, max_tokens, temperature, top_p)
     elif provider == 'openai':
@@ -76,19 +403,14 @@ def invoke_llm(prompt, max_tokens=1024, temperature=0.7, top_p=0.9):
     else:
         raise ValueError(f"Unsupported MODEL_PROVIDER: {provider}. Use 'bedrock', 'openai', or 'anthropic'.")
 
-def _invoke_bedrock(prompt, model_id, max_tokens=1024, temperature=0.7, top_p=0.9):
-    """Invoke AWS Bedrock models (DeepSeek-R1, Claude, etc.)"""
+def _bedrock_request(prompt, model_id, max_tokens, temperature, top_p):
+    """Get the Bedrock client and the request body for a model family"""
     region_name = os.getenv('AWS_REGION', 'us-east-1')
     aws_access_key = os.getenv('AWS_ACCESS_KEY_ID')
     aws_secret_key = os.getenv('AWS_SECRET_ACCESS_KEY')
     
-    # Create a Bedrock runtime client
-    client_kwargs = {'region_name': region_name}
-    if aws_access_key and aws_secret_key:
-        client_kwargs['aws_access_key_id'] = aws_access_key
-        client_kwargs['aws_secret_access_key'] = aws_secret_key
-    
-    bedrock_runtime = boto3.client('bedrock-runtime', **client_kwargs)
+    # Get the shared, pooled Bedrock runtime client
+    bedrock_runtime = llm_clients.get_bedrock_client(region_name, aws_access_key, aws_secret_key)
     
     # Handle different Bedrock model formats
     if 'deepseek' in model_id.lower():
@@ -116,6 +438,12 @@ def _invoke_bedrock(prompt, model_id, max_tokens=1024, temperature=0.7, top_p=0.
             'top_p': top_p
         })
     
+    return bedrock_runtime, body
+
+def _invoke_bedrock(prompt, model_id, max_tokens=1024, temperature=0.7, top_p=0.9):
+    """Invoke AWS Bedrock models (DeepSeek-R1, Claude, etc.)"""
+    bedrock_runtime, body = _bedrock_request(prompt, model_id, max_tokens, temperature, top_p)
+    
     # Invoke the model
     response = bedrock_runtime.invoke_model(
         modelId=model_id,
@@ -137,16 +465,14 @@ def _invoke_bedrock(prompt, model_id, max_tokens=1024, temperature=0.7, top_p=0.
 
 def _invoke_openai(prompt, model_name, max_tokens=1024, temperature=0.7, top_p=0.9):
     """Invoke OpenAI models (GPT-4, GPT-3.5, etc.)"""
-    try:
-        from openai import OpenAI
-    except ImportError:
+    if importlib.util.find_spec('openai') is None:
         raise ImportError("OpenAI package not installed. Run: pip install openai")
     
     api_key = os.getenv('OPENAI_API_KEY')
     if not api_key:
         raise ValueError("OPENAI_API_KEY not set in environment variables")
     
-    client = OpenAI(api_key=api_key)
+    client = llm_clients.get_openai_client(api_key)
     
     response = client.chat.completions.create(
         model=model_name,
@@ -160,16 +486,14 @@ def _invoke_openai(prompt, model_name, max_tokens=1024, temperature=0.7, top_p=0
 
 def _invoke_anthropic(prompt, model_name, max_tokens=1024, temperature=0.7, top_p=0.9):
     """Invoke Anthropic Claude models via API"""
-    try:
-        from anthropic import Anthropic
-    except ImportError:
+    if importlib.util.find_spec('anthropic') is None:
         raise ImportError("Anthropic package not installed. Run: pip install anthropic")
     
     api_key = os.getenv('ANTHROPIC_API_KEY')
     if not api_key:
         raise ValueError("ANTHROPIC_API_KEY not set in environment variables")
     
-    client = Anthropic(api_key=api_key)
+    client = llm_clients.get_anthropic_client(api_key)
     
     response = client.messages.create(
         model=model_name,
@@ -181,6 +505,271 @@ def _invoke_anthropic(prompt, model_name, max_tokens=1024, temperature=0.7, top_
     
     return response.content[0].text
 
+def get_llm_concurrency():
+    """Get how many LLM calls invoke_llm_many() runs at once from LLM_MAX_CONCURRENCY (default: 8)"""
+    return int(os.getenv('LLM_MAX_CONCURRENCY', '8'))
+
+async def invoke_llm_async(prompt, max_tokens=1024, temperature=0.7, top_p=0.9, semaphore=None):
+    """
+    Async variant of invoke_llm() for callers that run many LLM calls from one event loop.
+    
+    OpenAI and Anthropic use their async clients. Bedrock calls run on the
+    shared, pooled boto3 client in llm_clients' thread pool, since boto3
+    has no async API. The response cache is shared with invoke_llm().
+    
+    Args:
+        prompt (str): The prompt to send to the LLM
+        max_tokens (int, optional): Maximum tokens to generate. Defaults to 1024
+        temperature (float, optional): Sampling temperature. Defaults to 0.7
+        top_p (float, optional): Nucleus sampling parameter. Defaults to 0.9
+        semaphore (asyncio.Semaphore, optional): Shared limit on in-flight provider calls;
+                                                 cache hits do not take a slot
+    
+    Returns:
+        str: The response from the LLM
+    """
+    targets = failover.get_targets()
+    provider, model_name = targets[0]
+    
+    cache = llm_cache.get_cache()
+    cache_key = _llm_cache_key(provider, model_name, prompt, max_tokens, temperature, top_p)
+    if cache is not None:
+        cached = await asyncio.to_thread(cache.get, cache_key)
+        if cached is not None:
+            return cached
+    
+    async def attempt(provider, model_name):
+        # Stored under the target that answered, like invoke_llm()
+        target_key = _llm_cache_key(provider, model_name, prompt, max_tokens, temperature, top_p)
+        response = await _invoke_provider_async(provider, prompt, model_name, max_tokens, temperature, top_p)
+        if cache is not None and isinstance(response, str) and response:
+            await asyncio.to_thread(cache.put, target_key, response)
+        return response
+    
+    async def call():
+        if semaphore is None:
+            return await failover.invoke_async(targets, attempt)
+        async with semaphore:
+            return await failover.invoke_async(targets, attempt)
+    
+    # Shares in-flight calls with invoke_llm() and other coroutines
+    return await _llm_flights.do_async(cache_key, call)
+
+async def invoke_llm_many(prompts, max_concurrency=None, max_tokens=1024, temperature=0.7, top_p=0.9):
+    """
+    Run invoke_llm_async() for many prompts with bounded concurrency.
+    
+    Args:
+        prompts (list[str]): Prompts to send
+        max_concurrency (int, optional): Provider calls in flight at once.
+                                         Defaults to LLM_MAX_CONCURRENCY
+        max_tokens (int, optional): Maximum tokens to generate. Defaults to 1024
+        temperature (float, optional): Sampling temperature. Defaults to 0.7
+        top_p (float, optional): Nucleus sampling parameter. Defaults to 0.9
+    
+    Returns:
+        list[str]: Responses, in the order of prompts
+    """
+    semaphore = asyncio.Semaphore(max_concurrency or get_llm_concurrency())
+    return await asyncio.gather(*(
+        invoke_llm_async(prompt, max_tokens, temperature, top_p, semaphore=semaphore)
+        for prompt in prompts
+    ))
+
+async def _invoke_provider_async(provider, prompt, model_name, max_tokens, temperature, top_p):
+    """Async variant of _invoke_provider()"""
+    return await rate_limit.call_with_retry_async(
+        lambda: _call_provider_async(provider, prompt, model_name, max_tokens, temperature, top_p),
+        rate_limit.get_limiter(provider, model_name),
+        rate_limit.estimate_tokens(prompt, max_tokens)
+    )
+
+async def _call_provider_async(provider, prompt, model_name, max_tokens, temperature, top_p):
+    """Send a prompt to the configured provider without blocking the event loop"""
+    if provider == 'bedrock':
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            llm_clients.get_executor(),
+            _invoke_bedrock, prompt, model_name, max_tokens, temperature, top_p
+        )
+    elif provider == 'openai':
+        return await _invoke_openai_async(prompt, model_name, max_tokens, temperature, top_p)
+    elif provider == 'anthropic':
+        return await _invoke_anthropic_async(prompt, model_name, max_tokens, temperature, top_p)
+    else:
+        raise ValueError(f"Unsupported MODEL_PROVIDER: {provider}. Use 'bedrock', 'openai', or 'anthropic'.")
+
+async def _invoke_openai_async(prompt, model_name, max_tokens=1024, temperature=0.7, top_p=0.9):
+    """Invoke OpenAI models with the async client"""
+    if importlib.util.find_spec('openai') is None:
+        raise ImportError("OpenAI package not installed. Run: pip install openai")
+    
+    api_key = os.getenv('OPENAI_API_KEY')
+    if not api_key:
+        raise ValueError("OPENAI_API_KEY not set in environment variables")
+    
+    client = llm_clients.get_async_openai_client(api_key)
+    
+    response = await client.chat.completions.create(
+        model=model_name,
+        messages=[{"role": "user", "content": prompt}],
+        max_tokens=max_tokens,
+        temperature=temperature,
+        top_p=top_p
+    )
+    
+    return response.choices[0].message.content
+
+async def _invoke_anthropic_async(prompt, model_name, max_tokens=1024, temperature=0.7, top_p=0.9):
+    """Invoke Anthropic Claude models with the async client"""
+    if importlib.util.find_spec('anthropic') is None:
+        raise ImportError("Anthropic package not installed. Run: pip install anthropic")
+    
+    api_key = os.getenv('ANTHROPIC_API_KEY')
+    if not api_key:
+        raise ValueError("ANTHROPIC_API_KEY not set in environment variables")
+    
+    client = llm_clients.get_async_anthropic_client(api_key)
+    
+    response = await client.messages.create(
+        model=model_name,
+        max_tokens=max_tokens,
+        temperature=temperature,
+        top_p=top_p,
+        messages=[{"role": "user", "content": prompt}]
+    )
+    
+    return response.content[0].text
+
+def invoke_llm_stream(prompt, max_tokens=1024, temperature=0.7, top_p=0.9):
+    """
+    Streaming variant of invoke_llm(): yields the completion as it is generated.
+    
+    Uses Bedrock invoke_model_with_response_stream, or the OpenAI / Anthropic
+    streaming APIs. Shares invoke_llm()'s response cache: a cached response
+    is yielded in one piece, and a completed stream is stored.
+    
+    Args:
+        prompt (str): The prompt to send to the LLM
+        max_tokens (int, optional): Maximum tokens to generate. Defaults to 1024
+        temperature (float, optional): Sampling temperature. Defaults to 0.7
+        top_p (float, optional): Nucleus sampling parameter. Defaults to 0.9
+    
+    Yields:
+        str: Raw text chunks, reasoning included (see reasoning.ReasoningStripper)
+    """
+    targets = failover.get_targets()
+    provider, model_name = targets[0]
+    
+    cache = llm_cache.get_cache()
+    cache_key = _llm_cache_key(provider, model_name, prompt, max_tokens, temperature, top_p)
+    if cache is not None:
+        cached = cache.get(cache_key)
+        if cached is not None:
+            yield cached
+            return
+    
+    def attempt(provider, model_name):
+        # A completed stream is stored under the target that answered, like invoke_llm()
+        target_key = _llm_cache_key(provider, model_name, prompt, max_tokens, temperature, top_p)
+        parts = []
+        for chunk in _open_stream(provider, prompt, model_name, max_tokens, temperature, top_p):
+            parts.append(chunk)
+            yield chunk
+        # An empty answer is not stored, so the next ask tries the provider again
+        response = "".join(parts)
+        if cache is not None and response:
+            cache.put(target_key, response)
+    
+    # Fails over to the next LLM_PROVIDERS target until one starts answering.
+    # A caller asking while the same prompt is streaming gets its full text in one chunk
+    yield from _llm_flights.stream(cache_key, lambda: failover.stream(targets, attempt))
+
+def _open_stream(provider, prompt, model_name, max_tokens, temperature, top_p):
+    """Open a stream from a provider within its rate limit, retrying throttled starts"""
+    if provider == 'bedrock':
+        open_stream = _stream_bedrock
+    elif provider == 'openai':
+        open_stream = _stream_openai
+    elif provider == 'anthropic':
+        open_stream = _stream_anthropic
+    else:
+        raise ValueError(f"Unsupported MODEL_PROVIDER: {provider}. Use 'bedrock', 'openai', or 'anthropic'.")
+    
+    return rate_limit.retry_stream(
+        lambda: open_stream(prompt, model_name, max_tokens, temperature, top_p),
+        rate_limit.get_limiter(provider, model_name),
+        rate_limit.estimate_tokens(prompt, max_tokens)
+    )
+
+def _stream_bedrock(prompt, model_id, max_tokens=1024, temperature=0.7, top_p=0.9):
+    """Stream AWS Bedrock models with invoke_model_with_response_stream"""
+    bedrock_runtime, body = _bedrock_request(prompt, model_id, max_tokens, temperature, top_p)
+    
+    response = bedrock_runtime.invoke_model_with_response_stream(
+        modelId=model_id,
+        body=body,
+        accept='application/json',
+        contentType='application/json'
+    )
+    
+    for event in response['body']:
+        if 'chunk' not in event:
+            continue
+        chunk = json.loads(event['chunk']['bytes'].decode('utf-8'))
+        
+        # Same text fields as the non-streaming response, per model type
+        if chunk.get('choices'):
+            text = chunk['choices'][0].get('text')
+        else:
+            text = chunk.get('completion')
+        if text:
+            yield text
+
+def _stream_openai(prompt, model_name, max_tokens=1024, temperature=0.7, top_p=0.9):
+    """Stream OpenAI chat completions"""
+    if importlib.util.find_spec('openai') is None:
+        raise ImportError("OpenAI package not installed. Run: pip install openai")
+    
+    api_key = os.getenv('OPENAI_API_KEY')
+    if not api_key:
+        raise ValueError("OPENAI_API_KEY not set in environment variables")
+    
+    client = llm_clients.get_openai_client(api_key)
+    
+    stream = client.chat.completions.create(
+        model=model_name,
+        messages=[{"role": "user", "content": prompt}],
+        max_tokens=max_tokens,
+        temperature=temperature,
+        top_p=top_p,
+        stream=True
+    )
+    
+    for chunk in stream:
+        if chunk.choices and chunk.choices[0].delta.content:
+            yield chunk.choices[0].delta.content
+
+def _stream_anthropic(prompt, model_name, max_tokens=1024, temperature=0.7, top_p=0.9):
+    """Stream Anthropic Claude messages"""
+    if importlib.util.find_spec('anthropic') is None:
+        raise ImportError("Anthropic package not installed. Run: pip install anthropic")
+    
+    api_key = os.getenv('ANTHROPIC_API_KEY')
+    if not api_key:
+        raise ValueError("ANTHROPIC_API_KEY not set in environment variables")
+    
+    client = llm_clients.get_anthropic_client(api_key)
+    
+    with client.messages.stream(
+        model=model_name,
+        max_tokens=max_tokens,
+        temperature=temperature,
+        top_p=top_p,
+        messages=[{"role": "user", "content": prompt}]
+    ) as stream:
+        yield from stream.text_stream
+
 # Backward compatibility alias
 def invoke_deepseek_r1(prompt, region_name=None, max_tokens=1024, temperature=0.7, top_p=0.9):
     """
@@ -227,17 +816,13 @@ def rerank_chunks(docs, question):
     scored_docs.sort(key=lambda x: x[0], reverse=True)
     return [doc for score, doc in scored_docs]
 
-def ask_auditor(question):
+def _prepare_answer(question, filters=None):
     """
-    Ask a question to the AI architect auditor using the FAISS index and DeepSeek-R1.
-    Uses contextual compression and reranking for better retrieval.
-    
-    Args:
-        question (str): The question to ask
+    Retrieve context for a question and build the LLM prompt.
     
     Returns:
-        tuple[str, list[dict]]: The response from DeepSeek-R1, and a list of sources with
-        filename, content, and confidence score for each retrieved chunk.
+        dict: prompt, sources, and the semantic-cache lookup ('cached' holds
+        (answer, sources) when a near-duplicate question was answered before)
     """
     # Load FAISS index if not already loaded
     vectorstore = load_faiss_index()
@@ -245,7 +830,20 @@ def ask_auditor(question):
     # Retrieve top 6 chunks from FAISS with similarity scores (contextual compression approach)
     # Use k=10 for listing questions, otherwise 6 for better context
     k = 10 if any(word in question.lower() for word in ["list", "all", "show", "enumerate"]) else 6
-    docs_with_scores = vectorstore.similarity_search_with_score(question, k=k)
+    query_vector = vectorstore.embedding_function.embed_query(question)
+    if get_retrieval_mode() == 'hybrid':
+        # Merge BM25 keyword hits with vector hits (exact ADR ids, product names)
+        docs_with_scores = hybrid_search(question, k=k, vectorstore=vectorstore, query_vector=query_vector, filters=filters)
+    else:
+        docs_with_scores = search_by_vectors([query_vector], k, vectorstore, filters)[0]
+    
+    # Priority ADRs are fetched directly from the ADR-id index so they are
+    # always in context, not only when they happen to make the top k
+    retrieved_contents = {doc.page_content for doc, score in docs_with_scores}
+    priority_hits = [
+        (doc, score) for doc, score in priority_adr_hits(query_vector, vectorstore, filters=filters)
+        if doc.page_content not in retrieved_contents
+    ]
     
     # Extract documents and scores
     relevant_docs = [doc for doc, score in docs_with_scores]
@@ -253,6 +851,27 @@ def ask_auditor(question):
     # Apply reranking to prioritize AWS, PII, DDD-related chunks
     relevant_docs = rerank_chunks(relevant_docs, question)
     
+    # Priority ADR chunks go first
+    relevant_docs = [doc for doc, score in priority_hits] + relevant_docs
+    docs_with_scores = docs_with_scores + priority_hits
+    
+    # A paraphrase of an earlier question that retrieved the same chunks
+    # gets the earlier answer without another LLM call
+    answer_cache = semantic_cache.get_cache()
+    sources_key = semantic_cache.source_key(relevant_docs) if answer_cache is not None else None
+    prepared = {
+        'question': question,
+        'query_vector': query_vector,
+        'generation': vectorstore.generation,
+        'answer_cache': answer_cache,
+        'sources_key': sources_key,
+        'cached': None
+    }
+    if answer_cache is not None:
+        prepared['cached'] = answer_cache.lookup(query_vector, sources_key, vectorstore.generation)
+        if prepared['cached'] is not None:
+            return prepared
+    
     # Prepare context and source metadata with confidence scores
     context = "\n\n".join([doc.page_content for doc in relevant_docs])
     sources = []
@@ -268,24 +887,33 @@ def ask_auditor(question):
     #
     # Note: These thresholds are calibrated for Titan embeddings (1024-dim, normalized)
     
+    # Chunks the ADR-id index holds for an ADR the question names (see hybrid_search)
+    exact_adr_ids = set()
+    if get_retrieval_mode() == 'hybrid' and vectorstore.has_keyword_index:
+        exact_adr_ids = {adr_id for adr_id in keyword_index.find_adr_ids(question) if vectorstore.adr_id_known(adr_id)}
+    
     for doc in relevant_docs:
         source_path = doc.metadata.get("source", "unknown")
         
         # Find the FAISS distance score for this document
         # Match by document content since reranking may have changed order
-        similarity_score = None
+        similarity_score = 2.0  # Fallback if not found (shouldn't happen)
         for original_doc, score in docs_with_scores:
             if original_doc.page_content == doc.page_content:
                 similarity_score = score
                 break
         
-        # Fallback if not found (shouldn't happen)
-        if similarity_score is None:
-            similarity_score = 2.0
-        
         # Calculate confidence based on FAISS L2 distance
         # Distance formula: sqrt(sum((v1[i] - v2[i])^2))
-        if similarity_score < 0.8:
+        if exact_adr_ids.intersection(keyword_index.chunk_adr_ids(doc.page_content, doc.metadata)):
+            # A chunk of an ADR the question names
+            confidence = "Exact match"
+            confidence_emoji = "🔑"
+        elif similarity_score is None:
+            # Keyword-only hit whose vector can't be reconstructed
+            confidence = "Keyword match"
+            confidence_emoji = "🔤"
+        elif similarity_score < 0.8:
             confidence = "High"
             confidence_emoji = "🟢"
         elif similarity_score < 1.5:
@@ -299,7 +927,7 @@ def ask_auditor(question):
             "source": source_path,
             "filename": os.path.basename(source_path),
             "content": doc.page_content,
-            "similarity_score": round(similarity_score, 3),  # Round for readability
+            "similarity_score": round(similarity_score, 3) if similarity_score is not None else None,  # Round for readability
             "confidence": confidence,
             "confidence_emoji": confidence_emoji
         })
@@ -317,191 +945,98 @@ def ask_auditor(question):
         "If the answer is not in the context, say you do not know."
     )
     
+    prepared.update({'prompt': prompt, 'sources': sources})
+    return prepared
+
+def _finish_answer(prepared, answer):
+    """Fill in an empty answer and remember it in the semantic cache"""
+    # Ensure we never return an empty answer
+    if not answer or len(answer.strip()) == 0:
+        answer = "I do not know. The question is not covered in the available architecture documents."
+    
+    if prepared['answer_cache'] is not None:
+        prepared['answer_cache'].store(
+            prepared['query_vector'],
+            prepared['question'],
+            prepared['sources_key'],
+            prepared['generation'],
+            answer,
+            prepared['sources']
+        )
+    return answer
+
+def ask_auditor(question, filters=None):
+    """
+    Ask a question to the AI architect auditor using the FAISS index and DeepSeek-R1.
+    Uses contextual compression and reranking for better retrieval.
+    
+    Args:
+        question (str): The question to ask
+        filters (dict, optional): Restrict retrieval by metadata, e.g. {'doc_type': 'adr'}
+                                  for "only ADRs". See chunk_store.FILTER_KEYS.
+    
+    Returns:
+        tuple[str, list[dict]]: The response from DeepSeek-R1, and a list of sources with
+        filename, content, and confidence score for each retrieved chunk.
+    """
+    prepared = _prepare_answer(question, filters)
+    if prepared['cached'] is not None:
+        return prepared['cached']
+    
     # Invoke the LLM using the configured provider
-    answer = invoke_llm(prompt)
+    answer = invoke_llm(prepared['prompt'])
     
     # Clean the response: remove reasoning blocks and instruction echoes
     if isinstance(answer, str):
-        # Save original for fallback
-        original_answer = answer
-        
-        # Remove reasoning markers and blocks
-        reasoning_markers = [
-            "<thinking>",
-            "<reasoning>",
-            "</thinking>",
-            "</reasoning>",
-            "</think>",
-            "<think>",
-            "</think>",
-            "<think>"
-        ]
-        
-        # Check if there's a reasoning end marker - everything after it is the answer
-        reasoning_end_markers = ["</think>", "</thinking>", "</think>"]
-        for marker in reasoning_end_markers:
-            if marker.lower() in answer.lower():
-                # Split by reasoning end marker (case-insensitive) and take the last part
-                import re
-                pattern = re.compile(re.escape(marker), re.IGNORECASE)
-                parts = pattern.split(answer)
-                if len(parts) > 1:
-                    answer = parts[-1].strip()
-                    break
-        
-        # Remove reasoning markers
-        for marker in reasoning_markers:
-            answer = answer.replace(marker, "")
-        
-        # Split into lines for processing
-        lines = answer.splitlines()
-        filtered_lines = []
-        in_reasoning_block = False
-        
-        # Common reasoning starters
-        reasoning_starters = [
-            "okay, let's see",
-            "wait,",
-            "the user is asking",
-            "let me think",
-            "looking at",
-            "first,",
-            "so,",
-            "but wait",
-            "however,",
-            "the context",
-            "according to the instructions"
-        ]
-        
-        # Common answer starters (actual content)
-        answer_starters = [
-            "i do not know",
-            "according to",
-            "the requirements",
-            "the decision",
-            "based on",
-            "the architecture",
-            "the policy",
-            "yes,",
-            "no,",
-            "each service",
-            "all data",
-            "encryption",
-            "aws",
-            "the following",
-            "the decision records",
-            "adr-",
-            "decision records",
-            "here are",
-            "here is",
-            "the list",
-            "1.",
-            "2.",
-            "3.",
-            "4.",
-            "- adr",
-            "* adr"
-        ]
-        
-        # Track if we've found actual answer content
-        found_answer_content = False
-        
-        for line in lines:
-            line_stripped = line.strip()
-            if not line_stripped:
-                # Keep empty lines if we've found answer content (for formatting)
-                if found_answer_content:
-                    filtered_lines.append("")
-                continue
-            
-            line_lower = line_stripped.lower()
-            
-            # Skip instruction echoes
-            if "do not make up an answer" in line_lower:
-                continue
-            if "do not mention the context in your answer" in line_lower:
-                continue
-            
-            # Check if this looks like a decision record (ADR format)
-            is_adr_line = (
-                "adr-" in line_lower or 
-                line_stripped.startswith(("ADR-", "adr-")) or
-                line_stripped.startswith(("- ADR", "* ADR", "1.", "2.", "3.", "4.", "5."))
-            )
-            
-            # Check if this line starts reasoning
-            is_reasoning = any(starter in line_lower for starter in reasoning_starters)
-            
-            # Check if this looks like an actual answer
-            is_answer = any(starter in line_lower for starter in answer_starters) or is_adr_line
-            
-            if is_answer:
-                in_reasoning_block = False
-                found_answer_content = True
-                filtered_lines.append(line)
-            elif is_reasoning and not is_answer:
-                # Only skip if it's clearly reasoning and not answer content
-                if not found_answer_content:
-                    in_reasoning_block = True
-                    continue
-                else:
-                    # If we've already found answer content, keep it
-                    filtered_lines.append(line)
-            elif not in_reasoning_block or found_answer_content:
-                # Include if not in reasoning block, or if we've found answer content
-                filtered_lines.append(line)
-        
-        answer = "\n".join(filtered_lines).strip()
-        
-        # If we removed everything, try to find the actual answer in the original
-        if not answer or len(answer) < 10:
-            original_lines = original_answer.splitlines()
-            # Look for lines that contain ADR references or look like answers
-            potential_answers = []
-            for line in original_lines:
-                line_stripped = line.strip()
-                if not line_stripped:
-                    continue
-                line_lower = line_stripped.lower()
-                
-                # Skip clear reasoning
-                if any(starter in line_lower for starter in reasoning_starters):
-                    continue
-                
-                # Keep lines that look like answers
-                if (any(starter in line_lower for starter in answer_starters) or
-                    "adr-" in line_lower or
-                    line_stripped.startswith(("ADR-", "adr-", "-", "*", "1.", "2.", "3.", "4.", "5."))):
-                    potential_answers.append(line_stripped)
-            
-            if potential_answers:
-                answer = "\n".join(potential_answers).strip()
-            elif original_answer.strip():
-                # Last resort: return original if it's not empty
-                # But try to remove obvious reasoning markers first
-                fallback = original_answer
-                for marker in reasoning_markers:
-                    fallback = fallback.replace(marker, "")
-                # Take last few lines that aren't reasoning
-                fallback_lines = fallback.splitlines()
-                last_lines = []
-                for line in reversed(fallback_lines[-10:]):  # Check last 10 lines
-                    line_stripped = line.strip()
-                    if line_stripped and len(line_stripped) > 5:
-                        line_lower = line_stripped.lower()
-                        if not any(starter in line_lower for starter in reasoning_starters):
-                            last_lines.insert(0, line_stripped)
-                            if len(last_lines) >= 5:  # Get up to 5 lines
-                                break
-                if last_lines:
-                    answer = "\n".join(last_lines).strip()
+        answer = reasoning.strip_reasoning(answer)
     
-    # Ensure we never return an empty answer
-    if not answer or len(answer.strip()) == 0:
-        answer = "I do not know. The question is not covered in the available architecture documents."
+    answer = _finish_answer(prepared, answer)
     
     # Return the response and the sources
-    return answer, sources
+    return answer, prepared['sources']
+
+def ask_auditor_stream(question, filters=None):
+    """
+    Streaming variant of ask_auditor() for the Knowledge Bot.
+    
+    Retrieval runs before this returns; the answer is generated lazily,
+    and reasoning is stripped while it streams, so the first answer
+    tokens can be shown as soon as the model produces them.
+    
+    Args:
+        question (str): The question to ask
+        filters (dict, optional): Restrict retrieval by metadata (see ask_auditor)
+    
+    Returns:
+        tuple[Iterator[str], list[dict]]: Answer text chunks (e.g. for st.write_stream),
+        and the same sources list ask_auditor returns.
+    """
+    prepared = _prepare_answer(question, filters)
+    if prepared['cached'] is not None:
+        answer, sources = prepared['cached']
+        return iter([answer]), sources
+    
+    def generate():
+        # Any target may reason (failover can switch models), so rely on
+        # <think> markers, like the batch path, rather than the model name
+        stripper = reasoning.ReasoningStripper()
+        parts = []
+        for chunk in invoke_llm_stream(prepared['prompt']):
+            visible = stripper.feed(chunk)
+            if visible:
+                parts.append(visible)
+                yield visible
+        visible = stripper.finish()
+        if visible:
+            parts.append(visible)
+            yield visible
+        
+        answer = "".join(parts).strip()
+        final_answer = _finish_answer(prepared, answer)
+        if final_answer != answer:
+            yield final_answer
+    
+    return generate(), prepared['sources']
 
 if __name__ == "__main__":
     # Example usage
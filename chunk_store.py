@@ -0,0 +1,365 @@
+"""
+Chunk Store Module
+
+SQLite-backed docstore for the FAISS index, keyed by FAISS id.
+Chunk text and metadata are read lazily, one row per search hit, so
+load time and resident memory depend on k rather than corpus size.
+Replaces the pickled index.pkl (no dangerous deserialization needed).
+
+Source, Confluence space, labels, document type and version are also
+stored as indexed columns so metadata filters can be turned into FAISS
+id bitmaps (see filter_bitmap) and applied inside the search.
+"""
+
+import json
+import os
+import re
+import sqlite3
+import threading
+from collections import OrderedDict
+from collections.abc import Mapping
+import numpy as np
+from langchain_community.docstore.base import Docstore
+from langchain_core.documents import Document
+
+CHUNKS_FILE = 'chunks.sqlite'
+
+# Filter keys accepted by ChunkStore.faiss_ids_matching()
+FILTER_KEYS = ('source_prefix', 'space', 'label', 'doc_type', 'version')
+
+# Number of filter bitmaps kept per loaded index
+MAX_CACHED_BITMAPS = 64
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS chunks (
+    faiss_id INTEGER PRIMARY KEY,
+    doc_id TEXT NOT NULL UNIQUE,
+    page_content TEXT NOT NULL,
+    metadata TEXT NOT NULL,
+    source TEXT NOT NULL DEFAULT '',
+    space TEXT,
+    doc_type TEXT NOT NULL DEFAULT 'document',
+    version INTEGER
+);
+CREATE TABLE IF NOT EXISTS chunk_labels (
+    faiss_id INTEGER NOT NULL,
+    label TEXT NOT NULL
+);
+"""
+
+
+class ChunkStore:
+    """
+    Read-only access to a chunks.sqlite file.
+
+    Each thread gets its own SQLite connection (Streamlit serves
+    sessions from several threads).
+    """
+
+    def __init__(self, db_path):
+        self.db_path = db_path
+        self._local = threading.local()
+        self._bitmaps = OrderedDict()
+        self._bitmaps_lock = threading.Lock()
+
+    def _conn(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            uri = f"file:{os.path.abspath(self.db_path)}?mode=ro"
+            conn = sqlite3.connect(uri, uri=True)
+            self._local.conn = conn
+        return conn
+
+    def count(self):
+        """Get the number of stored chunks"""
+        return self._conn().execute("SELECT COUNT(*) FROM chunks").fetchone()[0]
+
+    def doc_id_for(self, faiss_id):
+        """Get the docstore id for a FAISS id, or None if unknown"""
+        row = self._conn().execute(
+            "SELECT doc_id FROM chunks WHERE faiss_id = ?", (int(faiss_id),)
+        ).fetchone()
+        return row[0] if row else None
+
+    def get_document(self, doc_id):
+        """Get a single Document by docstore id, or None if unknown"""
+        row = self._conn().execute(
+            "SELECT doc_id, page_content, metadata FROM chunks WHERE doc_id = ?", (doc_id,)
+        ).fetchone()
+        return _row_to_document(row) if row else None
+
+    def get_by_faiss_ids(self, faiss_ids):
+        """
+        Fetch Documents for a list of FAISS ids in one query.
+
+        Args:
+            faiss_ids (list[int]): FAISS ids returned by index.search()
+
+        Returns:
+            dict: faiss_id -> Document for every id found
+        """
+        ids = [int(i) for i in faiss_ids if i != -1]
+        if not ids:
+            return {}
+        placeholders = ','.join('?' * len(ids))
+        rows = self._conn().execute(
+            f"SELECT faiss_id, doc_id, page_content, metadata FROM chunks WHERE faiss_id IN ({placeholders})",
+            ids
+        ).fetchall()
+        return {row[0]: _row_to_document(row[1:]) for row in rows}
+
+    def faiss_ids_matching(self, filters):
+        """
+        Get the FAISS ids of chunks whose metadata matches every filter.
+
+        Args:
+            filters (dict): Any of FILTER_KEYS. Values may be a single value or a list
+                            (matches any). 'source_prefix' matches the start of the
+                            source, e.g. 'confluence:'.
+
+        Returns:
+            list[int]: Matching FAISS ids in index order
+        """
+        clauses = []
+        params = []
+        for key, value in filters.items():
+            if key not in FILTER_KEYS:
+                raise ValueError(f"Unsupported filter: {key}. Use one of {', '.join(FILTER_KEYS)}")
+            values = list(value) if isinstance(value, (list, tuple, set)) else [value]
+            if not values:
+                continue
+            if key == 'source_prefix':
+                clauses.append('(' + ' OR '.join(['substr(source, 1, ?) = ?'] * len(values)) + ')')
+                for prefix in values:
+                    params.extend([len(prefix), prefix])
+                continue
+
+            placeholders = ','.join('?' * len(values))
+            if key == 'label':
+                clauses.append(f"faiss_id IN (SELECT faiss_id FROM chunk_labels WHERE label IN ({placeholders}))")
+                params.extend(str(v).lower() for v in values)
+            elif key == 'doc_type':
+                clauses.append(f"doc_type IN ({placeholders})")
+                params.extend(str(v).lower() for v in values)
+            else:
+                clauses.append(f"{key} IN ({placeholders})")
+                params.extend(values)
+
+        where = ' AND '.join(clauses) if clauses else '1'
+        rows = self._conn().execute(f"SELECT faiss_id FROM chunks WHERE {where} ORDER BY faiss_id", params)
+        return [row[0] for row in rows]
+
+    def filter_bitmap(self, filters):
+        """
+        Get a FAISS id bitmap (for faiss.IDSelectorBitmap) for a filter.
+
+        Bitmaps are cached per filter, since the store never changes once loaded.
+
+        Args:
+            filters (dict): See faiss_ids_matching()
+
+        Returns:
+            np.ndarray: uint8 bitmap, bit i set if FAISS id i matches
+        """
+        key = _filter_key(filters)
+        with self._bitmaps_lock:
+            if key in self._bitmaps:
+                self._bitmaps.move_to_end(key)
+                return self._bitmaps[key]
+
+        bitmap = ids_to_bitmap(self.faiss_ids_matching(filters))
+
+        with self._bitmaps_lock:
+            self._bitmaps[key] = bitmap
+            while len(self._bitmaps) > MAX_CACHED_BITMAPS:
+                self._bitmaps.popitem(last=False)
+        return bitmap
+
+    def iter_faiss_ids(self):
+        """Iterate over all FAISS ids in id order"""
+        for (faiss_id,) in self._conn().execute("SELECT faiss_id FROM chunks ORDER BY faiss_id"):
+            yield faiss_id
+
+    def iter_documents(self):
+        """Iterate over (faiss_id, Document) for every chunk, in id order"""
+        rows = self._conn().execute(
+            "SELECT faiss_id, doc_id, page_content, metadata FROM chunks ORDER BY faiss_id"
+        )
+        for row in rows:
+            yield row[0], _row_to_document(row[1:])
+
+
+class SQLiteDocstore(Docstore):
+    """
+    Read-only LangChain docstore that fetches chunks from SQLite on demand.
+
+    Use index_store.load_index(..., writable=True) to get an in-memory
+    docstore that can be modified and saved again.
+    """
+
+    def __init__(self, store):
+        self.store = store
+
+    def search(self, search):
+        doc = self.store.get_document(search)
+        if doc is None:
+            return f"ID {search} not found."
+        return doc
+
+    def delete(self, ids):
+        raise NotImplementedError("SQLiteDocstore is read-only")
+
+
+class SQLiteIndexToDocstoreId(Mapping):
+    """
+    Lazy FAISS id -> docstore id mapping backed by the chunks table.
+
+    Stands in for the dict that LangChain's FAISS wrapper keeps in memory.
+    """
+
+    def __init__(self, store):
+        self.store = store
+
+    def __getitem__(self, faiss_id):
+        doc_id = self.store.doc_id_for(faiss_id)
+        if doc_id is None:
+            raise KeyError(faiss_id)
+        return doc_id
+
+    def __iter__(self):
+        return self.store.iter_faiss_ids()
+
+    def __len__(self):
+        return self.store.count()
+
+
+def open_chunk_store(index_path):
+    """
+    Open the lazy docstore of an index folder.
+
+    Args:
+        index_path (str): Path to the FAISS index folder
+
+    Returns:
+        tuple: (docstore, index_to_docstore_id) for LangChain's FAISS wrapper
+    """
+    store = ChunkStore(os.path.join(index_path, CHUNKS_FILE))
+    return SQLiteDocstore(store), SQLiteIndexToDocstoreId(store)
+
+
+def write_chunk_store(db_path, docstore, index_to_docstore_id):
+    """
+    Write every chunk of a vectorstore to a new SQLite file.
+
+    Args:
+        db_path (str): Destination file (must not exist yet)
+        docstore (Docstore): Docstore to read chunks from
+        index_to_docstore_id (Mapping): FAISS id -> docstore id
+    """
+    conn = sqlite3.connect(db_path)
+    try:
+        conn.executescript(_SCHEMA)
+        rows = []
+        labels = []
+        for faiss_id, doc_id in index_to_docstore_id.items():
+            doc = docstore.search(doc_id)
+            if not isinstance(doc, Document):
+                raise ValueError(f"Could not find document for id {doc_id}, got {doc}")
+            metadata = doc.metadata
+            version = metadata.get('version')
+            rows.append((
+                int(faiss_id), doc_id, doc.page_content, json.dumps(metadata, default=str),
+                str(metadata.get('source', '')), metadata.get('space'), doc_type_for(metadata),
+                int(version) if version is not None else None
+            ))
+            labels.extend((int(faiss_id), str(label).lower()) for label in metadata.get('labels') or [])
+        conn.executemany("INSERT INTO chunks VALUES (?, ?, ?, ?, ?, ?, ?, ?)", rows)
+        conn.executemany("INSERT INTO chunk_labels VALUES (?, ?)", labels)
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_chunk_labels_label ON chunk_labels(label)")
+        conn.commit()
+    finally:
+        conn.close()
+
+
+def ids_to_bitmap(faiss_ids):
+    """Pack FAISS ids into the little-endian bitmap layout of faiss.IDSelectorBitmap"""
+    faiss_ids = np.asarray(list(faiss_ids), dtype=np.int64)
+    size = int(faiss_ids.max()) + 1 if len(faiss_ids) else 1
+    bits = np.zeros(size, dtype=bool)
+    bits[faiss_ids] = True
+    return np.packbits(bits, bitorder='little')
+
+
+def bitmap_contains(bitmap, faiss_id):
+    """Check whether a FAISS id is set in a bitmap from ids_to_bitmap()"""
+    faiss_id = int(faiss_id)
+    byte = faiss_id >> 3
+    return byte < len(bitmap) and bool((bitmap[byte] >> (faiss_id & 7)) & 1)
+
+
+def metadata_matches(metadata, filters):
+    """
+    Check chunk metadata against filters in Python.
+
+    Same semantics as ChunkStore.faiss_ids_matching(), for indexes that
+    are held in memory (legacy index.pkl) instead of chunks.sqlite.
+    """
+    labels = {str(label).lower() for label in metadata.get('labels') or []}
+    for key, value in filters.items():
+        if key not in FILTER_KEYS:
+            raise ValueError(f"Unsupported filter: {key}. Use one of {', '.join(FILTER_KEYS)}")
+        values = list(value) if isinstance(value, (list, tuple, set)) else [value]
+        if not values:
+            continue
+        if key == 'source_prefix':
+            matched = any(str(metadata.get('source', '')).startswith(prefix) for prefix in values)
+        elif key == 'label':
+            matched = bool(labels.intersection(str(v).lower() for v in values))
+        elif key == 'doc_type':
+            matched = doc_type_for(metadata) in {str(v).lower() for v in values}
+        else:
+            matched = metadata.get(key) in values
+        if not matched:
+            return False
+    return True
+
+
+def doc_type_for(metadata):
+    """
+    Classify a chunk as 'adr', 'standard', 'policy' or 'document'.
+
+    Uses metadata['doc_type'] if ingest set it, otherwise the file name,
+    page title and labels.
+
+    Args:
+        metadata (dict): Chunk metadata
+
+    Returns:
+        str: The document type
+    """
+    if metadata.get('doc_type'):
+        return str(metadata['doc_type']).lower()
+
+    filename = re.split(r"[\\/]", str(metadata.get('source', '')))[-1]
+    labels = ' '.join(str(label) for label in metadata.get('labels') or [])
+    text = f"{filename} {metadata.get('title', '')} {labels}".lower()
+
+    if re.search(r"(^|[^a-z])adr([^a-z]|$)", text) or 'decision record' in text:
+        return 'adr'
+    if 'standard' in text:
+        return 'standard'
+    if 'polic' in text:
+        return 'policy'
+    return 'document'
+
+
+def _filter_key(filters):
+    return tuple(sorted(
+        (key, tuple(sorted(map(str, value))) if isinstance(value, (list, tuple, set)) else str(value))
+        for key, value in filters.items()
+    ))
+
+
+def _row_to_document(row):
+    doc_id, page_content, metadata = row
+    return Document(id=doc_id, page_content=page_content, metadata=json.loads(metadata))
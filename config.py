@@ -40,6 +40,12 @@ def get_audit_aspects():
     return [aspect.strip() for aspect in aspects.split(',') if aspect.strip()]
 
 
+def get_audit_doc_types():
+    """Get document types the auditor retrieves from (empty = all types)"""
+    doc_types = os.getenv('AUDIT_DOC_TYPES', '')
+    return [doc_type.strip().lower() for doc_type in doc_types.split(',') if doc_type.strip()]
+
+
 def get_audit_custom_instructions():
     """Get custom audit instructions"""
     return os.getenv('AUDIT_CUSTOM_INSTRUCTIONS', '')
@@ -64,6 +70,7 @@ ORG_ICON = get_org_icon()
 PRIORITY_ADRS = get_priority_adrs()
 RERANKING_KEYWORDS = get_reranking_keywords()
 AUDIT_ASPECTS = get_audit_aspects()
+AUDIT_DOC_TYPES = get_audit_doc_types()
 AUDIT_CUSTOM_INSTRUCTIONS = get_audit_custom_instructions()
 CONFLUENCE_SPACE_KEY = get_confluence_space_key()
 CONFLUENCE_LABELS = get_confluence_labels()
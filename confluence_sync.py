@@ -3,9 +3,16 @@ Confluence Space Sync Module
 
 Fetch multiple pages from a Confluence space with optional label filtering.
 Supports bulk ingestion of ADRs, standards, and policies into FAISS.
+
+Syncs are incremental: the start time of the last successful sync of a
+space and label filter is kept as a watermark (SYNC_STATE_FILE), and the
+next sync only fetches page bodies modified since then, listing just the
+ids and versions of the rest.
 """
 
+import json
 import os
+import uuid
 import requests
 from bs4 import BeautifulSoup
 from dotenv import load_dotenv
@@ -13,6 +20,15 @@ import config
 
 load_dotenv()
 
+# Watermarks of incremental syncs, kept in the index folder next to CURRENT
+SYNC_STATE_FILE = 'confluence_sync.json'
+
+# Page ids per 'id in (...)' query
+PAGE_ID_BATCH = 100
+
+# Results per request when listing page ids and versions (no bodies)
+LIST_PAGE_SIZE = 200
+
 
 def validate_confluence_config():
     """
@@ -34,19 +50,35 @@ def validate_confluence_config():
     return True, ""
 
 
-def fetch_space_pages(space_key=None, labels=None, max_pages=100):
+def get_sync_overlap_hours():
+    """
+    Get how far before the watermark an incremental sync starts looking,
+    from CONFLUENCE_SYNC_OVERLAP_HOURS (default: 24).
+    
+    CQL compares lastmodified in the Confluence user's time zone, so the
+    overlap must cover the largest UTC offset; pages fetched twice are
+    skipped by version at ingest.
+    """
+    return float(os.getenv('CONFLUENCE_SYNC_OVERLAP_HOURS', '24'))
+
+
+def fetch_space_pages(space_key=None, labels=None, max_pages=100, modified_since=None, page_ids=None):
     """
     Fetch all pages from a Confluence space with optional label filtering.
     
     Args:
         space_key (str): Confluence space key (e.g., 'ARCH'). If None, uses config.CONFLUENCE_SPACE_KEY
         labels (list): List of labels to filter pages. If None, uses config.CONFLUENCE_LABELS
-        max_pages (int): Maximum number of pages to fetch (default 100)
+        max_pages (int): Maximum number of pages to fetch (default 100, None for no limit)
+        modified_since (datetime, optional): Only fetch pages modified at or after this
+                                             time (a 'lastmodified >=' CQL clause)
+        page_ids (list, optional): Only fetch these page ids (max_pages is ignored)
         
     Returns:
         tuple: (success, pages, error_message)
             - success (bool): Whether the operation succeeded
-            - pages (list): List of dicts with 'title' and 'content' keys
+            - pages (list): List of dicts with 'title', 'content', 'id', 'version',
+                            'space' and 'labels' keys
             - error_message (str): Error message if failed
     """
     # Validate configuration
@@ -63,12 +95,81 @@ def fetch_space_pages(space_key=None, labels=None, max_pages=100):
     if not space_key:
         return False, [], "No Confluence space key configured. Set CONFLUENCE_SPACE_KEY in config.env"
     
-    # Get credentials
-    email = os.getenv('CONFLUENCE_EMAIL')
-    token = os.getenv('CONFLUENCE_API_TOKEN')
-    base_url = os.getenv('CONFLUENCE_BASE_URL').rstrip('/')
+    # Page ids are looked up in batches to keep the CQL query short
+    if page_ids is not None:
+        queries = [
+            (_build_cql(space_key, labels, modified_since, page_ids[start:start + PAGE_ID_BATCH]), None)
+            for start in range(0, len(page_ids), PAGE_ID_BATCH)
+        ]
+    else:
+        queries = [(_build_cql(space_key, labels, modified_since), max_pages)]
+    
+    all_pages = []
+    for cql_query, max_results in queries:
+        success, results, error_msg = _search(
+            cql_query, 'body.storage,version,space,metadata.labels', space_key, max_results
+        )
+        if not success:
+            return False, [], error_msg
+        
+        # Process each page
+        for page in results:
+            title = page.get('title', 'Untitled')
+            html_content = page.get('body', {}).get('storage', {}).get('value', '')
+            
+            # Convert HTML to plain text
+            text_content = _html_to_text(html_content)
+            
+            page_labels = page.get('metadata', {}).get('labels', {}).get('results', [])
+            
+            all_pages.append({
+                'title': title,
+                'content': text_content,
+                'id': page.get('id', ''),
+                'version': page.get('version', {}).get('number', 1),
+                'space': page.get('space', {}).get('key', space_key),
+                'labels': [label.get('name', '') for label in page_labels if label.get('name')]
+            })
     
-    # Build CQL query
+    return True, all_pages, ""
+
+
+def list_space_pages(space_key=None, labels=None):
+    """
+    List the ids and versions of every page in a space, without their content.
+    
+    Much cheaper than fetch_space_pages(): no page bodies are downloaded
+    and results come LIST_PAGE_SIZE at a time.
+    
+    Args:
+        space_key (str): Confluence space key. If None, uses config.CONFLUENCE_SPACE_KEY
+        labels (list): List of labels to filter pages. If None, uses config.CONFLUENCE_LABELS
+        
+    Returns:
+        tuple: (success, versions, error_message) - versions maps page id -> version number
+    """
+    is_valid, error_msg = validate_confluence_config()
+    if not is_valid:
+        return False, {}, error_msg
+    
+    if space_key is None:
+        space_key = config.CONFLUENCE_SPACE_KEY
+    if labels is None:
+        labels = config.CONFLUENCE_LABELS
+    
+    if not space_key:
+        return False, {}, "No Confluence space key configured. Set CONFLUENCE_SPACE_KEY in config.env"
+    
+    success, results, error_msg = _search(
+        _build_cql(space_key, labels), 'version', space_key, limit=LIST_PAGE_SIZE
+    )
+    if not success:
+        return False, {}, error_msg
+    return True, {page.get('id', ''): page.get('version', {}).get('number', 1) for page in results}, ""
+
+
+def _build_cql(space_key, labels, modified_since=None, page_ids=None):
+    """Build the CQL query for pages of a space, optionally filtered"""
     cql_parts = [f'space="{space_key}"', 'type=page']
     
     # Add label filtering if specified
@@ -76,23 +177,48 @@ def fetch_space_pages(space_key=None, labels=None, max_pages=100):
         label_conditions = ' AND '.join([f'label="{label}"' for label in labels])
         cql_parts.append(f'({label_conditions})')
     
-    cql_query = ' AND '.join(cql_parts)
+    if modified_since is not None:
+        cql_parts.append(f'lastmodified >= "{modified_since.strftime("%Y-%m-%d %H:%M")}"')
+    
+    if page_ids is not None:
+        cql_parts.append(f"id in ({','.join(str(page_id) for page_id in page_ids)})")
+    
+    return ' AND '.join(cql_parts)
+
+
+def _search(cql_query, expand, space_key, max_results=None, limit=25):
+    """
+    Run a CQL content search, following result pages.
+    
+    Args:
+        cql_query (str): CQL query
+        expand (str): Fields to expand on each result
+        space_key (str): Space key, for error messages
+        max_results (int, optional): Stop after this many results
+        limit (int): Results per request (Confluence may return fewer)
+        
+    Returns:
+        tuple: (success, results, error_message)
+    """
+    # Get credentials
+    email = os.getenv('CONFLUENCE_EMAIL')
+    token = os.getenv('CONFLUENCE_API_TOKEN')
+    base_url = os.getenv('CONFLUENCE_BASE_URL').rstrip('/')
     
     # API endpoint for CQL search
     search_url = f"{base_url}/rest/api/content/search"
     
-    all_pages = []
+    all_results = []
     start = 0
-    limit = 25  # Confluence API limit per request
     
     try:
-        while len(all_pages) < max_pages:
+        while max_results is None or len(all_results) < max_results:
             # Make API request
             params = {
                 'cql': cql_query,
                 'start': start,
                 'limit': limit,
-                'expand': 'body.storage,version'
+                'expand': expand
             }
             
             response = requests.get(
@@ -115,31 +241,17 @@ def fetch_space_pages(space_key=None, labels=None, max_pages=100):
             if not results:
                 break  # No more pages
             
-            # Process each page
-            for page in results:
-                title = page.get('title', 'Untitled')
-                html_content = page.get('body', {}).get('storage', {}).get('value', '')
-                
-                # Convert HTML to plain text
-                text_content = _html_to_text(html_content)
-                
-                all_pages.append({
-                    'title': title,
-                    'content': text_content,
-                    'id': page.get('id', ''),
-                    'version': page.get('version', {}).get('number', 1)
-                })
-                
-                if len(all_pages) >= max_pages:
-                    break
+            all_results.extend(results)
             
             # Check if there are more pages
-            if data.get('size', 0) < limit:
+            if not data.get('_links', {}).get('next'):
                 break  # Last page reached
             
-            start += limit
+            start += len(results)
         
-        return True, all_pages, ""
+        if max_results is not None:
+            all_results = all_results[:max_results]
+        return True, all_results, ""
         
     except requests.exceptions.Timeout:
         return False, [], "Request timeout. Check your network connection and Confluence URL."
@@ -149,6 +261,34 @@ def fetch_space_pages(space_key=None, labels=None, max_pages=100):
         return False, [], f"Unexpected error: {str(e)}"
 
 
+def sync_state_key(labels):
+    """Get the key of a label filter in the sync state ('*' for all pages)"""
+    return ','.join(sorted(label.lower() for label in labels)) if labels else '*'
+
+
+def load_sync_state(index_path):
+    """
+    Load the sync watermarks of an index folder.
+    
+    Returns:
+        dict: space key -> {sync_state_key(labels): ISO-8601 UTC time the last
+        successful sync of that space and label filter started}
+    """
+    state_file = os.path.join(index_path, SYNC_STATE_FILE)
+    if not os.path.exists(state_file):
+        return {}
+    with open(state_file, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def save_sync_state(index_path, state):
+    """Atomically replace the sync watermarks of an index folder"""
+    tmp_file = os.path.join(index_path, f".{SYNC_STATE_FILE}.{uuid.uuid4().hex}")
+    with open(tmp_file, 'w', encoding='utf-8') as f:
+        json.dump(state, f, indent=2, sort_keys=True)
+    os.replace(tmp_file, os.path.join(index_path, SYNC_STATE_FILE))
+
+
 def _html_to_text(html_content):
     """
     Convert Confluence HTML to plain text.
@@ -0,0 +1,97 @@
+"""
+Document Manifest Module
+
+Track which files of the docs/ folder are in the 'docs' shard, so ingest
+only re-processes what changed since the last run.
+
+manifest.json is saved in the shard folder next to index.faiss:
+- settings: embedding model and chunking the shard was built with; if they
+  change, every chunk is stale and the shard is rebuilt
+- files: relative path -> mtime_ns, size, sha256 of the content and the
+  docstore ids of the file's chunks
+
+A file whose size and mtime are unchanged is trusted without reading it;
+otherwise its content hash decides whether it really changed.
+"""
+
+import hashlib
+import json
+import os
+
+MANIFEST_FILE = 'manifest.json'
+
+
+def content_hash(text):
+    """Get the sha256 hex digest of a file's text"""
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+
+def scan_files(docs_path, extension='.md'):
+    """
+    List the files to ingest, skipping hidden files and folders.
+
+    Args:
+        docs_path (str): Folder to scan recursively
+        extension (str): File extension to include
+
+    Returns:
+        dict: relative path ('/'-separated) -> {'path', 'mtime_ns', 'size'}
+    """
+    files = {}
+    for root, dirs, names in os.walk(docs_path):
+        dirs[:] = sorted(d for d in dirs if not d.startswith('.'))
+        for name in sorted(names):
+            if name.startswith('.') or not name.endswith(extension):
+                continue
+            path = os.path.join(root, name)
+            stat = os.stat(path)
+            relative = os.path.relpath(path, docs_path).replace(os.sep, '/')
+            files[relative] = {'path': path, 'mtime_ns': stat.st_mtime_ns, 'size': stat.st_size}
+    return files
+
+
+def compare(manifest, files):
+    """
+    Sort scanned files by what happened to them since the manifest was saved.
+
+    Args:
+        manifest (dict): From load_manifest()
+        files (dict): From scan_files()
+
+    Returns:
+        tuple[list, list, list, list]: (added, touched, deleted, unchanged)
+        relative paths. Touched files have a new size or mtime and need a
+        content hash to tell whether they were modified.
+    """
+    known = manifest.get('files', {})
+    added, touched, unchanged = [], [], []
+    for relative, stat in files.items():
+        entry = known.get(relative)
+        if entry is None:
+            added.append(relative)
+        elif entry['mtime_ns'] == stat['mtime_ns'] and entry['size'] == stat['size']:
+            unchanged.append(relative)
+        else:
+            touched.append(relative)
+    deleted = [relative for relative in known if relative not in files]
+    return added, touched, deleted, unchanged
+
+
+def load_manifest(index_path):
+    """
+    Load manifest.json from a shard folder.
+
+    Returns:
+        dict: The manifest, or None for shards written without one
+    """
+    manifest_file = os.path.join(index_path, MANIFEST_FILE)
+    if not os.path.exists(manifest_file):
+        return None
+    with open(manifest_file, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def save_manifest(manifest, manifest_file):
+    """Write a manifest as JSON"""
+    with open(manifest_file, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
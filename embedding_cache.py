@@ -0,0 +1,353 @@
+"""
+Embedding Cache Module
+
+Two-tier cache for embedding vectors: a bounded in-process LRU in front
+of a persistent SQLite store (.cache/embeddings.sqlite by default).
+
+Entries are keyed by namespace (embedding provider and model) plus a hash
+of the normalized text, so switching models never returns stale vectors.
+The disk store is evicted by age (EMBEDDING_CACHE_TTL_DAYS) and size
+(EMBEDDING_CACHE_MAX_ENTRIES); the LRU holds EMBEDDING_CACHE_SIZE vectors.
+
+Ingest keeps chunk vectors in the same store under a 'chunks:' namespace,
+keyed by the SHA-256 of the exact chunk text, so re-ingesting unchanged
+documents does not call the embedding provider (CHUNK_EMBEDDING_CACHE).
+
+Identical queries embedded concurrently share one provider call, whether
+or not the cache is enabled.
+"""
+
+import hashlib
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+import numpy as np
+from langchain_core.embeddings import Embeddings
+import singleflight
+
+# Disk eviction runs once every this many writes
+EVICT_EVERY_WRITES = 100
+
+# Keys per SQLite lookup, below SQLite's bound-parameter limit
+LOOKUP_BATCH_SIZE = 500
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS embeddings (
+    namespace TEXT NOT NULL,
+    key TEXT NOT NULL,
+    vector BLOB NOT NULL,
+    created REAL NOT NULL,
+    PRIMARY KEY (namespace, key)
+);
+CREATE INDEX IF NOT EXISTS idx_embeddings_created ON embeddings(created);
+"""
+
+_WHITESPACE = re.compile(r"\s+")
+
+
+def cache_enabled():
+    """Check whether query embeddings are cached (EMBEDDING_CACHE env var, default: true)"""
+    return os.getenv('EMBEDDING_CACHE', 'true').lower() in ('1', 'true', 'yes')
+
+
+def chunk_cache_enabled():
+    """Check whether ingest reuses chunk embeddings (CHUNK_EMBEDDING_CACHE env var, default: true)"""
+    return os.getenv('CHUNK_EMBEDDING_CACHE', 'true').lower() in ('1', 'true', 'yes')
+
+
+def default_cache_path():
+    """Get the SQLite file of the disk tier from EMBEDDING_CACHE_PATH (default: .cache/embeddings.sqlite)"""
+    return os.getenv(
+        'EMBEDDING_CACHE_PATH',
+        os.path.join(os.path.dirname(__file__), '.cache', 'embeddings.sqlite')
+    )
+
+
+def normalize_text(text):
+    """Normalize a query for cache lookups: trimmed, lowercased, single spaces"""
+    return _WHITESPACE.sub(' ', text.strip().lower())
+
+
+def text_key(text, normalize=True):
+    """Get the cache key of a text (SHA-256 of its normalized form, or of the exact text)"""
+    if normalize:
+        text = normalize_text(text)
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+
+class EmbeddingCache:
+    """
+    In-memory LRU backed by a SQLite table of embedding vectors.
+
+    Size and age limits apply per namespace. Safe to share between threads.
+
+    Args:
+        normalize (bool): Key texts by their normalized form (queries) or
+                          exactly as given (document chunks)
+    """
+
+    def __init__(self, db_path, namespace, max_memory_entries=None, max_disk_entries=None, max_age_seconds=None,
+                 normalize=True):
+        self.db_path = db_path
+        self.namespace = namespace
+        self.normalize = normalize
+        self.max_memory_entries = max_memory_entries or int(os.getenv('EMBEDDING_CACHE_SIZE', '1024'))
+        self.max_disk_entries = max_disk_entries or int(os.getenv('EMBEDDING_CACHE_MAX_ENTRIES', '100000'))
+        self.max_age_seconds = max_age_seconds or float(os.getenv('EMBEDDING_CACHE_TTL_DAYS', '30')) * 86400
+
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._writes = 0
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+        os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+        conn = self._conn()
+        conn.executescript(_SCHEMA)
+        conn.commit()
+
+    def _conn(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn = conn
+        return conn
+
+    def key_for(self, text):
+        """Get the cache key of a text (see text_key())"""
+        return text_key(text, self.normalize)
+
+    def get_many(self, keys):
+        """
+        Look up several keys, memory first, then disk.
+
+        Args:
+            keys (list[str]): Keys from key_for()
+
+        Returns:
+            dict: key -> vector (list[float]) for every key found
+        """
+        found = {}
+        missing = []
+        with self._lock:
+            for key in keys:
+                vector = self._memory.get(key)
+                if vector is None:
+                    missing.append(key)
+                else:
+                    self._memory.move_to_end(key)
+                    found[key] = vector
+                    self.memory_hits += 1
+
+        if missing:
+            cutoff = time.time() - self.max_age_seconds
+            rows = []
+            for start in range(0, len(missing), LOOKUP_BATCH_SIZE):
+                batch = missing[start:start + LOOKUP_BATCH_SIZE]
+                placeholders = ','.join('?' * len(batch))
+                rows.extend(self._conn().execute(
+                    f"SELECT key, vector FROM embeddings WHERE namespace = ? AND created >= ? AND key IN ({placeholders})",
+                    [self.namespace, cutoff, *batch]
+                ))
+            with self._lock:
+                for key, blob in rows:
+                    vector = np.frombuffer(blob, dtype=np.float32).tolist()
+                    found[key] = vector
+                    self._remember(key, vector)
+                self.disk_hits += len(rows)
+                self.misses += len(missing) - len(rows)
+        return found
+
+    def put_many(self, items):
+        """
+        Store vectors in both tiers.
+
+        Args:
+            items (dict): key -> vector (list[float])
+        """
+        if not items:
+            return
+        with self._lock:
+            for key, vector in items.items():
+                self._remember(key, list(vector))
+            self._writes += len(items)
+            evict = self._writes >= EVICT_EVERY_WRITES
+            if evict:
+                self._writes = 0
+
+        now = time.time()
+        conn = self._conn()
+        conn.executemany(
+            "INSERT OR REPLACE INTO embeddings VALUES (?, ?, ?, ?)",
+            [(self.namespace, key, np.asarray(vector, dtype=np.float32).tobytes(), now) for key, vector in items.items()]
+        )
+        conn.commit()
+        if evict:
+            self.evict()
+
+    def evict(self):
+        """Delete this namespace's disk entries older than the TTL, then the oldest beyond the size limit"""
+        conn = self._conn()
+        conn.execute(
+            "DELETE FROM embeddings WHERE namespace = ? AND created < ?",
+            (self.namespace, time.time() - self.max_age_seconds)
+        )
+        conn.execute(
+            "DELETE FROM embeddings WHERE rowid IN ("
+            "SELECT rowid FROM embeddings WHERE namespace = ? ORDER BY created DESC LIMIT -1 OFFSET ?)",
+            (self.namespace, self.max_disk_entries)
+        )
+        conn.commit()
+
+    def _remember(self, key, vector):
+        # Caller holds self._lock
+        self._memory[key] = vector
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_memory_entries:
+            self._memory.popitem(last=False)
+
+    def stats(self):
+        """
+        Get hit/miss counters since the process started.
+
+        Returns:
+            dict: memory_hits, disk_hits, misses, hit_rate and memory_entries
+        """
+        with self._lock:
+            lookups = self.memory_hits + self.disk_hits + self.misses
+            return {
+                'memory_hits': self.memory_hits,
+                'disk_hits': self.disk_hits,
+                'misses': self.misses,
+                'hit_rate': (self.memory_hits + self.disk_hits) / lookups if lookups else 0.0,
+                'memory_entries': len(self._memory)
+            }
+
+
+class CachedEmbeddings(Embeddings):
+    """
+    Query-side embeddings wrapper that serves repeated questions from an
+    EmbeddingCache and only sends misses to the provider. Concurrent
+    embed_query() calls for the same text share one provider call.
+
+    Args:
+        embeddings (Embeddings): The provider embeddings
+        cache (EmbeddingCache, optional): None to only coalesce concurrent calls
+        report (bool): Print how many texts of each embed_documents() call were cached
+    """
+
+    def __init__(self, embeddings, cache=None, report=False):
+        self.embeddings = embeddings
+        self.cache = cache
+        self.report = report
+        self._flights = singleflight.Group()
+
+    def embed_documents(self, texts):
+        """
+        Embed several texts as documents, calling the provider once for all misses.
+
+        Use embed_queries() for questions: models such as Cohere embed
+        documents and queries differently.
+        """
+        if self.cache is None:
+            return self.embeddings.embed_documents(texts)
+
+        keys = [self.cache.key_for(text) for text in texts]
+        found = self.cache.get_many(keys)
+
+        missing = {}
+        for key, text in zip(keys, texts):
+            if key not in found and key not in missing:
+                missing[key] = text
+        if self.report:
+            print(f"♻️  Reusing {len(found)} cached embeddings, embedding {len(missing)} new texts")
+        if missing:
+            vectors = self.embeddings.embed_documents(list(missing.values()))
+            computed = dict(zip(missing.keys(), vectors))
+            self.cache.put_many(computed)
+            found.update(computed)
+
+        return [found[key] for key in keys]
+
+    def embed_queries(self, texts):
+        """
+        Embed several queries, reading the cache once for all of them.
+
+        Misses are embedded with the provider's embed_query() (there is no
+        batched query call), each coalesced with concurrent embed_query() calls.
+
+        Args:
+            texts (list[str]): Questions
+
+        Returns:
+            list[list[float]]: One vector per question
+        """
+        keys = [text_key(text) for text in texts]
+        found = self.cache.get_many(keys) if self.cache is not None else {}
+        for key, text in zip(keys, texts):
+            if key not in found:
+                found[key] = self._flights.do(key, lambda key=key, text=text: self._embed_query(key, text))
+        return [found[key] for key in keys]
+
+    def embed_query(self, text):
+        """Embed one query, from cache when it was asked before"""
+        key = text_key(text)
+        if self.cache is not None:
+            vector = self.cache.get_many([key]).get(key)
+            if vector is not None:
+                return vector
+        return self._flights.do(key, lambda: self._embed_query(key, text))
+
+    def _embed_query(self, key, text):
+        vector = self.embeddings.embed_query(text)
+        if self.cache is not None:
+            self.cache.put_many({key: vector})
+        return vector
+
+
+def cached_query_embeddings(embeddings, namespace):
+    """
+    Wrap embeddings for queries: concurrent calls coalesced, results cached if enabled.
+
+    Args:
+        embeddings (Embeddings): The provider embeddings
+        namespace (str): Provider and model, e.g. 'bedrock:amazon.titan-embed-text-v2:0'
+
+    Returns:
+        CachedEmbeddings: With an EmbeddingCache, or without one when EMBEDDING_CACHE is off
+    """
+    if not cache_enabled():
+        return CachedEmbeddings(embeddings)
+    return CachedEmbeddings(embeddings, EmbeddingCache(default_cache_path(), namespace))
+
+
+def cached_document_embeddings(embeddings, namespace):
+    """
+    Wrap ingest embeddings so unchanged chunks reuse their stored vectors.
+
+    Chunk vectors are kept for CHUNK_EMBEDDING_CACHE_TTL_DAYS (default: 365),
+    up to CHUNK_EMBEDDING_CACHE_MAX_ENTRIES (default: 500000) per model.
+
+    Args:
+        embeddings (Embeddings): The embeddings that compute misses (e.g. BatchEmbeddings)
+        namespace (str): Provider and model, e.g. 'bedrock:amazon.titan-embed-text-v2:0'
+
+    Returns:
+        Embeddings: CachedEmbeddings, or embeddings unchanged when CHUNK_EMBEDDING_CACHE is off
+    """
+    if not chunk_cache_enabled():
+        return embeddings
+    cache = EmbeddingCache(
+        default_cache_path(),
+        f"chunks:{namespace}",
+        max_disk_entries=int(os.getenv('CHUNK_EMBEDDING_CACHE_MAX_ENTRIES', '500000')),
+        max_age_seconds=float(os.getenv('CHUNK_EMBEDDING_CACHE_TTL_DAYS', '365')) * 86400,
+        normalize=False
+    )
+    return CachedEmbeddings(embeddings, cache, report=True)
@@ -8,15 +8,29 @@ Supports multiple embedding providers:
 """
 
 import os
+import threading
 from dotenv import load_dotenv
+import llm_clients
 
 load_dotenv()
 
+# Embeddings instances by (provider, model, sdk_retries), built once per process
+_embeddings_cache = {}
+_embeddings_lock = threading.Lock()
 
-def get_embeddings():
+
+def get_embeddings(sdk_retries=True):
     """
     Get embeddings model based on EMBEDDING_PROVIDER environment variable.
     
+    The model client is built once per process and shared. Concurrent
+    first callers wait for that one build instead of each creating a client.
+    
+    Args:
+        sdk_retries (bool): Keep the provider SDK's own retries. Callers that
+                            retry through rate_limit (batch_embeddings) pass
+                            False, so retries are not multiplied.
+    
     Returns:
         Embeddings: LangChain embeddings instance
         
@@ -25,32 +39,41 @@ def get_embeddings():
     """
     provider = os.getenv('EMBEDDING_PROVIDER', 'bedrock').lower()
     model_name = os.getenv('EMBEDDING_MODEL', 'amazon.titan-embed-text-v2:0')
+    key = (provider, model_name, sdk_retries)
     
+    embeddings = _embeddings_cache.get(key)
+    if embeddings is None:
+        with _embeddings_lock:
+            embeddings = _embeddings_cache.get(key)
+            if embeddings is None:
+                embeddings = _create_embeddings(provider, model_name, sdk_retries)
+                _embeddings_cache[key] = embeddings
+    return embeddings
+
+
+def _create_embeddings(provider, model_name, sdk_retries=True):
+    """Build the embeddings client for a provider"""
     if provider == 'bedrock':
-        return _get_bedrock_embeddings(model_name)
+        return _get_bedrock_embeddings(model_name, sdk_retries)
     elif provider == 'openai':
-        return _get_openai_embeddings(model_name)
+        return _get_openai_embeddings(model_name, sdk_retries)
     elif provider == 'huggingface':
         return _get_huggingface_embeddings(model_name)
     else:
         raise ValueError(f"Unsupported embedding provider: {provider}. Use 'bedrock', 'openai', or 'huggingface'")
 
 
-def _get_bedrock_embeddings(model_name):
+def _get_bedrock_embeddings(model_name, sdk_retries=True):
     """Get AWS Bedrock embeddings"""
     try:
         from langchain_aws import BedrockEmbeddings
-        import boto3
     except ImportError:
         raise ImportError("Install langchain-aws: pip install langchain-aws boto3")
     
     region = os.getenv('AWS_REGION', 'us-east-1')
     
-    # Initialize Bedrock client
-    bedrock_client = boto3.client(
-        service_name='bedrock-runtime',
-        region_name=region
-    )
+    # Pooled Bedrock runtime client; without sdk_retries a call is attempted once
+    bedrock_client = llm_clients.get_bedrock_client(region, sdk_retries=sdk_retries)
     
     embeddings = BedrockEmbeddings(
         client=bedrock_client,
@@ -61,7 +84,7 @@ def _get_bedrock_embeddings(model_name):
     return embeddings
 
 
-def _get_openai_embeddings(model_name):
+def _get_openai_embeddings(model_name, sdk_retries=True):
     """Get OpenAI embeddings"""
     try:
         from langchain_openai import OpenAIEmbeddings
@@ -74,7 +97,8 @@ def _get_openai_embeddings(model_name):
     
     embeddings = OpenAIEmbeddings(
         model=model_name,
-        openai_api_key=api_key
+        openai_api_key=api_key,
+        max_retries=2 if sdk_retries else 0
     )
     
     print(f"✅ Using OpenAI embeddings: {model_name}")
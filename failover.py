@@ -0,0 +1,389 @@
+"""
+LLM Failover Module
+
+Hedged requests and failover across an ordered list of LLM providers.
+
+LLM_PROVIDERS lists provider:model targets in order of preference, e.g.
+    bedrock:us.deepseek.r1-v1:0,anthropic:claude-3-5-sonnet-latest
+Without it the single MODEL_PROVIDER / MODEL_NAME target is used and
+calls go straight to it.
+
+With several targets:
+- a call goes to the first available target; if it has not answered
+  within the hedge delay (the target's recent p95 latency), the next
+  target is called as well, and the first response wins
+- a stream is hedged the same way on its time to first chunk, which has
+  its own p95; the first stream to produce text is the one passed on
+- a failed call moves on to the next target immediately
+- after LLM_BREAKER_FAILURES consecutive failures a target's circuit
+  opens and it is skipped for LLM_BREAKER_COOLDOWN_SECONDS, after which
+  one trial call decides whether it closes again
+
+Blocking (sync) calls cannot be interrupted, so a losing hedge is left
+to finish in the background and its result discarded; async losers are
+cancelled, and a losing stream is closed once its first chunk arrives.
+"""
+
+import asyncio
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, wait
+import llm_clients
+
+# Latencies kept per target for the p95
+LATENCY_WINDOW = 100
+# Samples needed before the p95 replaces LLM_HEDGE_DELAY_SECONDS
+MIN_LATENCY_SAMPLES = 20
+# Returned by _first_chunk() for a stream that ended without text
+_END = object()
+
+
+def get_targets():
+    """
+    Get the ordered provider/model targets.
+
+    Returns:
+        list[tuple[str, str]]: (provider, model) pairs from LLM_PROVIDERS,
+        or [(MODEL_PROVIDER, MODEL_NAME)]
+    """
+    providers = os.getenv('LLM_PROVIDERS', '').strip()
+    if not providers:
+        return [(os.getenv('MODEL_PROVIDER', 'bedrock').lower(), os.getenv('MODEL_NAME', 'us.deepseek.r1-v1:0'))]
+
+    targets = []
+    for entry in providers.split(','):
+        # Model ids may contain ':' themselves (us.deepseek.r1-v1:0)
+        provider, _, model_name = entry.strip().partition(':')
+        if not model_name:
+            raise ValueError(f"Invalid LLM_PROVIDERS entry '{entry}'. Use provider:model.")
+        targets.append((provider.lower(), model_name))
+    return targets
+
+
+def hedging_enabled():
+    """Check whether slow calls are hedged to the next target (LLM_HEDGE env var, default: true)"""
+    return os.getenv('LLM_HEDGE', 'true').lower() in ('1', 'true', 'yes')
+
+
+class TargetHealth:
+    """
+    Latency window and circuit breaker of one provider/model target.
+
+    Safe to share between threads.
+    """
+
+    def __init__(self, failure_threshold=None, cooldown_seconds=None):
+        self.failure_threshold = failure_threshold or int(os.getenv('LLM_BREAKER_FAILURES', '5'))
+        self.cooldown_seconds = cooldown_seconds or float(os.getenv('LLM_BREAKER_COOLDOWN_SECONDS', '60'))
+
+        self._lock = threading.Lock()
+        self._latencies = deque(maxlen=LATENCY_WINDOW)
+        self._first_chunk_latencies = deque(maxlen=LATENCY_WINDOW)
+        self._failures = 0
+        self._opened_at = None
+        self._trial_at = None
+
+    def available(self):
+        """
+        Check whether the circuit lets a call through.
+
+        After the cool-down one caller gets the trial call; if its outcome
+        is never recorded, another trial is allowed one cool-down later.
+        """
+        with self._lock:
+            if self._opened_at is None:
+                return True
+            now = time.monotonic()
+            if now - self._opened_at < self.cooldown_seconds:
+                return False
+            if self._trial_at is not None and now - self._trial_at < self.cooldown_seconds:
+                return False
+            self._trial_at = now
+            return True
+
+    def record_success(self, latency, first_chunk=False):
+        """
+        Record a successful call and close the circuit.
+
+        Args:
+            latency (float): Seconds the call took, or for a stream the
+                             seconds until its first chunk
+            first_chunk (bool): Whether latency is a stream's time to first chunk
+        """
+        with self._lock:
+            (self._first_chunk_latencies if first_chunk else self._latencies).append(latency)
+            self._failures = 0
+            self._opened_at = None
+            self._trial_at = None
+
+    def record_failure(self):
+        """Record a failed call, opening the circuit after too many in a row"""
+        with self._lock:
+            self._failures += 1
+            self._trial_at = None
+            if self._failures >= self.failure_threshold:
+                self._opened_at = time.monotonic()
+
+    def hedge_delay(self, first_chunk=False):
+        """Get how long to wait for this target (or its first chunk) before hedging: its p95 latency"""
+        with self._lock:
+            latencies = sorted(self._first_chunk_latencies if first_chunk else self._latencies)
+        if len(latencies) < MIN_LATENCY_SAMPLES:
+            return float(os.getenv('LLM_HEDGE_DELAY_SECONDS', '10'))
+        return latencies[int(len(latencies) * 0.95) - 1]
+
+
+_health = {}
+_health_lock = threading.Lock()
+
+
+def get_health(target):
+    """Get the process-wide TargetHealth of a (provider, model) target"""
+    with _health_lock:
+        health = _health.get(target)
+        if health is None:
+            health = TargetHealth()
+            _health[target] = health
+    return health
+
+
+def _candidates(targets):
+    # Targets with an open circuit are skipped, unless every circuit is open
+    available = [target for target in targets if get_health(target).available()]
+    return available or list(targets)
+
+
+def invoke(targets, call):
+    """
+    Call the targets with hedging and failover.
+
+    Args:
+        targets (list[tuple[str, str]]): From get_targets()
+        call (callable): call(provider, model_name) -> response, blocking
+
+    Returns:
+        The first successful response
+
+    Raises:
+        Exception: The last target's error when every target failed
+    """
+    if len(targets) == 1:
+        return call(*targets[0])
+
+    pending_targets = deque(_candidates(targets))
+    executor = llm_clients.get_executor()
+    running = {}
+    last_error = None
+
+    def start():
+        target = pending_targets.popleft()
+        future = executor.submit(_timed, call, target)
+        running[future] = target
+        return target
+
+    target = start()
+    while running:
+        timeout = get_health(target).hedge_delay() if hedging_enabled() and pending_targets else None
+        done, _ = wait(list(running), timeout=timeout, return_when=FIRST_COMPLETED)
+        if not done:
+            slow = target
+            target = start()
+            print(f"⏱️  {slow[0]}:{slow[1]} is slow, hedging to {target[0]}:{target[1]}")
+            continue
+
+        for future in done:
+            finished = running.pop(future)
+            try:
+                response = _record(future, finished)
+            except Exception as e:
+                last_error = e
+                print(f"⚠️  LLM call to {finished[0]}:{finished[1]} failed: {e}")
+                continue
+            # Losing hedges finish in the background; only their health is recorded
+            for loser, loser_target in running.items():
+                loser.add_done_callback(lambda future, loser_target=loser_target: _record_quietly(future, loser_target))
+            return response
+
+        # Every finished call failed: fail over now, even while a hedge is still running
+        if pending_targets:
+            target = start()
+
+    raise last_error
+
+
+def _timed(call, target):
+    started = time.monotonic()
+    response = call(*target)
+    return response, time.monotonic() - started
+
+
+def _record(future, target):
+    # Feed a finished call's outcome to its target's health; returns the response or raises
+    try:
+        response, latency = future.result()
+    except Exception:
+        get_health(target).record_failure()
+        raise
+    get_health(target).record_success(latency)
+    return response
+
+
+def _record_quietly(future, target):
+    try:
+        _record(future, target)
+    except Exception:
+        pass
+
+
+async def invoke_async(targets, call):
+    """
+    Async variant of invoke(). Losing calls are cancelled.
+
+    Args:
+        targets (list[tuple[str, str]]): From get_targets()
+        call (callable): call(provider, model_name) -> awaitable response
+
+    Returns:
+        The first successful response
+    """
+    if len(targets) == 1:
+        return await call(*targets[0])
+
+    pending_targets = deque(_candidates(targets))
+    running = {}
+    last_error = None
+
+    async def timed(target):
+        started = time.monotonic()
+        response = await call(*target)
+        return response, time.monotonic() - started
+
+    def start():
+        target = pending_targets.popleft()
+        running[asyncio.ensure_future(timed(target))] = target
+        return target
+
+    target = start()
+    try:
+        while running:
+            timeout = get_health(target).hedge_delay() if hedging_enabled() and pending_targets else None
+            done, _ = await asyncio.wait(list(running), timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+            if not done:
+                target = start()
+                continue
+
+            for task in done:
+                finished = running.pop(task)
+                try:
+                    response, latency = task.result()
+                except Exception as e:
+                    get_health(finished).record_failure()
+                    last_error = e
+                    continue
+                get_health(finished).record_success(latency)
+                return response
+
+            # Every finished call failed: fail over now, even while a hedge is still running
+            if pending_targets:
+                target = start()
+    finally:
+        for task in running:
+            task.cancel()
+
+    raise last_error
+
+
+def stream(targets, open_stream):
+    """
+    Stream from the first target that starts answering, with hedging and failover.
+
+    The hedge delay is the target's p95 time to first chunk. A target that
+    fails before its first chunk is skipped for the next one; an error
+    after text was yielded is raised.
+
+    Args:
+        targets (list[tuple[str, str]]): From get_targets()
+        open_stream (callable): open_stream(provider, model_name) -> chunk generator
+
+    Yields:
+        str: Text chunks
+    """
+    if len(targets) == 1:
+        yield from open_stream(*targets[0])
+        return
+
+    pending_targets = deque(_candidates(targets))
+    executor = llm_clients.get_executor()
+    running = {}
+    last_error = None
+
+    def start():
+        # The blocking wait for the first chunk runs on the pool, so it can be hedged
+        target = pending_targets.popleft()
+        chunks = open_stream(*target)
+        future = executor.submit(_first_chunk, chunks)
+        running[future] = (target, chunks)
+        return target
+
+    target = start()
+    while running:
+        timeout = get_health(target).hedge_delay(first_chunk=True) if hedging_enabled() and pending_targets else None
+        done, _ = wait(list(running), timeout=timeout, return_when=FIRST_COMPLETED)
+        if not done:
+            slow = target
+            target = start()
+            print(f"⏱️  {slow[0]}:{slow[1]} is slow to start streaming, hedging to {target[0]}:{target[1]}")
+            continue
+
+        for future in done:
+            finished, chunks = running.pop(future)
+            try:
+                first, latency = future.result()
+            except Exception as e:
+                get_health(finished).record_failure()
+                last_error = e
+                print(f"⚠️  LLM stream from {finished[0]}:{finished[1]} failed: {e}")
+                continue
+            get_health(finished).record_success(latency, first_chunk=True)
+
+            # Losing hedges are closed once their first chunk arrives
+            for loser, (loser_target, loser_chunks) in running.items():
+                loser.add_done_callback(
+                    lambda future, loser_target=loser_target, loser_chunks=loser_chunks:
+                        _close_stream(future, loser_target, loser_chunks)
+                )
+            if first is _END:
+                return
+            try:
+                yield first
+                yield from chunks
+            except Exception:
+                get_health(finished).record_failure()
+                raise
+            finally:
+                chunks.close()
+            return
+
+        # Every finished call failed: fail over now, even while a hedge is still running
+        if pending_targets:
+            target = start()
+
+    raise last_error
+
+
+def _first_chunk(chunks):
+    started = time.monotonic()
+    first = next(chunks, _END)
+    return first, time.monotonic() - started
+
+
+def _close_stream(future, target, chunks):
+    try:
+        first, latency = future.result()
+    except Exception:
+        get_health(target).record_failure()
+        return
+    get_health(target).record_success(latency, first_chunk=True)
+    chunks.close()
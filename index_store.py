@@ -0,0 +1,676 @@
+"""
+FAISS Index Storage Module
+
+Read and write the on-disk knowledge base index (faiss_index/).
+Supports memory-mapped, read-only loading so several worker processes
+on one host share the same page-cache pages instead of private copies.
+
+Every ingest publishes a new, immutable generation of the knowledge base:
+- generations/<number>/shards/<name>/: one shard per source (see sharded_index)
+- CURRENT: JSON pointer to the live generation, replaced atomically
+
+Readers resolve CURRENT once and load that whole generation, so they
+never see a mix of old and new files. Writers stage and publish while
+holding generation_lock(), so overlapping ingests don't drop each other's
+shard updates. Layout of each shard folder (and
+of a top-level index written before generations and shards):
+- index.faiss: the FAISS vectors
+- index_meta.json: index type and search settings (see ann_index)
+- chunks.sqlite: chunk text and metadata keyed by FAISS id (see chunk_store),
+  plus BM25 keyword postings (see keyword_index)
+- manifest.json: files of the docs shard and their chunk ids (see doc_manifest)
+- index.pkl: legacy pickled docstore, only read if chunks.sqlite is missing
+"""
+
+import json
+import os
+import pickle
+import shutil
+import tempfile
+import time
+import uuid
+from contextlib import contextmanager
+import faiss
+import numpy as np
+from langchain_community.docstore.in_memory import InMemoryDocstore
+from langchain_community.vectorstores import FAISS
+from langchain_core.documents import Document
+import ann_index
+import chunk_store
+import doc_manifest
+import keyword_index
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+INDEX_FILE = 'index.faiss'
+DOCSTORE_FILE = 'index.pkl'
+SHARDS_DIR = 'shards'
+GENERATIONS_DIR = 'generations'
+CURRENT_FILE = 'CURRENT'
+LOCK_FILE = '.ingest.lock'
+PUBLISHED_FILE = '.published'
+
+# Older generations always kept on disk for workers that have not swapped yet
+KEEP_GENERATIONS = 3
+
+# Shard holding the local docs/ folder; Confluence spaces get 'confluence-<space>'
+DOCS_SHARD = 'docs'
+LEGACY_SHARD = 'default'
+
+
+def default_index_path():
+    """Get the default index folder ('faiss_index' next to this module)"""
+    return os.path.join(os.path.dirname(__file__), 'faiss_index')
+
+
+def mmap_enabled():
+    """
+    Check whether memory-mapped index loading is enabled.
+
+    Controlled by the FAISS_MMAP environment variable (default: false).
+    Keep it off on Windows, where a mapped file cannot be replaced while
+    the app is running.
+    """
+    return os.getenv('FAISS_MMAP', 'false').lower() in ('1', 'true', 'yes')
+
+
+def get_generation_grace_seconds():
+    """
+    Get how long a replaced generation stays on disk from
+    GENERATION_GRACE_SECONDS (default: 600).
+
+    Workers pick up a new generation within INDEX_WATCH_INTERVAL, but a
+    worker that is busy or not watching may read the old one for longer.
+    """
+    return float(os.getenv('GENERATION_GRACE_SECONDS', '600'))
+
+
+def confluence_shard_name(space_key):
+    """Get the shard name for a Confluence space, e.g. 'confluence-arch'"""
+    return f"confluence-{space_key.lower()}"
+
+
+def shard_path(index_path, name):
+    """Get the folder of a named shard inside an index folder"""
+    return os.path.join(index_path, SHARDS_DIR, name)
+
+
+def list_shards(index_path):
+    """
+    List the shards of an index folder.
+
+    Args:
+        index_path (str): Path to the FAISS index folder
+
+    Returns:
+        list[tuple]: (shard name, shard folder) sorted by name. An index written
+        before sharding is listed as the shard LEGACY_SHARD.
+    """
+    shards = []
+    if os.path.exists(os.path.join(index_path, INDEX_FILE)):
+        shards.append((LEGACY_SHARD, index_path))
+
+    shards_root = os.path.join(index_path, SHARDS_DIR)
+    if os.path.isdir(shards_root):
+        shards.extend(
+            (name, os.path.join(shards_root, name))
+            for name in sorted(os.listdir(shards_root))
+            if not name.startswith('.') and os.path.exists(os.path.join(shards_root, name, INDEX_FILE))
+        )
+    return shards
+
+
+def read_current(index_path):
+    """
+    Read the CURRENT pointer of an index folder.
+
+    Returns:
+        dict: {'generation': int, 'path': generation folder relative to index_path},
+        or None if nothing has been published yet
+    """
+    current_file = os.path.join(index_path, CURRENT_FILE)
+    try:
+        with open(current_file, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+
+def current_generation(index_path):
+    """Get the live generation number (0 for an index written before generations)"""
+    current = read_current(index_path)
+    return current['generation'] if current else 0
+
+
+def resolve_index_path(index_path):
+    """
+    Get the folder holding the live generation's shards.
+
+    Args:
+        index_path (str): Path to the FAISS index folder
+
+    Returns:
+        tuple: (generation number, generation folder). Indexes written before
+        generations are returned as (0, index_path).
+    """
+    current = read_current(index_path)
+    if current is None:
+        return 0, index_path
+    return current['generation'], os.path.join(index_path, current['path'])
+
+
+@contextmanager
+def generation_lock(index_path):
+    """
+    Hold the index folder's exclusive ingest lock.
+
+    Staging and publishing a generation must happen inside this lock:
+    otherwise two ingests can stage from the same live generation and the
+    one that publishes last silently drops the other's shard.
+    The lock is released when the process exits, even after a crash.
+
+    Args:
+        index_path (str): Path to the FAISS index folder
+    """
+    os.makedirs(index_path, exist_ok=True)
+    with open(os.path.join(index_path, LOCK_FILE), 'a+b') as f:
+        if fcntl is not None:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+        else:
+            # msvcrt gives up after ~10 seconds; keep waiting like flock does
+            f.seek(0)
+            while True:
+                try:
+                    msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+                    break
+                except OSError:
+                    time.sleep(1)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+            else:
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+def stage_generation(index_path, replace_shards=(), base_path=None):
+    """
+    Create the folder for the next generation, pre-filled with the live
+    generation's shards except the ones being replaced.
+
+    Unchanged shard files are hard-linked (copied where links aren't
+    supported); files are never modified in place, so sharing them
+    between generations is safe. Call it inside generation_lock().
+
+    Args:
+        index_path (str): Path to the FAISS index folder
+        replace_shards (iterable[str]): Shards the caller will write itself.
+                                        Include LEGACY_SHARD to drop a pre-sharding index.
+        base_path (str, optional): Generation folder the caller read the replaced
+                                   shards from. If another ingest has published
+                                   a different version of one of them since,
+                                   the update would overwrite it, so
+                                   RuntimeError is raised instead.
+
+    Returns:
+        tuple: (generation number, staging folder) to write shards into and
+        then pass to publish_generation()
+    """
+    live_generation, live_path = resolve_index_path(index_path)
+    if base_path is not None and os.path.abspath(base_path) != os.path.abspath(live_path):
+        base_shards = dict(list_shards(base_path))
+        live_shards = dict(list_shards(live_path))
+        for name in replace_shards:
+            if not _same_shard(base_shards.get(name), live_shards.get(name)):
+                raise RuntimeError(
+                    f"Shard '{name}' was updated by another ingest (generation {live_generation}). "
+                    "Run the ingest again."
+                )
+    generations_root = os.path.join(index_path, GENERATIONS_DIR)
+    os.makedirs(generations_root, exist_ok=True)
+
+    # mkdir is atomic, so concurrent ingests never share a generation number
+    generation = live_generation + 1
+    while True:
+        staging_path = os.path.join(generations_root, f"{generation:06d}")
+        try:
+            os.mkdir(staging_path)
+            break
+        except FileExistsError:
+            generation += 1
+
+    for name, path in list_shards(live_path):
+        if name in replace_shards:
+            continue
+        if name == LEGACY_SHARD:
+            _link_index_files(path, staging_path)
+        else:
+            _link_index_files(path, shard_path(staging_path, name))
+    return generation, staging_path
+
+
+def publish_generation(index_path, generation):
+    """
+    Make a staged generation live by atomically replacing CURRENT, then
+    delete old generations (see _remove_old_generations). Call it
+    inside the generation_lock() the generation was staged in.
+
+    Args:
+        index_path (str): Path to the FAISS index folder
+        generation (int): Generation number from stage_generation()
+    """
+    current = {'generation': generation, 'path': f"{GENERATIONS_DIR}/{generation:06d}"}
+    # The marker's mtime is when the previous generation stopped being live
+    with open(os.path.join(index_path, current['path'], PUBLISHED_FILE), 'w', encoding='utf-8'):
+        pass
+    tmp_file = os.path.join(index_path, f".{CURRENT_FILE}.{uuid.uuid4().hex}")
+    with open(tmp_file, 'w', encoding='utf-8') as f:
+        json.dump(current, f)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_file, os.path.join(index_path, CURRENT_FILE))
+
+    _remove_old_generations(index_path, generation)
+
+
+def discard_generation(staging_path):
+    """Delete a staged generation that will not be published"""
+    shutil.rmtree(staging_path, ignore_errors=True)
+
+
+def _remove_old_generations(index_path, live_generation):
+    # A generation is deleted only when it is older than the last
+    # KEEP_GENERATIONS and was replaced more than the grace period ago, so
+    # a burst of ingests can't delete the files a slow worker still reads.
+    # Files still open or mapped in a lagging worker can't be deleted on
+    # Windows; errors are ignored and the files are retried on the next publish.
+    # An index written before generations (generation 0) is left in place:
+    # it is no longer read once CURRENT exists, and its files may be tracked
+    # in version control
+    generations_root = os.path.join(index_path, GENERATIONS_DIR)
+    names = sorted((name for name in os.listdir(generations_root) if name.isdigit()), key=int)
+    replaced_before = time.time() - get_generation_grace_seconds()
+    for name, successor in zip(names, names[1:]):
+        if int(name) > live_generation - KEEP_GENERATIONS:
+            break
+        if _published_at(os.path.join(generations_root, successor)) > replaced_before:
+            break
+        shutil.rmtree(os.path.join(generations_root, name), ignore_errors=True)
+
+
+def _published_at(generation_path):
+    # Generations published before the marker existed (or never published)
+    # fall back to the folder's own mtime
+    try:
+        return os.path.getmtime(os.path.join(generation_path, PUBLISHED_FILE))
+    except OSError:
+        return os.path.getmtime(generation_path)
+
+
+def _same_shard(path_a, path_b):
+    # Carried-over shards are hard links or copy2 copies, so an unchanged
+    # shard keeps its index file's size and mtime across generations
+    if path_a is None or path_b is None:
+        return path_a is None and path_b is None
+    stat_a = os.stat(os.path.join(path_a, INDEX_FILE))
+    stat_b = os.stat(os.path.join(path_b, INDEX_FILE))
+    return (stat_a.st_size, stat_a.st_mtime_ns) == (stat_b.st_size, stat_b.st_mtime_ns)
+
+
+def _link_index_files(source_dir, dest_dir):
+    os.makedirs(dest_dir, exist_ok=True)
+    for name in (INDEX_FILE, DOCSTORE_FILE, chunk_store.CHUNKS_FILE, ann_index.INDEX_META_FILE, doc_manifest.MANIFEST_FILE):
+        source = os.path.join(source_dir, name)
+        if not os.path.exists(source):
+            continue
+        try:
+            os.link(source, os.path.join(dest_dir, name))
+        except OSError:
+            shutil.copy2(source, os.path.join(dest_dir, name))
+
+
+def read_faiss_index(index_file, use_mmap=False, index_type='flat'):
+    """
+    Read a raw FAISS index from disk.
+
+    Args:
+        index_file (str): Path to the index.faiss file
+        use_mmap (bool): If True, map the vectors read-only instead of copying
+                         them into private heap memory
+        index_type (str): Index type from index_meta.json, picks the mmap mode
+
+    Returns:
+        faiss.Index: The loaded index
+    """
+    if use_mmap:
+        if index_type in ('ivf_flat', 'ivf_pq'):
+            # IO_FLAG_MMAP maps the inverted lists
+            io_flags = faiss.IO_FLAG_MMAP | faiss.IO_FLAG_READ_ONLY
+        else:
+            # IO_FLAG_MMAP_IFC maps flat codes (IndexFlat, HNSW storage);
+            # older faiss builds only have IO_FLAG_MMAP
+            io_flags = getattr(faiss, 'IO_FLAG_MMAP_IFC', faiss.IO_FLAG_MMAP) | faiss.IO_FLAG_READ_ONLY
+        try:
+            return faiss.read_index(index_file, io_flags)
+        except RuntimeError as e:
+            print(f"⚠️ Could not memory-map {index_file}: {e}. Loading into memory instead...")
+
+    return faiss.read_index(index_file)
+
+
+def load_index(index_path, embeddings, use_mmap=False, writable=False):
+    """
+    Load a FAISS vectorstore saved by save_index() or FAISS.save_local().
+
+    Args:
+        index_path (str): Path to the FAISS index folder
+        embeddings (Embeddings): Embeddings used to vectorize queries
+        use_mmap (bool): Memory-map the index read-only (see read_faiss_index)
+        writable (bool): Load chunks into memory so documents can be added
+                         and the index saved again. Disables use_mmap.
+
+    Returns:
+        FAISS: The loaded vectorstore
+    """
+    meta = ann_index.load_index_meta(index_path)
+    index = read_faiss_index(
+        os.path.join(index_path, INDEX_FILE),
+        use_mmap and not writable,
+        meta.get('index_type', 'flat')
+    )
+    ann_index.apply_search_params(index, meta)
+
+    # IVF indexes need a direct map to reconstruct vectors (see reconstruct_vector).
+    # Building it mutates the index, so it happens here, before the index is
+    # shared with search threads
+    ivf = faiss.try_extract_index_ivf(index)
+    if ivf is not None and not writable and ivf.direct_map.type == faiss.DirectMap.NoMap:
+        ivf.make_direct_map()
+
+    if os.path.exists(os.path.join(index_path, chunk_store.CHUNKS_FILE)):
+        docstore, index_to_docstore_id = chunk_store.open_chunk_store(index_path)
+        if writable:
+            docstore, index_to_docstore_id = _materialize(docstore.store)
+    else:
+        # Legacy layout written by FAISS.save_local()
+        with open(os.path.join(index_path, DOCSTORE_FILE), 'rb') as f:
+            docstore, index_to_docstore_id = pickle.load(f)
+
+    return FAISS(
+        embedding_function=embeddings,
+        index=index,
+        docstore=docstore,
+        index_to_docstore_id=index_to_docstore_id
+    )
+
+
+def build_vectorstore(documents, embeddings, index_type=None, ids=None):
+    """
+    Embed documents and build a FAISS vectorstore of the requested index type.
+
+    Replaces FAISS.from_documents(), which always builds a flat index.
+
+    Args:
+        documents (list): LangChain Documents (chunks) to index
+        embeddings (Embeddings): Embeddings used to vectorize the chunks
+        index_type (str, optional): 'flat', 'ivf_flat', 'hnsw', 'ivf_pq' or 'auto'.
+                                    Defaults to the FAISS_INDEX_TYPE env var.
+        ids (list[str], optional): Docstore ids of the chunks. Random if not given.
+
+    Returns:
+        tuple: (FAISS vectorstore, index meta dict to pass to save_index)
+    """
+    if index_type is None:
+        index_type = ann_index.get_index_type()
+
+    texts = [doc.page_content for doc in documents]
+    vectors = np.array(embeddings.embed_documents(texts), dtype=np.float32)
+    index, meta = ann_index.build_index(vectors, index_type)
+    print(f"Built {meta['index_type']} index with {index.ntotal} vectors")
+
+    if ids is None:
+        ids = [str(uuid.uuid4()) for _ in documents]
+    docstore = InMemoryDocstore({
+        _id: Document(id=_id, page_content=doc.page_content, metadata=doc.metadata)
+        for _id, doc in zip(ids, documents)
+    })
+    index_to_docstore_id = dict(enumerate(ids))
+
+    vectorstore = FAISS(
+        embedding_function=embeddings,
+        index=index,
+        docstore=docstore,
+        index_to_docstore_id=index_to_docstore_id
+    )
+    return vectorstore, meta
+
+
+def save_index(vectorstore, index_path, meta=None, manifest=None):
+    """
+    Save a FAISS vectorstore without ever exposing a half-written file.
+
+    Files are written to a temporary folder next to index_path and then
+    moved into place with os.replace(), so processes that have the old
+    index memory-mapped keep reading the old (unlinked) file.
+
+    Args:
+        vectorstore (FAISS): The vectorstore to save
+        index_path (str): Destination index folder
+        meta (dict, optional): Index settings from build_vectorstore().
+                               Defaults to the settings already saved in index_path.
+        manifest (dict, optional): File manifest of the docs shard (see doc_manifest)
+    """
+    parent = os.path.dirname(os.path.abspath(index_path))
+    os.makedirs(index_path, exist_ok=True)
+    if meta is None:
+        meta = ann_index.load_index_meta(index_path)
+
+    tmp_path = tempfile.mkdtemp(prefix='.faiss_tmp_', dir=parent)
+    try:
+        faiss.write_index(vectorstore.index, os.path.join(tmp_path, INDEX_FILE))
+        chunk_store.write_chunk_store(
+            os.path.join(tmp_path, chunk_store.CHUNKS_FILE),
+            vectorstore.docstore,
+            vectorstore.index_to_docstore_id
+        )
+        keyword_index.write_keyword_index(os.path.join(tmp_path, chunk_store.CHUNKS_FILE))
+        ann_index.save_index_meta(meta, os.path.join(tmp_path, ann_index.INDEX_META_FILE))
+        names = [chunk_store.CHUNKS_FILE, ann_index.INDEX_META_FILE, INDEX_FILE]
+        if manifest is not None:
+            doc_manifest.save_manifest(manifest, os.path.join(tmp_path, doc_manifest.MANIFEST_FILE))
+            names.insert(0, doc_manifest.MANIFEST_FILE)
+        for name in names:
+            os.replace(os.path.join(tmp_path, name), os.path.join(index_path, name))
+    finally:
+        shutil.rmtree(tmp_path, ignore_errors=True)
+
+    # The pickled docstore is superseded by chunks.sqlite
+    legacy_docstore = os.path.join(index_path, DOCSTORE_FILE)
+    if os.path.exists(legacy_docstore):
+        os.remove(legacy_docstore)
+
+
+def remove_chunks(vectorstore, doc_ids):
+    """
+    Delete chunks from a vectorstore loaded with writable=True.
+
+    FAISS ids stay dense (0..n-1, in the old order), as LangChain's
+    add_documents() and chunks.sqlite expect: flat indexes shift the
+    remaining vectors down themselves, IVF inverted lists get their ids
+    renumbered the same way. HNSW graphs can't delete nodes, so an HNSW
+    index is rebuilt from its stored vectors (no re-embedding).
+
+    Args:
+        vectorstore (FAISS): The vectorstore to modify
+        doc_ids (iterable[str]): Docstore ids of the chunks to delete
+
+    Returns:
+        int: Number of chunks deleted
+    """
+    doc_ids = set(doc_ids)
+    removed = np.array(sorted(
+        faiss_id for faiss_id, doc_id in vectorstore.index_to_docstore_id.items() if doc_id in doc_ids
+    ), dtype=np.int64)
+    if not len(removed):
+        return 0
+
+    index = vectorstore.index
+    if ann_index.try_extract_hnsw(index) is not None:
+        keep = np.setdiff1d(np.arange(index.ntotal, dtype=np.int64), removed)
+        vectors = index.reconstruct_n(0, index.ntotal)[keep]
+        print(f"HNSW can't delete vectors, rebuilding it from {len(keep)} stored vectors...")
+        vectorstore.index, _ = ann_index.build_index(vectors, 'hnsw')
+    else:
+        ivf = faiss.try_extract_index_ivf(index)
+        if ivf is not None:
+            # A direct map would be stale after renumbering; load_index() rebuilds it
+            ivf.set_direct_map_type(faiss.DirectMap.NoMap)
+        index.remove_ids(removed)
+        if ivf is not None:
+            _renumber_ivf_ids(ivf, removed)
+
+    removed_set = set(removed.tolist())
+    vectorstore.docstore.delete([vectorstore.index_to_docstore_id[faiss_id] for faiss_id in removed_set])
+    remaining = [
+        doc_id for faiss_id, doc_id in sorted(vectorstore.index_to_docstore_id.items())
+        if faiss_id not in removed_set
+    ]
+    vectorstore.index_to_docstore_id = dict(enumerate(remaining))
+    return len(removed)
+
+
+def _renumber_ivf_ids(ivf, removed):
+    # Shift every id down by the number of removed ids below it, in place
+    invlists = ivf.invlists
+    for list_no in range(ivf.nlist):
+        size = invlists.list_size(list_no)
+        if size:
+            ids = faiss.rev_swig_ptr(invlists.get_ids(list_no), size)
+            ids -= np.searchsorted(removed, ids)
+
+
+def get_documents(vectorstore, faiss_ids):
+    """
+    Look up the Documents for FAISS ids returned by index.search().
+
+    Uses a single SQL query when the vectorstore is backed by chunks.sqlite.
+
+    Args:
+        vectorstore (FAISS): The vectorstore that was searched
+        faiss_ids (iterable[int]): FAISS ids (-1 entries are ignored)
+
+    Returns:
+        dict: faiss_id -> Document
+    """
+    faiss_ids = {int(i) for i in faiss_ids if i != -1}
+    if isinstance(vectorstore.docstore, chunk_store.SQLiteDocstore):
+        return vectorstore.docstore.store.get_by_faiss_ids(sorted(faiss_ids))
+
+    docs = {}
+    for faiss_id in faiss_ids:
+        doc = vectorstore.docstore.search(vectorstore.index_to_docstore_id[faiss_id])
+        if isinstance(doc, Document):
+            docs[faiss_id] = doc
+    return docs
+
+
+def filter_bitmap(vectorstore, filters):
+    """
+    Turn metadata filters into a FAISS id bitmap for search_vectors().
+
+    Args:
+        vectorstore (FAISS): The vectorstore to filter
+        filters (dict): See chunk_store.FILTER_KEYS
+
+    Returns:
+        np.ndarray: uint8 bitmap of allowed FAISS ids
+    """
+    if isinstance(vectorstore.docstore, chunk_store.SQLiteDocstore):
+        return vectorstore.docstore.store.filter_bitmap(filters)
+
+    # Legacy in-memory docstore: check each chunk's metadata
+    allowed = []
+    for faiss_id, doc_id in vectorstore.index_to_docstore_id.items():
+        doc = vectorstore.docstore.search(doc_id)
+        if isinstance(doc, Document) and chunk_store.metadata_matches(doc.metadata, filters):
+            allowed.append(faiss_id)
+    return chunk_store.ids_to_bitmap(allowed)
+
+
+def search_vectors(index, query_vectors, k, id_bitmap=None):
+    """
+    Search a FAISS index, optionally restricted to the ids set in a bitmap.
+
+    The restriction is applied inside FAISS (IDSelectorBitmap), so all k
+    results match the filter - no over-fetching and discarding.
+
+    Args:
+        index (faiss.Index): Index to search
+        query_vectors (np.ndarray): float32 matrix of queries
+        k (int): Hits per query
+        id_bitmap (np.ndarray, optional): Bitmap from filter_bitmap()
+
+    Returns:
+        tuple: (distances, faiss_ids) arrays of shape (num_queries, k)
+    """
+    if id_bitmap is None:
+        return index.search(query_vectors, k)
+
+    selector = faiss.IDSelectorBitmap(id_bitmap)
+    ivf = faiss.try_extract_index_ivf(index)
+    hnsw_index = ann_index.try_extract_hnsw(index)
+    if ivf is not None:
+        params = faiss.SearchParametersIVF(sel=selector, nprobe=ivf.nprobe)
+    elif hnsw_index is not None:
+        params = faiss.SearchParametersHNSW(sel=selector, efSearch=hnsw_index.hnsw.efSearch)
+    else:
+        params = faiss.SearchParameters(sel=selector)
+    return index.search(query_vectors, k, params=params)
+
+
+def reconstruct_vector(index, faiss_id):
+    """
+    Get the stored vector for a FAISS id.
+
+    Read-only: safe to call while other threads search the index. IVF
+    indexes can only reconstruct once load_index() has built their direct map.
+
+    Returns:
+        np.ndarray: The vector, or None if the index type can't reconstruct it
+    """
+    try:
+        return index.reconstruct(int(faiss_id))
+    except RuntimeError:
+        return None
+
+
+def reconstruct_vectors(index, faiss_ids):
+    """
+    Get the stored vectors for several FAISS ids at once.
+
+    Read-only, like reconstruct_vector().
+
+    Returns:
+        np.ndarray: float32 matrix with one row per id, or None if the index
+        type can't reconstruct them
+    """
+    try:
+        return index.reconstruct_batch(np.asarray(faiss_ids, dtype=np.int64))
+    except RuntimeError:
+        return None
+
+
+def _materialize(store):
+    """Read every chunk of a ChunkStore into an in-memory docstore"""
+    docs = {}
+    index_to_docstore_id = {}
+    for faiss_id, doc in store.iter_documents():
+        docs[doc.id] = doc
+        index_to_docstore_id[faiss_id] = doc.id
+    return InMemoryDocstore(docs), index_to_docstore_id
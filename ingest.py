@@ -1,15 +1,69 @@
+import argparse
 import os
-from langchain_community.document_loaders import DirectoryLoader, TextLoader
+import uuid
+from datetime import datetime, timedelta, timezone
+from langchain_community.document_loaders import TextLoader
 from langchain_text_splitters import RecursiveCharacterTextSplitter
-from langchain_community.vectorstores import FAISS
 from langchain_core.documents import Document
 import confluence_sync
-from embeddings import get_embeddings
+import ann_index
+import batch_embeddings
+import config
+import doc_manifest
+import embedding_cache
+import index_store
+from embeddings import get_embeddings, get_embedding_info
 
-def ingest_documents():
+# Chunking of docs and Confluence pages (a change re-indexes the docs shard)
+CHUNK_SIZE = 1000
+CHUNK_OVERLAP = 200
+
+def _embedding_model_key():
+    """Get 'provider:model' of the configured embeddings"""
+    embedding_info = get_embedding_info()
+    return f"{embedding_info['provider'].lower()}:{embedding_info['raw_model']}"
+
+def _ingest_embeddings():
+    """
+    Get the embeddings used to index chunks: unchanged chunks reuse their
+    stored vectors, the rest are embedded in parallel batches.
     """
-    Load Markdown files from /docs folder, split into chunks, create embeddings,
-    and save to FAISS index.
+    return embedding_cache.cached_document_embeddings(
+        batch_embeddings.BatchEmbeddings(get_embeddings(sdk_retries=False)),
+        _embedding_model_key()
+    )
+
+def _text_splitter():
+    """Get the splitter for chunks of CHUNK_SIZE characters with CHUNK_OVERLAP overlap"""
+    return RecursiveCharacterTextSplitter(
+        chunk_size=CHUNK_SIZE,
+        chunk_overlap=CHUNK_OVERLAP,
+        length_function=len,
+        separators=["\n\n", "\n", " ", ""]
+    )
+
+def ingest_documents(index_type=None, full_rebuild=False):
+    """
+    Index the Markdown files in the /docs folder as the 'docs' shard of the FAISS index.
+    
+    Only files added, modified or deleted since the last ingest are processed:
+    the manifest saved with the shard (see doc_manifest) maps every file to its
+    chunk ids, so a deleted file's chunks are removed, a modified file's chunks
+    are replaced, and a new file's chunks are added. Refresh time follows the
+    size of the change, not of the corpus.
+    
+    The shard is built from scratch on the first run, with full_rebuild, when
+    index_type asks for a different index type, or when the embedding model
+    or chunking changed.
+    
+    Args:
+        index_type (str, optional): FAISS index type - 'flat', 'ivf_flat', 'hnsw',
+                                    'ivf_pq' or 'auto'. Defaults to FAISS_INDEX_TYPE env var
+                                    for a new shard; an update keeps the shard's type.
+        full_rebuild (bool): Re-index every file instead of only the changed ones
+    
+    Returns:
+        FAISS: The docs shard vectorstore
     """
     # Path to docs folder
     docs_path = os.path.join(os.path.dirname(__file__), 'docs')
@@ -17,78 +71,366 @@ def ingest_documents():
     if not os.path.exists(docs_path):
         raise FileNotFoundError(f"Docs folder not found at: {docs_path}")
     
-    print(f"Loading Markdown files from: {docs_path}")
+    print(f"Scanning Markdown files in: {docs_path}")
+    files = doc_manifest.scan_files(docs_path)
+    print(f"Found {len(files)} documents")
     
-    # Load all Markdown files from the docs folder
-    # Use TextLoader to avoid requiring the unstructured package
-    loader = DirectoryLoader(
-        docs_path,
-        glob="**/*.md",
-        loader_cls=TextLoader,
-        loader_kwargs={'encoding': 'utf-8'},
-        show_progress=True
-    )
-    documents = loader.load()
+    # Initialize embeddings using configured provider
+    print("Initializing embeddings model...")
+    embeddings = _ingest_embeddings()
+    settings = {
+        'embedding': _embedding_model_key(),
+        'chunk_size': CHUNK_SIZE,
+        'chunk_overlap': CHUNK_OVERLAP
+    }
     
-    print(f"Loaded {len(documents)} documents")
+    index_path = index_store.default_index_path()
+    live_generation, live_path = index_store.resolve_index_path(index_path)
+    live_shard_path = index_store.shard_path(live_path, index_store.DOCS_SHARD)
     
-    # Split documents into chunks
-    # 1000 characters with 200 character overlap
-    text_splitter = RecursiveCharacterTextSplitter(
-        chunk_size=1000,
-        chunk_overlap=200,
-        length_function=len,
-        separators=["\n\n", "\n", " ", ""]
-    )
+    manifest = None if full_rebuild else doc_manifest.load_manifest(live_shard_path)
+    index_meta = None
+    if manifest is not None:
+        index_meta = ann_index.load_index_meta(live_shard_path)
+        type_changed = index_type not in (None, 'auto', index_meta.get('index_type'))
+        if manifest.get('settings') != settings or type_changed:
+            print("Embedding model, chunking or index type changed. Rebuilding the docs shard...")
+            manifest = None
     
-    print("Splitting documents into chunks...")
-    chunks = text_splitter.split_documents(documents)
-    print(f"Created {len(chunks)} chunks")
+    vectorstore = None
+    if manifest is not None:
+        entries, stale_ids, changed_docs = _plan_update(manifest, files)
+        if not stale_ids and not changed_docs:
+            print("✅ Knowledge base is up to date, no documents changed")
+            return index_store.load_index(live_shard_path, embeddings)
+        
+        print(f"Loading existing docs shard ({len(changed_docs)} files to index, {len(stale_ids)} chunks to remove)...")
+        try:
+            vectorstore = index_store.load_index(live_shard_path, embeddings, writable=True)
+        except Exception as e:
+            print(f"⚠️ Could not load existing shard: {e}. Rebuilding the docs shard...")
+        else:
+            removed = index_store.remove_chunks(vectorstore, stale_ids)
+            chunks, chunk_ids = _split_files(changed_docs, files, entries)
+            if chunks:
+                vectorstore.add_documents(chunks, ids=chunk_ids)
+            print(f"✅ Removed {removed} chunks and added {len(chunks)} chunks")
     
-    # Initialize embeddings using configured provider
-    print("Initializing embeddings model...")
-    embeddings = get_embeddings()
+    if vectorstore is None:
+        print("Loading all documents...")
+        entries = {}
+        changed_docs = {relative: _load_file(stat['path']) for relative, stat in files.items()}
+        print("Splitting documents into chunks...")
+        chunks, chunk_ids = _split_files(changed_docs, files, entries)
+        print(f"Created {len(chunks)} chunks")
+        
+        # Create FAISS vectorstore
+        print("Creating FAISS vectorstore...")
+        vectorstore, index_meta = index_store.build_vectorstore(chunks, embeddings, index_type, chunk_ids)
     
-    # Create FAISS vectorstore
-    print("Creating FAISS vectorstore...")
-    vectorstore = FAISS.from_documents(chunks, embeddings)
+    # Publish a new generation with a new docs shard (Confluence shards are carried over).
+    # A pre-sharding index held these docs (and any Confluence pages) in one file and is dropped.
+    # An update made from the live shard fails if another ingest replaced that shard meanwhile.
+    had_legacy_index = index_store.LEGACY_SHARD in dict(index_store.list_shards(live_path))
+    with index_store.generation_lock(index_path):
+        generation, staging_path = index_store.stage_generation(
+            index_path,
+            replace_shards=(index_store.DOCS_SHARD, index_store.LEGACY_SHARD),
+            base_path=live_path if manifest is not None else None
+        )
+        shard_path = index_store.shard_path(staging_path, index_store.DOCS_SHARD)
+        print(f"Saving FAISS index to: {shard_path}")
+        try:
+            index_store.save_index(vectorstore, shard_path, index_meta, {'settings': settings, 'files': entries})
+        except Exception:
+            index_store.discard_generation(staging_path)
+            raise
+        index_store.publish_generation(index_path, generation)
     
-    # Save the vectorstore to local folder
-    index_path = os.path.join(os.path.dirname(__file__), 'faiss_index')
-    print(f"Saving FAISS index to: {index_path}")
-    vectorstore.save_local(index_path)
+    if had_legacy_index:
+        print("Replaced the old single-file index. Re-sync Confluence spaces to restore their pages.")
     
-    print(f"✅ Successfully created FAISS index with {len(chunks)} chunks")
-    print(f"Index saved to: {index_path}")
+    print(f"✅ Docs shard holds {vectorstore.index.ntotal} chunks from {len(entries)} documents")
+    print(f"Published index generation {generation} to: {index_path}")
     
     return vectorstore
 
 
-def ingest_from_confluence(space_key=None, labels=None, merge_with_existing=True):
+def _load_file(path):
+    """Load a Markdown file as one Document (source: its path)"""
+    # Use TextLoader to avoid requiring the unstructured package
+    return TextLoader(path, encoding='utf-8').load()[0]
+
+
+def _plan_update(manifest, files):
+    """
+    Work out what changed in docs/ since the manifest was saved.
+    
+    Args:
+        manifest (dict): Manifest of the live docs shard
+        files (dict): From doc_manifest.scan_files()
+    
+    Returns:
+        tuple: (manifest entries of the unchanged files, chunk ids to remove,
+        relative path -> Document of every added or modified file)
+    """
+    added, touched, deleted, unchanged = doc_manifest.compare(manifest, files)
+    known = manifest['files']
+    entries = {relative: known[relative] for relative in unchanged}
+    stale_ids = [chunk_id for relative in deleted for chunk_id in known[relative]['chunk_ids']]
+    changed_docs = {relative: _load_file(files[relative]['path']) for relative in added}
+    
+    # A new mtime alone (checkout, copy) doesn't make a file modified
+    modified = 0
+    for relative in touched:
+        doc = _load_file(files[relative]['path'])
+        entry = known[relative]
+        if doc_manifest.content_hash(doc.page_content) == entry['sha256']:
+            entries[relative] = entry
+            continue
+        stale_ids.extend(entry['chunk_ids'])
+        changed_docs[relative] = doc
+        modified += 1
+    
+    print(f"Documents: {len(added)} added, {modified} modified, {len(deleted)} deleted, "
+          f"{len(files) - len(added) - modified} unchanged")
+    return entries, stale_ids, changed_docs
+
+
+def _split_files(documents, files, entries):
+    """
+    Split documents into chunks and record each file in the manifest entries.
+    
+    Args:
+        documents (dict): relative path -> Document
+        files (dict): From doc_manifest.scan_files()
+        entries (dict): Manifest entries to add the files to
+    
+    Returns:
+        tuple: (chunks, their docstore ids)
     """
-    Fetch pages from Confluence and add them to FAISS index.
+    text_splitter = _text_splitter()
+    chunks = []
+    chunk_ids = []
+    for relative, doc in documents.items():
+        file_chunks = text_splitter.split_documents([doc])
+        ids = [str(uuid.uuid4()) for _ in file_chunks]
+        entries[relative] = {
+            'mtime_ns': files[relative]['mtime_ns'],
+            'size': files[relative]['size'],
+            'sha256': doc_manifest.content_hash(doc.page_content),
+            'chunk_ids': ids
+        }
+        chunks.extend(file_chunks)
+        chunk_ids.extend(ids)
+    return chunks, chunk_ids
+
+
+def ingest_from_confluence(space_key=None, labels=None, merge_with_existing=True, index_type=None):
+    """
+    Fetch pages from Confluence and add them to the space's FAISS shard.
+    
+    Each space has its own shard, so a sync only rewrites that space's
+    index files; local docs and other spaces are not loaded or re-saved.
+    
+    A merge keys chunks by Confluence page id and version: pages already
+    in the shard at the same version are skipped, and a page with a new
+    version has its old chunks replaced, so repeated syncs never store a
+    page twice.
+    
+    The first sync of a space and label filter fetches every page. After
+    it succeeds, merges are incremental (see confluence_sync): only pages modified since the last
+    sync's watermark are downloaded, plus any listed page whose version the
+    shard doesn't have. Pages no longer listed are removed when the listing
+    covers everything synced into the shard.
     
     Args:
         space_key (str): Confluence space key. If None, uses config value
         labels (list): List of labels to filter pages. If None, uses config value
-        merge_with_existing (bool): If True, merge with existing index. If False, replace it.
+        merge_with_existing (bool): If True, merge with the space's existing shard. If False, replace it.
+        index_type (str): FAISS index type for a new index ('flat', 'ivf_flat', 'hnsw',
+                          'ivf_pq' or 'auto'). If None, uses FAISS_INDEX_TYPE env var.
+                          A merge keeps the type of the existing shard.
         
     Returns:
         tuple: (success, message, num_pages)
     """
+    if space_key is None:
+        space_key = config.CONFLUENCE_SPACE_KEY
+    if labels is None:
+        labels = config.CONFLUENCE_LABELS
+    index_path = index_store.default_index_path()
+    shard_name = index_store.confluence_shard_name(space_key)
+    live_generation, live_path = index_store.resolve_index_path(index_path)
+    live_shard_path = index_store.shard_path(live_path, shard_name)
+    
+    # Initialize embeddings using configured provider
+    print("Initializing embeddings model...")
+    embeddings = _ingest_embeddings()
+    
+    # Merge with existing or create new
+    index_meta = None
+    vectorstore = None
+    if merge_with_existing and os.path.exists(os.path.join(live_shard_path, index_store.INDEX_FILE)):
+        print(f"Loading existing FAISS shard for space {space_key}...")
+        try:
+            vectorstore = index_store.load_index(live_shard_path, embeddings, writable=True)
+        except Exception as e:
+            print(f"⚠️ Could not load existing shard: {e}. Creating new shard...")
+    
+    sync_started = datetime.now(timezone.utc)
+    state_key = confluence_sync.sync_state_key(labels)
+    space_state = confluence_sync.load_sync_state(index_path).get(space_key, {})
+    watermark = space_state.get(state_key) if vectorstore is not None else None
+    stored = _stored_pages(vectorstore) if vectorstore is not None else {}
+    deleted_ids = []
+    
     # Fetch pages from Confluence
-    print("Fetching pages from Confluence...")
-    success, pages, error_msg = confluence_sync.fetch_space_pages(space_key, labels)
+    if watermark:
+        print(f"Fetching Confluence pages changed since the last sync ({watermark})...")
+        success, pages, deleted_ids, num_pages, error_msg = _fetch_changed_pages(
+            stored, space_key, labels, watermark,
+            allow_deletes=not labels or set(space_state) <= {state_key}
+        )
+        if not success:
+            return False, f"❌ Failed to fetch Confluence pages: {error_msg}", 0
+    else:
+        # No page limit: the watermark saved after this sync must cover the whole space
+        print("Fetching all pages from Confluence...")
+        success, pages, error_msg = confluence_sync.fetch_space_pages(space_key, labels, max_pages=None)
+        
+        if not success:
+            return False, f"❌ Failed to fetch Confluence pages: {error_msg}", 0
+        
+        if not pages:
+            return False, "⚠️ No pages found matching the criteria", 0
+        num_pages = len(pages)
+    
+    print(f"✅ Fetched {len(pages)} pages from Confluence")
+    
+    if vectorstore is not None:
+        changed_pages, stale_ids, unchanged = _plan_confluence_merge(stored, pages)
+        print(f"Pages: {len(changed_pages)} new or updated, {unchanged} unchanged, {len(deleted_ids)} deleted")
+        if not changed_pages and not deleted_ids:
+            with index_store.generation_lock(index_path):
+                _save_watermark(index_path, space_key, state_key, sync_started, merge_with_existing)
+            success_msg = f"✅ All {num_pages} Confluence pages are up to date"
+            print(success_msg)
+            return True, success_msg, num_pages
+        
+        removed = index_store.remove_chunks(vectorstore, stale_ids + [
+            doc_id for page_id in deleted_ids for doc_id in stored[page_id]['ids']
+        ])
+        chunks = _split_confluence_pages(changed_pages)
+        if chunks:
+            print("Merging Confluence pages with existing index...")
+            vectorstore.add_documents(chunks)
+        print(f"✅ Replaced {removed} old chunks with {len(chunks)} Confluence chunks")
+    else:
+        changed_pages = pages
+        chunks = _split_confluence_pages(pages)
+        print("Creating new FAISS index from Confluence pages...")
+        vectorstore, index_meta = index_store.build_vectorstore(chunks, embeddings, index_type)
+    
+    # Publish a new generation with the updated shard; other shards are carried over.
+    # A merge fails if another sync of this space replaced the shard meanwhile.
+    with index_store.generation_lock(index_path):
+        generation, staging_path = index_store.stage_generation(
+            index_path,
+            replace_shards=(shard_name,),
+            base_path=live_path if index_meta is None else None
+        )
+        shard_path = index_store.shard_path(staging_path, shard_name)
+        print(f"Saving FAISS index to: {shard_path}")
+        try:
+            if index_meta is None:
+                # A merge keeps the settings of the shard it was loaded from
+                index_meta = ann_index.load_index_meta(live_shard_path)
+            index_store.save_index(vectorstore, shard_path, index_meta)
+        except Exception:
+            index_store.discard_generation(staging_path)
+            raise
+        index_store.publish_generation(index_path, generation)
+        print(f"Published index generation {generation}")
+        
+        # Only a published sync moves the watermark
+        _save_watermark(index_path, space_key, state_key, sync_started, merge_with_existing)
+    
+    success_msg = f"✅ Successfully synced {len(changed_pages)} new or updated pages ({len(chunks)} chunks) from Confluence"
+    if deleted_ids:
+        success_msg += f" and removed {len(deleted_ids)} deleted pages"
+    print(success_msg)
     
+    return True, success_msg, num_pages
+
+
+def _fetch_changed_pages(stored, space_key, labels, watermark, allow_deletes):
+    """
+    Fetch the pages of an incremental sync.
+    
+    Lists every page's id and version, downloads the bodies of pages modified
+    since the watermark (less the sync overlap), and then of any other listed
+    page whose version the shard doesn't have (e.g. beyond max_pages in an
+    earlier sync).
+    
+    Args:
+        stored (dict): From _stored_pages()
+        space_key (str): Confluence space key
+        labels (list): Label filter
+        watermark (str): ISO-8601 start time of the last successful sync
+        allow_deletes (bool): Whether stored pages missing from the listing were deleted
+    
+    Returns:
+        tuple: (success, pages, deleted page ids, number of listed pages, error_message)
+    """
+    success, versions, error_msg = confluence_sync.list_space_pages(space_key, labels)
     if not success:
-        return False, f"❌ Failed to fetch Confluence pages: {error_msg}", 0
+        return False, [], [], 0, error_msg
+    print(f"Listed {len(versions)} pages")
     
-    if not pages:
-        return False, "⚠️ No pages found matching the criteria", 0
+    since = datetime.fromisoformat(watermark) - timedelta(hours=confluence_sync.get_sync_overlap_hours())
+    success, pages, error_msg = confluence_sync.fetch_space_pages(
+        space_key, labels, max_pages=None, modified_since=since
+    )
+    if not success:
+        return False, [], [], 0, error_msg
     
-    print(f"✅ Fetched {len(pages)} pages from Confluence")
+    fetched = {str(page['id']) for page in pages}
+    missed = [
+        page_id for page_id, version in versions.items()
+        if page_id not in fetched and stored.get(page_id, {}).get('versions') != {version}
+    ]
+    if missed:
+        print(f"Fetching {len(missed)} more pages the index is behind on...")
+        success, missed_pages, error_msg = confluence_sync.fetch_space_pages(space_key, labels, page_ids=missed)
+        if not success:
+            return False, [], [], 0, error_msg
+        pages.extend(missed_pages)
+    
+    deleted = [page_id for page_id in stored if page_id not in versions] if allow_deletes else []
+    return True, pages, deleted, len(versions), ""
+
+
+def _save_watermark(index_path, space_key, state_key, sync_started, merge_with_existing):
+    """Record the start of a successful sync as the watermark of its space and label filter"""
+    state = confluence_sync.load_sync_state(index_path)
+    # A replaced shard no longer holds what other label filters synced
+    space_state = state.get(space_key, {}) if merge_with_existing else {}
+    space_state[state_key] = sync_started.isoformat()
+    state[space_key] = space_state
+    confluence_sync.save_sync_state(index_path, state)
+
+
+def _split_confluence_pages(pages):
+    """
+    Convert Confluence pages to LangChain documents and split them into chunks.
+    
+    Args:
+        pages (list): Page dicts from confluence_sync.fetch_space_pages()
     
-    # Convert Confluence pages to LangChain documents
+    Returns:
+        list: Chunks carrying the page's confluence_id and version
+    """
     documents = []
     for page in pages:
         doc = Document(
@@ -97,62 +439,86 @@ def ingest_from_confluence(space_key=None, labels=None, merge_with_existing=True
                 'source': f"confluence:{page['title']}",
                 'title': page['title'],
                 'confluence_id': page['id'],
-                'version': page['version']
+                'version': page['version'],
+                'space': page['space'],
+                'labels': page['labels']
             }
         )
         documents.append(doc)
     
-    # Split documents into chunks
-    text_splitter = RecursiveCharacterTextSplitter(
-        chunk_size=1000,
-        chunk_overlap=200,
-        length_function=len,
-        separators=["\n\n", "\n", " ", ""]
-    )
-    
     print("Splitting Confluence pages into chunks...")
-    chunks = text_splitter.split_documents(documents)
+    chunks = _text_splitter().split_documents(documents)
     print(f"Created {len(chunks)} chunks from Confluence pages")
+    return chunks
+
+
+def _stored_pages(vectorstore):
+    """
+    Group the chunks of a space's shard by Confluence page.
     
-    # Initialize embeddings using configured provider
-    print("Initializing embeddings model...")
-    embeddings = get_embeddings()
+    Args:
+        vectorstore (FAISS): The shard, loaded with writable=True
     
-    index_path = os.path.join(os.path.dirname(__file__), 'faiss_index')
+    Returns:
+        dict: page id -> {'versions': set of stored versions, 'ids': docstore ids of its chunks}
+    """
+    stored = {}
+    for doc_id in vectorstore.index_to_docstore_id.values():
+        doc = vectorstore.docstore.search(doc_id)
+        if not isinstance(doc, Document) or doc.metadata.get('confluence_id') is None:
+            continue
+        page = stored.setdefault(str(doc.metadata['confluence_id']), {'versions': set(), 'ids': []})
+        page['versions'].add(doc.metadata.get('version'))
+        page['ids'].append(doc_id)
+    return stored
+
+
+def _plan_confluence_merge(stored, pages):
+    """
+    Compare fetched pages with the chunks already in a space's shard.
     
-    # Merge with existing or create new
-    if merge_with_existing and os.path.exists(os.path.join(index_path, 'index.faiss')):
-        print("Loading existing FAISS index...")
-        try:
-            existing_vectorstore = FAISS.load_local(
-                index_path, 
-                embeddings,
-                allow_dangerous_deserialization=True
-            )
-            print("Merging Confluence pages with existing index...")
-            existing_vectorstore.add_documents(chunks)
-            vectorstore = existing_vectorstore
-            print(f"✅ Merged {len(chunks)} Confluence chunks with existing index")
-        except Exception as e:
-            print(f"⚠️ Could not load existing index: {e}. Creating new index...")
-            vectorstore = FAISS.from_documents(chunks, embeddings)
-    else:
-        print("Creating new FAISS index from Confluence pages...")
-        vectorstore = FAISS.from_documents(chunks, embeddings)
+    A page is unchanged if all its stored chunks have the fetched version and
+    it is stored exactly once: shards merged before chunks were keyed by page
+    can hold several copies, so pages whose chunk count doesn't match a fresh
+    split of their content are re-indexed once to clean up.
     
-    # Save the updated vectorstore
-    print(f"Saving FAISS index to: {index_path}")
-    vectorstore.save_local(index_path)
+    Args:
+        stored (dict): From _stored_pages()
+        pages (list): Page dicts from confluence_sync.fetch_space_pages()
     
-    success_msg = f"✅ Successfully synced {len(pages)} pages ({len(chunks)} chunks) from Confluence"
-    print(success_msg)
+    Returns:
+        tuple: (pages to index, docstore ids of their old chunks, number of unchanged pages)
+    """
+    # A page listed twice in one fetch is indexed once, at its newest version
+    latest = {}
+    for page in pages:
+        key = str(page['id'])
+        if key not in latest or page['version'] > latest[key]['version']:
+            latest[key] = page
     
-    return True, success_msg, len(pages)
+    text_splitter = _text_splitter()
+    changed_pages = []
+    stale_ids = []
+    for key, page in latest.items():
+        existing = stored.get(key)
+        if existing is None:
+            changed_pages.append(page)
+            continue
+        if existing['versions'] == {page['version']}:
+            # Splitting is cheap next to embedding; it tells a single copy from duplicates
+            if len(existing['ids']) == len(text_splitter.split_text(page['content'])):
+                continue
+        changed_pages.append(page)
+        stale_ids.extend(existing['ids'])
+    return changed_pages, stale_ids, len(latest) - len(changed_pages)
 
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Index the docs/ folder into the knowledge base")
+    parser.add_argument('--full', action='store_true', help="Re-index every file, not only the changed ones")
+    args = parser.parse_args()
     try:
-        ingest_documents()
+        ingest_documents(full_rebuild=args.full)
     except Exception as e:
         print(f"Error during ingestion: {e}")
         print(f"Error type: {type(e).__name__}")
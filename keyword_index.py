@@ -0,0 +1,245 @@
+"""
+Keyword Index Module
+
+Sparse BM25 keyword index stored next to the FAISS vectors.
+Postings live in the same chunks.sqlite file as the chunk text (see
+chunk_store), keyed by FAISS id, so exact terms such as "ADR-007" or
+"Fargate" are found with an indexed postings lookup instead of relying
+on vector similarity.
+
+Also holds the ADR-id index (ADR id -> FAISS ids of the chunks that
+mention it), used to put priority ADRs into context directly.
+"""
+
+import json
+import math
+import os
+import re
+import sqlite3
+import threading
+from collections import Counter
+import chunk_store
+
+# BM25 parameters (standard Okapi defaults)
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+# Reciprocal-rank fusion constant (Cormack et al.)
+RRF_K = 60
+
+# Words, optionally joined by '-', '_' or '.' (keeps 'adr-007' and 'ap-east-1' whole)
+_TOKEN_PATTERN = re.compile(r"[a-z0-9]+(?:[-_.][a-z0-9]+)*")
+_ADR_ID_PATTERN = re.compile(r"\badr-\d+\b")
+
+# Parts of a compound token that are too common to be a search term by themselves
+_UNSPLIT_PARTS = frozenset(('adr',))
+
+_STOPWORDS = frozenset("""
+a about an and are as at be by can do does for from has have how i in is it
+its me of on or our say should tell that the their this to was we what
+when where which who why will with you your
+""".split())
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS postings (
+    term TEXT NOT NULL,
+    faiss_id INTEGER NOT NULL,
+    tf INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS chunk_lengths (
+    faiss_id INTEGER PRIMARY KEY,
+    length INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS adr_chunks (
+    adr_id TEXT NOT NULL,
+    faiss_id INTEGER NOT NULL
+);
+"""
+
+
+def tokenize(text):
+    """
+    Split text into lowercase search terms.
+
+    Compound tokens ('event-driven', 'adr-007') are kept whole and also
+    split into their parts so either form matches. Number parts and the
+    'adr' prefix are not used on their own: they would match every ADR.
+
+    Args:
+        text (str): Text to tokenize
+
+    Returns:
+        list[str]: Terms in order of appearance (stopwords removed)
+    """
+    terms = []
+    for token in _TOKEN_PATTERN.findall(text.lower()):
+        if token in _STOPWORDS:
+            continue
+        terms.append(token)
+        if '-' in token or '_' in token or '.' in token:
+            terms.extend(
+                part for part in re.split(r"[-_.]", token)
+                if part and part not in _STOPWORDS and part not in _UNSPLIT_PARTS and not part.isdigit()
+            )
+    return terms
+
+
+def find_adr_ids(text):
+    """Find ADR identifiers (e.g. 'adr-007') mentioned in text, lowercased"""
+    return sorted(set(_ADR_ID_PATTERN.findall(text.lower())))
+
+
+def chunk_adr_ids(page_content, metadata):
+    """Get the ADR ids a chunk is indexed under: those it mentions or its file/page is named after"""
+    return find_adr_ids(' '.join([page_content, str(metadata.get('source', '')), str(metadata.get('title', ''))]))
+
+
+def write_keyword_index(db_path):
+    """
+    Build BM25 postings and the ADR-id index for every chunk already
+    stored in a chunks.sqlite file.
+
+    Args:
+        db_path (str): Path to a chunks.sqlite written by chunk_store.write_chunk_store
+    """
+    conn = sqlite3.connect(db_path)
+    try:
+        conn.executescript(_SCHEMA)
+        postings = []
+        lengths = []
+        adr_chunks = []
+        rows = conn.execute("SELECT faiss_id, page_content, metadata FROM chunks").fetchall()
+        for faiss_id, page_content, metadata in rows:
+            terms = tokenize(page_content)
+            lengths.append((faiss_id, len(terms)))
+            postings.extend((term, faiss_id, tf) for term, tf in Counter(terms).items())
+
+            adr_chunks.extend((adr_id, faiss_id) for adr_id in chunk_adr_ids(page_content, json.loads(metadata)))
+        conn.executemany("INSERT INTO postings VALUES (?, ?, ?)", postings)
+        conn.executemany("INSERT INTO chunk_lengths VALUES (?, ?)", lengths)
+        conn.executemany("INSERT INTO adr_chunks VALUES (?, ?)", adr_chunks)
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_postings_term ON postings(term)")
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_adr_chunks_adr ON adr_chunks(adr_id)")
+        conn.commit()
+    finally:
+        conn.close()
+
+
+class KeywordIndex:
+    """
+    Read-only BM25 search over the postings in a chunks.sqlite file.
+    """
+
+    def __init__(self, db_path):
+        self.db_path = db_path
+        self._local = threading.local()
+        self._stats = None
+
+    def _conn(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            uri = f"file:{os.path.abspath(self.db_path)}?mode=ro"
+            conn = sqlite3.connect(uri, uri=True)
+            self._local.conn = conn
+        return conn
+
+    def _corpus_stats(self):
+        if self._stats is None:
+            num_chunks, total_length = self._conn().execute(
+                "SELECT COUNT(*), COALESCE(SUM(length), 0) FROM chunk_lengths"
+            ).fetchone()
+            self._stats = (num_chunks, (total_length / num_chunks) if num_chunks else 0.0)
+        return self._stats
+
+    def postings(self, term):
+        """Get (faiss_id, tf, chunk length) for every chunk containing term"""
+        return self._conn().execute(
+            "SELECT p.faiss_id, p.tf, l.length FROM postings p "
+            "JOIN chunk_lengths l ON l.faiss_id = p.faiss_id WHERE p.term = ?",
+            (term,)
+        ).fetchall()
+
+    def search(self, query, k=6, allowed=None):
+        """
+        Rank chunks against a query with BM25.
+
+        Args:
+            query (str): The user's question
+            k (int): Number of hits to return
+            allowed (callable, optional): Predicate on FAISS id; other chunks are skipped
+
+        Returns:
+            list[tuple]: (faiss_id, bm25 score), best first
+        """
+        num_chunks, avg_length = self._corpus_stats()
+        if not num_chunks:
+            return []
+
+        scores = Counter()
+        for term in set(tokenize(query)):
+            rows = self.postings(term)
+            if not rows:
+                continue
+            idf = math.log(1 + (num_chunks - len(rows) + 0.5) / (len(rows) + 0.5))
+            for faiss_id, tf, length in rows:
+                if allowed is not None and not allowed(faiss_id):
+                    continue
+                norm = BM25_K1 * (1 - BM25_B + BM25_B * length / avg_length) if avg_length else BM25_K1
+                scores[faiss_id] += idf * tf * (BM25_K1 + 1) / (tf + norm)
+
+        return scores.most_common(k)
+
+    def chunks_for_adr(self, adr_id):
+        """
+        Get the FAISS ids of every chunk that belongs to or mentions an ADR.
+
+        Args:
+            adr_id (str): ADR identifier, e.g. 'ADR-007' (case-insensitive)
+
+        Returns:
+            list[int]: FAISS ids in index order
+        """
+        rows = self._conn().execute(
+            "SELECT DISTINCT faiss_id FROM adr_chunks WHERE adr_id = ? ORDER BY faiss_id",
+            (adr_id.strip().lower(),)
+        ).fetchall()
+        return [row[0] for row in rows]
+
+
+def open_keyword_index(index_path):
+    """
+    Open the keyword index of an index folder.
+
+    Returns:
+        KeywordIndex: The index, or None if the folder predates keyword indexing
+    """
+    db_path = os.path.join(index_path, chunk_store.CHUNKS_FILE)
+    if not os.path.exists(db_path):
+        return None
+    uri = f"file:{os.path.abspath(db_path)}?mode=ro"
+    conn = sqlite3.connect(uri, uri=True)
+    try:
+        has_postings = conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'postings'"
+        ).fetchone()
+    finally:
+        conn.close()
+    return KeywordIndex(db_path) if has_postings else None
+
+
+def reciprocal_rank_fusion(*rankings, k=None):
+    """
+    Merge several ranked id lists with reciprocal-rank fusion.
+
+    Args:
+        *rankings (list): Ranked lists of ids, best first
+        k (int, optional): Number of fused ids to return (default: all)
+
+    Returns:
+        list[tuple]: (id, fused score), best first
+    """
+    fused = Counter()
+    for ranking in rankings:
+        for rank, item in enumerate(ranking, 1):
+            fused[item] += 1.0 / (RRF_K + rank)
+    return fused.most_common(k)
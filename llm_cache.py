@@ -0,0 +1,168 @@
+"""
+LLM Response Cache Module
+
+Opt-in, content-addressed cache of LLM responses in SQLite
+(.cache/llm_responses.sqlite by default).
+
+The key is a SHA-256 over the provider, model, sampling parameters,
+knowledge-base generation and the full prompt. The prompt already holds
+the retrieved context, and publishing a new index generation changes the
+key, so a knowledge-base refresh never serves answers built from old
+content. Entries expire after LLM_CACHE_TTL_HOURS, and the oldest are
+dropped beyond LLM_CACHE_MAX_ENTRIES.
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+
+# Eviction runs once every this many writes
+EVICT_EVERY_WRITES = 50
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS responses (
+    key TEXT PRIMARY KEY,
+    response TEXT NOT NULL,
+    created REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_responses_created ON responses(created);
+"""
+
+
+def cache_enabled():
+    """Check whether LLM responses are cached (LLM_CACHE env var, default: false)"""
+    return os.getenv('LLM_CACHE', 'false').lower() in ('1', 'true', 'yes')
+
+
+def default_cache_path():
+    """Get the cache file from LLM_CACHE_PATH (default: .cache/llm_responses.sqlite)"""
+    return os.getenv(
+        'LLM_CACHE_PATH',
+        os.path.join(os.path.dirname(__file__), '.cache', 'llm_responses.sqlite')
+    )
+
+
+def make_key(provider, model_name, params, generation, prompt):
+    """
+    Build the cache key of an LLM call.
+
+    Args:
+        provider (str): MODEL_PROVIDER, e.g. 'bedrock'
+        model_name (str): Model id
+        params (dict): Sampling parameters (max_tokens, temperature, top_p)
+        generation (int): Knowledge-base generation the prompt was built from
+        prompt (str): The full prompt
+
+    Returns:
+        str: Hex SHA-256 digest
+    """
+    payload = json.dumps(
+        {'provider': provider, 'model': model_name, 'params': params, 'generation': generation, 'prompt': prompt},
+        sort_keys=True
+    )
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+class ResponseCache:
+    """
+    SQLite table of LLM responses with TTL and size-based eviction.
+
+    Safe to share between threads.
+    """
+
+    def __init__(self, db_path, max_entries=None, ttl_seconds=None):
+        self.db_path = db_path
+        self.max_entries = max_entries or int(os.getenv('LLM_CACHE_MAX_ENTRIES', '10000'))
+        self.ttl_seconds = ttl_seconds or float(os.getenv('LLM_CACHE_TTL_HOURS', '24')) * 3600
+
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._writes = 0
+        self.hits = 0
+        self.misses = 0
+
+        os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+        conn = self._conn()
+        conn.executescript(_SCHEMA)
+        conn.commit()
+
+    def _conn(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn = conn
+        return conn
+
+    def get(self, key):
+        """Get a cached response, or None if missing or expired"""
+        row = self._conn().execute(
+            "SELECT response FROM responses WHERE key = ? AND created >= ?",
+            (key, time.time() - self.ttl_seconds)
+        ).fetchone()
+        with self._lock:
+            if row is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+        return row[0]
+
+    def put(self, key, response):
+        """Store a response"""
+        conn = self._conn()
+        conn.execute("INSERT OR REPLACE INTO responses VALUES (?, ?, ?)", (key, response, time.time()))
+        conn.commit()
+
+        with self._lock:
+            self._writes += 1
+            evict = self._writes >= EVICT_EVERY_WRITES
+            if evict:
+                self._writes = 0
+        if evict:
+            self.evict()
+
+    def evict(self):
+        """Delete expired entries, then the oldest beyond max_entries"""
+        conn = self._conn()
+        conn.execute("DELETE FROM responses WHERE created < ?", (time.time() - self.ttl_seconds,))
+        conn.execute(
+            "DELETE FROM responses WHERE rowid IN ("
+            "SELECT rowid FROM responses ORDER BY created DESC LIMIT -1 OFFSET ?)",
+            (self.max_entries,)
+        )
+        conn.commit()
+
+    def stats(self):
+        """Get hit/miss counters since the process started"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / lookups if lookups else 0.0
+            }
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_cache():
+    """
+    Get the process-wide response cache.
+
+    Returns:
+        ResponseCache: The cache, or None when LLM_CACHE is off
+    """
+    global _cache
+
+    if not cache_enabled():
+        return None
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = ResponseCache(default_cache_path())
+    return _cache
@@ -0,0 +1,197 @@
+"""
+LLM Clients Module
+
+Process-wide registry of provider SDK clients.
+
+Each client is built once per provider, region and credentials and then
+shared by every thread, so credential resolution, endpoint setup and TLS
+handshakes happen once instead of on every question. SDK-level retries
+are off for LLM calls: throttled calls are retried by rate_limit. HTTP connection
+pools are sized by LLM_MAX_CONNECTIONS and idle connections are kept
+alive for LLM_KEEPALIVE_SECONDS.
+
+Async clients (for brain.invoke_llm_async) are shared per event loop,
+since their connections belong to the loop that opened them.
+"""
+
+import asyncio
+import hashlib
+import os
+import threading
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+
+_clients = {}
+_clients_lock = threading.Lock()
+_async_clients = weakref.WeakKeyDictionary()
+_executor = None
+
+
+def get_max_connections():
+    """Get the HTTP connection pool size per client from LLM_MAX_CONNECTIONS (default: 20)"""
+    return int(os.getenv('LLM_MAX_CONNECTIONS', '20'))
+
+
+def get_keepalive_seconds():
+    """Get how long idle connections stay open from LLM_KEEPALIVE_SECONDS (default: 60)"""
+    return float(os.getenv('LLM_KEEPALIVE_SECONDS', '60'))
+
+
+def get_client(key, factory):
+    """
+    Get a shared client, building it on first use.
+
+    Concurrent first callers wait for the one build.
+
+    Args:
+        key (tuple): Provider and the settings the client is built with
+        factory (callable): Builds the client
+
+    Returns:
+        The shared client
+    """
+    client = _clients.get(key)
+    if client is None:
+        with _clients_lock:
+            client = _clients.get(key)
+            if client is None:
+                client = factory()
+                _clients[key] = client
+    return client
+
+
+def get_async_client(key, factory):
+    """
+    Get a client shared by the coroutines of the running event loop.
+
+    Args:
+        key (tuple): Provider and the settings the client is built with
+        factory (callable): Builds the client
+
+    Returns:
+        The client for the current loop (dropped when the loop is garbage collected)
+    """
+    loop = asyncio.get_running_loop()
+    with _clients_lock:
+        clients = _async_clients.setdefault(loop, {})
+        client = clients.get(key)
+        if client is None:
+            client = factory()
+            clients[key] = client
+    return client
+
+
+def get_executor():
+    """
+    Get the thread pool that runs blocking provider calls for async callers.
+
+    Sized like the connection pools (LLM_MAX_CONNECTIONS), so offloaded
+    calls are never queued behind asyncio's small default executor.
+    """
+    global _executor
+
+    if _executor is None:
+        with _clients_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(max_workers=get_max_connections(), thread_name_prefix='llm')
+    return _executor
+
+
+def get_bedrock_client(region_name=None, aws_access_key=None, aws_secret_key=None, sdk_retries=False):
+    """
+    Get the shared Bedrock runtime client (used for both LLM calls and embeddings).
+
+    Args:
+        region_name (str, optional): AWS region. Defaults to AWS_REGION or us-east-1
+        aws_access_key (str, optional): Explicit access key; default credential chain if omitted
+        aws_secret_key (str, optional): Explicit secret key
+        sdk_retries (bool): Keep botocore's standard retries, for callers that don't retry
+                            through rate_limit (query embeddings). Otherwise a call
+                            is attempted once, so retries are not multiplied.
+
+    Returns:
+        botocore.client.BedrockRuntime: Thread-safe client with a pooled HTTP connection
+    """
+    import boto3
+    from botocore.config import Config
+
+    region_name = region_name or os.getenv('AWS_REGION', 'us-east-1')
+
+    def build():
+        client_kwargs = {
+            'region_name': region_name,
+            'config': Config(
+                max_pool_connections=get_max_connections(),
+                tcp_keepalive=True,
+                retries={'mode': 'standard'} if sdk_retries else {'total_max_attempts': 1}
+            )
+        }
+        if aws_access_key and aws_secret_key:
+            client_kwargs['aws_access_key_id'] = aws_access_key
+            client_kwargs['aws_secret_access_key'] = aws_secret_key
+        # A private session: boto3's default session is not thread-safe
+        return boto3.session.Session().client('bedrock-runtime', **client_kwargs)
+
+    return get_client(('bedrock', region_name, _credential_id(aws_access_key, aws_secret_key), sdk_retries), build)
+
+
+def get_openai_client(api_key):
+    """Get the shared OpenAI client for an API key"""
+    from openai import OpenAI
+
+    return get_client(
+        ('openai', _credential_id(api_key)),
+        lambda: OpenAI(api_key=api_key, http_client=_http_client(), max_retries=0)
+    )
+
+
+def get_anthropic_client(api_key):
+    """Get the shared Anthropic client for an API key"""
+    from anthropic import Anthropic
+
+    return get_client(
+        ('anthropic', _credential_id(api_key)),
+        lambda: Anthropic(api_key=api_key, http_client=_http_client(), max_retries=0)
+    )
+
+
+def get_async_openai_client(api_key):
+    """Get the OpenAI async client of the running event loop for an API key"""
+    from openai import AsyncOpenAI
+
+    return get_async_client(
+        ('openai', _credential_id(api_key)),
+        lambda: AsyncOpenAI(api_key=api_key, http_client=_http_client(asynchronous=True), max_retries=0)
+    )
+
+
+def get_async_anthropic_client(api_key):
+    """Get the Anthropic async client of the running event loop for an API key"""
+    from anthropic import AsyncAnthropic
+
+    return get_async_client(
+        ('anthropic', _credential_id(api_key)),
+        lambda: AsyncAnthropic(api_key=api_key, http_client=_http_client(asynchronous=True), max_retries=0)
+    )
+
+
+def _http_client(asynchronous=False):
+    """Build an httpx client (or AsyncClient) with the configured pool size and keep-alive"""
+    import httpx
+
+    max_connections = get_max_connections()
+    client_class = httpx.AsyncClient if asynchronous else httpx.Client
+    return client_class(
+        limits=httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_connections,
+            keepalive_expiry=get_keepalive_seconds()
+        ),
+        timeout=httpx.Timeout(600.0, connect=10.0)
+    )
+
+
+def _credential_id(*secrets):
+    # Registry keys hold a digest, never the secret itself
+    joined = '\0'.join(secret or '' for secret in secrets)
+    return hashlib.sha256(joined.encode('utf-8')).hexdigest()[:16]
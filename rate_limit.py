@@ -0,0 +1,333 @@
+"""
+Rate Limit Module
+
+Client-side rate limiting and throttle-aware retries for provider calls
+(LLM calls, and document embedding during ingest).
+
+Every provider and model has one process-wide limiter with two token
+buckets: requests per minute and tokens per minute. LLM_LIMITS sets them
+per provider:model target, e.g.
+    bedrock:us.deepseek.r1-v1:0=50/200000,anthropic:claude-3-5-sonnet-latest=1000/400000
+and LLM_RPM / LLM_TPM apply to targets it doesn't list;
+ingest embedding uses EMBED_RPM and EMBED_TPM instead.
+A call reserves its share up front and sleeps until the buckets cover it,
+so bursts are smoothed into steady throughput instead of being rejected
+by the provider.
+
+Throttled calls (Bedrock ThrottlingException, HTTP 429 / 503 / 529) are
+retried up to LLM_MAX_RETRIES times with exponential backoff and full
+jitter, waiting at least as long as the provider's Retry-After header.
+The clients of wrapped calls (LLM calls and ingest embedding) are built
+without SDK retries, so a throttled call is not also retried underneath;
+query embeddings are not wrapped and keep their SDK's retries.
+"""
+
+import asyncio
+import os
+import random
+import threading
+import time
+
+# Bedrock error codes that mean "slow down", not "this request is wrong"
+THROTTLE_ERROR_CODES = (
+    'ThrottlingException',
+    'TooManyRequestsException',
+    'ServiceUnavailableException',
+    'ModelNotReadyException'
+)
+THROTTLE_STATUS_CODES = (429, 503, 529)
+
+# Rough prompt size in tokens for the tokens-per-minute bucket
+CHARS_PER_TOKEN = 4
+
+
+def get_max_retries():
+    """Get how often a throttled call is retried from LLM_MAX_RETRIES (default: 4)"""
+    return int(os.getenv('LLM_MAX_RETRIES', '4'))
+
+
+def get_backoff_seconds():
+    """Get the first retry delay and the delay cap from LLM_RETRY_BASE_SECONDS / LLM_RETRY_MAX_SECONDS (default: 1, 30)"""
+    return float(os.getenv('LLM_RETRY_BASE_SECONDS', '1')), float(os.getenv('LLM_RETRY_MAX_SECONDS', '30'))
+
+
+def estimate_tokens(prompt, max_tokens):
+    """Estimate the tokens a call uses: the prompt plus the most it can generate"""
+    return len(prompt) // CHARS_PER_TOKEN + max_tokens
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket refilled continuously at rate_per_minute.
+
+    reserve() takes tokens immediately, letting the balance go negative,
+    and returns how long the caller must wait. Callers are therefore served
+    in arrival order and nobody spins on the lock.
+    """
+
+    def __init__(self, rate_per_minute, capacity=None):
+        self.rate = rate_per_minute / 60.0
+        self.capacity = capacity or rate_per_minute
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self, amount=1):
+        """
+        Take amount tokens.
+
+        Returns:
+            float: Seconds to wait before using them (0 if available now)
+        """
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            # A request larger than the bucket waits for a full bucket, not forever
+            self._tokens -= min(amount, self.capacity)
+            if self._tokens >= 0:
+                return 0.0
+            return -self._tokens / self.rate
+
+
+class RateLimiter:
+    """
+    Requests-per-minute and tokens-per-minute limits of one provider and model.
+
+    Args:
+        requests_per_minute (float): 0 for no request limit
+        tokens_per_minute (float): 0 for no token limit
+    """
+
+    def __init__(self, requests_per_minute=0, tokens_per_minute=0):
+        self.requests = TokenBucket(requests_per_minute) if requests_per_minute else None
+        self.tokens = TokenBucket(tokens_per_minute) if tokens_per_minute else None
+
+    def reserve(self, tokens, requests=1):
+        """Reserve requests (default: one) and tokens, returning the seconds to wait"""
+        delay = 0.0
+        if self.requests is not None:
+            delay = max(delay, self.requests.reserve(requests))
+        if self.tokens is not None:
+            delay = max(delay, self.tokens.reserve(tokens))
+        return delay
+
+    def acquire(self, tokens, requests=1):
+        """Block until requests and tokens may be sent"""
+        delay = self.reserve(tokens, requests)
+        if delay:
+            time.sleep(delay)
+
+    async def acquire_async(self, tokens):
+        """Wait, without blocking the event loop, until one request and tokens may be sent"""
+        delay = self.reserve(tokens)
+        if delay:
+            await asyncio.sleep(delay)
+
+
+_limiters = {}
+_limiters_lock = threading.Lock()
+
+
+def get_target_limits(provider, model_name):
+    """
+    Get the LLM rate limits of a provider:model target.
+
+    LLM_LIMITS entries are provider:model=rpm/tpm; either number may be left
+    out ('=50', '=/200000') to use the global value.
+
+    Returns:
+        tuple[float, float]: (requests per minute, tokens per minute) from
+        LLM_LIMITS, else LLM_RPM / LLM_TPM (default: 0, unlimited)
+    """
+    requests_per_minute = float(os.getenv('LLM_RPM', '0'))
+    tokens_per_minute = float(os.getenv('LLM_TPM', '0'))
+
+    for entry in os.getenv('LLM_LIMITS', '').split(','):
+        if not entry.strip():
+            continue
+        # Model ids may contain ':' themselves (us.deepseek.r1-v1:0)
+        target, _, limits = entry.strip().rpartition('=')
+        entry_provider, _, entry_model = target.partition(':')
+        if not entry_model:
+            raise ValueError(f"Invalid LLM_LIMITS entry '{entry}'. Use provider:model=rpm/tpm.")
+        if entry_provider.lower() != provider or entry_model != model_name:
+            continue
+        rpm, _, tpm = limits.partition('/')
+        if rpm.strip():
+            requests_per_minute = float(rpm)
+        if tpm.strip():
+            tokens_per_minute = float(tpm)
+    return requests_per_minute, tokens_per_minute
+
+
+def get_limiter(provider, model_name, requests_per_minute=None, tokens_per_minute=None):
+    """
+    Get the process-wide limiter of a provider and model.
+
+    Args:
+        provider (str): e.g. 'bedrock'
+        model_name (str): Model id
+        requests_per_minute (float, optional): Defaults to the target's limit (see get_target_limits)
+        tokens_per_minute (float, optional): Defaults to the target's limit (see get_target_limits)
+
+    Returns:
+        RateLimiter: The shared limiter, or None when no limit is set
+    """
+    if requests_per_minute is None or tokens_per_minute is None:
+        target_rpm, target_tpm = get_target_limits(provider, model_name)
+        if requests_per_minute is None:
+            requests_per_minute = target_rpm
+        if tokens_per_minute is None:
+            tokens_per_minute = target_tpm
+    if not requests_per_minute and not tokens_per_minute:
+        return None
+
+    key = (provider, model_name, requests_per_minute, tokens_per_minute)
+    with _limiters_lock:
+        limiter = _limiters.get(key)
+        if limiter is None:
+            limiter = RateLimiter(requests_per_minute, tokens_per_minute)
+            _limiters[key] = limiter
+    return limiter
+
+
+def is_throttled(error):
+    """Check whether a provider error means the call was throttled and can be retried"""
+    # botocore ClientError
+    response = getattr(error, 'response', None)
+    if isinstance(response, dict):
+        if response.get('Error', {}).get('Code') in THROTTLE_ERROR_CODES:
+            return True
+        return response.get('ResponseMetadata', {}).get('HTTPStatusCode') in THROTTLE_STATUS_CODES
+
+    # OpenAI / Anthropic APIStatusError
+    return getattr(error, 'status_code', None) in THROTTLE_STATUS_CODES
+
+
+def retry_after(error):
+    """
+    Get the delay a throttled response asked for.
+
+    Returns:
+        float: Seconds from the Retry-After (or retry-after-ms) header, or None
+    """
+    response = getattr(error, 'response', None)
+    if isinstance(response, dict):
+        headers = response.get('ResponseMetadata', {}).get('HTTPHeaders', {})
+    else:
+        headers = getattr(response, 'headers', None) or {}
+
+    try:
+        if headers.get('retry-after-ms'):
+            return float(headers['retry-after-ms']) / 1000
+        if headers.get('retry-after'):
+            return float(headers['retry-after'])
+    except (TypeError, ValueError):
+        # An HTTP date instead of seconds: fall back to backoff
+        pass
+    return None
+
+
+def backoff_delay(attempt, error=None):
+    """
+    Get the wait before retry number attempt (0-based).
+
+    Exponential backoff with full jitter, but never shorter than Retry-After.
+    """
+    base, cap = get_backoff_seconds()
+    delay = random.uniform(0, min(cap, base * 2 ** attempt))
+    requested = retry_after(error) if error is not None else None
+    if requested is not None:
+        delay = max(delay, requested)
+    return delay
+
+
+def call_with_retry(func, limiter=None, tokens=0, requests=1):
+    """
+    Call func within the rate limit, retrying throttled attempts.
+
+    Args:
+        func (callable): The provider call
+        limiter (RateLimiter, optional): From get_limiter(); every attempt is limited
+        tokens (int): estimate_tokens() of the call
+        requests (int): Provider requests func makes (e.g. one per text for Bedrock embeddings)
+
+    Returns:
+        What func returns
+    """
+    max_retries = get_max_retries()
+    for attempt in range(max_retries + 1):
+        if limiter is not None:
+            limiter.acquire(tokens, requests)
+        try:
+            return func()
+        except Exception as e:
+            if attempt == max_retries or not is_throttled(e):
+                raise
+            delay = backoff_delay(attempt, e)
+            print(f"⏳ Provider call throttled, retrying in {delay:.1f}s ({attempt + 1}/{max_retries})")
+            time.sleep(delay)
+
+
+async def call_with_retry_async(func, limiter=None, tokens=0):
+    """
+    Async variant of call_with_retry().
+
+    Args:
+        func (callable): Returns a new awaitable for each attempt
+        limiter (RateLimiter, optional): From get_limiter()
+        tokens (int): estimate_tokens() of the call
+
+    Returns:
+        What the awaitable returns
+    """
+    max_retries = get_max_retries()
+    for attempt in range(max_retries + 1):
+        if limiter is not None:
+            await limiter.acquire_async(tokens)
+        try:
+            return await func()
+        except Exception as e:
+            if attempt == max_retries or not is_throttled(e):
+                raise
+            delay = backoff_delay(attempt, e)
+            print(f"⏳ LLM call throttled, retrying in {delay:.1f}s ({attempt + 1}/{max_retries})")
+            await asyncio.sleep(delay)
+
+
+def retry_stream(open_stream, limiter=None, tokens=0):
+    """
+    Stream from a generator, retrying throttled attempts until the first chunk.
+
+    Once text has been yielded the stream is not retried, since the caller
+    has already consumed part of it.
+
+    Args:
+        open_stream (callable): Returns a new chunk generator for each attempt
+        limiter (RateLimiter, optional): From get_limiter()
+        tokens (int): estimate_tokens() of the call
+
+    Yields:
+        The generator's chunks
+    """
+    max_retries = get_max_retries()
+    for attempt in range(max_retries + 1):
+        if limiter is not None:
+            limiter.acquire(tokens)
+        stream = open_stream()
+        try:
+            first = next(stream)
+        except StopIteration:
+            return
+        except Exception as e:
+            if attempt == max_retries or not is_throttled(e):
+                raise
+            delay = backoff_delay(attempt, e)
+            print(f"⏳ LLM stream throttled, retrying in {delay:.1f}s ({attempt + 1}/{max_retries})")
+            time.sleep(delay)
+            continue
+
+        yield first
+        yield from stream
+        return
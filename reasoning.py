@@ -0,0 +1,397 @@
+"""
+Reasoning Stripper Module
+
+Remove model reasoning (DeepSeek-R1 <think> blocks, "Okay, let's see..."
+preambles) and instruction echoes from LLM output, so only the answer is
+shown to the user. Works on a stream of chunks (ReasoningStripper) or on
+a complete response (strip_reasoning).
+
+The output is processed in a single pass by a small state machine:
+- reasoning: inside a reasoning block, everything is dropped until an
+  end marker (</think>, </thinking>, </reasoning>). An opening marker
+  (<think>, ...) enters this state from any other state; DeepSeek-R1 may
+  omit the opening marker, so the stream can also start in this state.
+- preamble: no answer yet; lines are held, reasoning lines dropped, until
+  the first answer-like line
+- answer: lines are passed through, minus instruction echoes
+
+Each line is classified with one precompiled regex alternation per kind
+of phrase (answer, reasoning, echo) instead of one scan per phrase, and
+reasoning blocks are skipped without looking at their lines at all.
+"""
+
+import re
+
+REASONING_START_MARKERS = ("<think>", "<thinking>", "<reasoning>")
+REASONING_END_MARKERS = ("</think>", "</thinking>", "</reasoning>")
+REASONING_MARKERS = REASONING_START_MARKERS + REASONING_END_MARKERS
+
+# Lines that start a model's reasoning rather than its answer
+REASONING_STARTERS = (
+    "okay, let's see",
+    "wait,",
+    "the user is asking",
+    "let me think",
+    "looking at",
+    "first,",
+    "so,",
+    "but wait",
+    "however,",
+    "the context",
+    "according to the instructions"
+)
+
+# Lines that look like actual answer content
+ANSWER_STARTERS = (
+    "i do not know",
+    "according to",
+    "the requirements",
+    "the decision",
+    "based on",
+    "the architecture",
+    "the policy",
+    "yes,",
+    "no,",
+    "each service",
+    "all data",
+    "encryption",
+    "aws",
+    "the following",
+    "the decision records",
+    "adr-",
+    "decision records",
+    "here are",
+    "here is",
+    "the list",
+    "1.",
+    "2.",
+    "3.",
+    "4.",
+    "- adr",
+    "* adr"
+)
+
+# Prompt instructions some models repeat verbatim
+INSTRUCTION_ECHOES = (
+    "do not make up an answer",
+    "do not mention the context in your answer"
+)
+
+# An answer shorter than this after stripping is replaced by fallback()
+MIN_ANSWER_LENGTH = 10
+
+REASONING = 'reasoning'
+PREAMBLE = 'preamble'
+ANSWER = 'answer'
+
+
+def _alternation(phrases):
+    # Longest first, so a phrase never loses to its own prefix
+    return "|".join(re.escape(p) for p in sorted(phrases, key=len, reverse=True))
+
+
+_START_MARKER_PATTERN = re.compile(_alternation(REASONING_START_MARKERS), re.IGNORECASE)
+_END_MARKER_PATTERN = re.compile(_alternation(REASONING_END_MARKERS), re.IGNORECASE)
+_MARKER_PATTERN = re.compile(_alternation(REASONING_MARKERS), re.IGNORECASE)
+# Phrases of different kinds overlap ("according to the instructions" is
+# reasoning, "according to" an answer), so each kind has its own pattern
+_LINE_PATTERNS = (
+    ('echo', re.compile(_alternation(INSTRUCTION_ECHOES))),
+    ('answer', re.compile(_alternation(ANSWER_STARTERS))),
+    ('reasoning', re.compile(_alternation(REASONING_STARTERS)))
+)
+_LIST_ITEM_PREFIXES = ("ADR-", "adr-", "- ADR", "* ADR", "1.", "2.", "3.", "4.", "5.")
+_FALLBACK_PREFIXES = ("ADR-", "adr-", "-", "*", "1.", "2.", "3.", "4.", "5.")
+
+# A partial answer line is shown once it is long enough to rule out an instruction echo
+_MIN_PARTIAL_LINE = max(len(echo) for echo in INSTRUCTION_ECHOES) + 16
+# Longest marker minus one: text that may be the start of a split marker
+_MARKER_TAIL = max(len(marker) for marker in REASONING_MARKERS) - 1
+
+
+def classify_line(line):
+    """
+    Classify a stripped line.
+
+    Returns:
+        set: Any of 'answer', 'reasoning' and 'echo'
+    """
+    lower = line.lower()
+    kinds = {kind for kind, pattern in _LINE_PATTERNS if pattern.search(lower)}
+    if line.startswith(_LIST_ITEM_PREFIXES):
+        kinds.add('answer')
+    return kinds
+
+
+class ReasoningStripper:
+    """
+    Incremental filter over streamed LLM output.
+
+    Usage:
+        stripper = ReasoningStripper()
+        for chunk in stream:
+            visible = stripper.feed(chunk)
+        visible = stripper.finish()
+
+    An opening reasoning marker always starts a reasoning block; a block
+    that never ends is shown as if its markers were not there.
+
+    Args:
+        expect_reasoning_block (bool): The model reasons first without an opening
+                                       marker: hold everything until a reasoning end marker
+        filter_lines (bool): Drop reasoning-looking preamble lines and instruction
+                             echoes. With False only reasoning blocks and markers are removed.
+    """
+
+    def __init__(self, expect_reasoning_block=False, filter_lines=True):
+        self.filter_lines = filter_lines
+        self._state = REASONING if expect_reasoning_block else self._output_state()
+        self._buffer = ""
+        # Text to show, from _replay_state, if the current reasoning block never ends
+        self._replay = []
+        self._replay_state = self._output_state()
+        self._ignore_start_markers = False
+        self._started = False
+        # Preamble: lines kept until the answer starts, and whether a reasoning line was seen
+        self._held = []
+        self._after_reasoning = False
+        # Answer: the current line was shown before its newline arrived
+        self._line_shown = False
+        # Everything received, for fallback() when stripping leaves no answer
+        self._received = []
+
+    def feed(self, chunk):
+        """
+        Add a chunk of model output.
+
+        Args:
+            chunk (str): Next piece of the stream
+
+        Returns:
+            str: Answer text that can be displayed now (may be empty)
+        """
+        self._received.append(chunk)
+        if self._state != ANSWER:
+            self._replay.append(chunk)
+        self._buffer += chunk
+        return self._visible(self._process(final=False))
+
+    def finish(self):
+        """
+        Flush the rest of the output at the end of the stream.
+
+        Returns:
+            str: Remaining answer text, or fallback() if nothing was shown
+        """
+        if self._state == REASONING:
+            # The reasoning block never ended (or never came, e.g. from a failover
+            # model that does not reason): filter it as if it had no markers
+            self._state = self._replay_state
+            self._buffer = "".join(self._replay)
+            self._held = []
+            self._after_reasoning = False
+            self._ignore_start_markers = True
+        text = self._visible(self._process(final=True)).rstrip()
+        if not self._started:
+            text = self.fallback()
+            self._started = bool(text)
+        return text
+
+    def skip_reasoning(self, reasoning_text):
+        """
+        Treat text as a finished reasoning block that was never fed: it is
+        not shown, but fallback() still sees it. The next chunk is handled
+        like the start of the output.
+        """
+        self._received.append(reasoning_text)
+        self._end_reasoning()
+
+    def fallback(self):
+        """
+        Best-effort answer for output that stripping emptied: every
+        answer-like line received, else the last few non-reasoning lines.
+        """
+        lines = _MARKER_PATTERN.sub("", "".join(self._received)).splitlines()
+        candidates = []
+        for line in lines:
+            stripped = line.strip()
+            if not stripped:
+                continue
+            kinds = classify_line(stripped)
+            if 'reasoning' not in kinds and ('answer' in kinds or stripped.startswith(_FALLBACK_PREFIXES)):
+                candidates.append(stripped)
+        if candidates:
+            return "\n".join(candidates)
+
+        last_lines = []
+        for line in lines[-10:]:
+            stripped = line.strip()
+            if len(stripped) > 5 and 'reasoning' not in classify_line(stripped):
+                last_lines.append(stripped)
+        return "\n".join(last_lines[-5:])
+
+    def _output_state(self):
+        return PREAMBLE if self.filter_lines else ANSWER
+
+    def _start_reasoning(self, rest):
+        # Called with the text after an opening marker. Nothing has been shown
+        # since the preamble began, so from there it is all replayed if needed
+        if self._state == ANSWER:
+            self._replay = [rest]
+        self._replay_state = self._state
+        self._state = REASONING
+        self._buffer = rest
+
+    def _end_reasoning(self):
+        # Whatever was held before the end of a reasoning block was reasoning too
+        self._held = []
+        self._after_reasoning = False
+        self._replay = [self._buffer]
+        self._state = self._output_state()
+        self._replay_state = self._state
+
+    def _visible(self, text):
+        # The answer starts at its first non-blank character
+        if not self._started:
+            text = text.lstrip()
+            self._started = bool(text)
+        return text
+
+    def _process(self, final):
+        output = []
+        while True:
+            start = None if self._ignore_start_markers else _START_MARKER_PATTERN.search(self._buffer)
+            if self._state == ANSWER:
+                if start is None:
+                    break
+                # Show the answer up to the marker, then drop the reasoning block
+                rest = self._buffer[start.end():]
+                self._buffer = self._buffer[:start.start()]
+                output.append(self._drain_answer(final=True))
+                self._start_reasoning(rest)
+                continue
+
+            end = _END_MARKER_PATTERN.search(self._buffer)
+            if self._state == PREAMBLE and start is not None and (end is None or start.start() < end.start()):
+                self._start_reasoning(self._buffer[start.end():])
+                continue
+            if end is not None:
+                self._buffer = self._buffer[end.end():]
+                self._end_reasoning()
+                continue
+
+            if self._state == REASONING:
+                # Nothing to show yet; keep only what may be the start of a split end marker
+                self._buffer = "" if final else self._buffer[-_MARKER_TAIL:]
+                return "".join(output)
+
+            lines = self._buffer.split("\n")
+            self._buffer = lines.pop()
+            if final:
+                lines.append(self._buffer)
+                self._buffer = ""
+            for number, line in enumerate(lines):
+                self._preamble_line(_MARKER_PATTERN.sub("", line))
+                if self._state == ANSWER:
+                    # Lines after the first answer line go through the answer filter
+                    rest = lines[number + 1:]
+                    if rest or not final:
+                        rest.append(self._buffer)
+                    self._buffer = "\n".join(rest)
+                    output.append("\n".join(self._held))
+                    if rest:
+                        output.append("\n")
+                    self._held = []
+                    break
+            else:
+                if final and self._held:
+                    # End of output without an answer-like line: keep what was held
+                    output.append("\n".join(self._held))
+                return "".join(output)
+
+        output.append(self._drain_answer(final))
+        return "".join(output)
+
+    def _preamble_line(self, line):
+        stripped = line.strip()
+        if not stripped:
+            return
+        kinds = classify_line(stripped)
+        if 'echo' in kinds:
+            return
+        if 'answer' in kinds:
+            self._held.append(line)
+            self._state = ANSWER
+        elif 'reasoning' in kinds:
+            self._after_reasoning = True
+        elif not self._after_reasoning:
+            self._held.append(line)
+
+    def _drain_answer(self, final):
+        text = self._buffer
+        self._buffer = ""
+        if not final:
+            # Keep back a possible partial marker such as "</thi"
+            tail = text.rfind("<", max(0, len(text) - _MARKER_TAIL))
+            if tail != -1:
+                text, self._buffer = text[:tail], text[tail:]
+        text = _MARKER_PATTERN.sub("", text)
+
+        output = []
+        lines = text.split("\n")
+        for number, line in enumerate(lines):
+            is_last = number == len(lines) - 1
+            if is_last and not final:
+                self._partial(line, output)
+                break
+
+            if self._line_shown:
+                # Rest of a line that is already on screen
+                self._line_shown = False
+            elif self.filter_lines and 'echo' in classify_line(line.strip()):
+                continue
+            output.append(line)
+            if not is_last:
+                output.append("\n")
+        return "".join(output)
+
+    def _partial(self, line, output):
+        if self._line_shown:
+            output.append(line)
+        elif not self.filter_lines or (len(line) >= _MIN_PARTIAL_LINE and 'echo' not in classify_line(line)):
+            self._line_shown = True
+            output.append(line)
+        else:
+            # Could still be an instruction echo: wait for the rest of the line
+            self._buffer = line + self._buffer
+
+
+def strip_reasoning(text, expect_reasoning_block=False, filter_lines=True):
+    """
+    Clean a complete LLM response in one pass.
+
+    When the response contains a reasoning end marker, everything before
+    the last one is reasoning. If less than MIN_ANSWER_LENGTH characters
+    of answer remain, ReasoningStripper.fallback() is used instead.
+
+    Args:
+        text (str): Raw LLM response
+        expect_reasoning_block (bool): See ReasoningStripper
+        filter_lines (bool): See ReasoningStripper
+
+    Returns:
+        str: The answer
+    """
+    last_end = None
+    for last_end in _END_MARKER_PATTERN.finditer(text):
+        pass
+
+    stripper = ReasoningStripper(expect_reasoning_block, filter_lines)
+    if last_end is not None:
+        stripper.skip_reasoning(text[:last_end.end()])
+        text = text[last_end.end():]
+
+    answer = (stripper.feed(text) + stripper.finish()).strip()
+    if len(answer) < MIN_ANSWER_LENGTH:
+        answer = stripper.fallback() or answer
+    return answer
@@ -5,26 +5,33 @@ This module provides functionality to audit solution designs against
 architecture standards and ADRs stored in the FAISS knowledge base.
 """
 
-import os
-from brain import load_faiss_index, invoke_llm
+from brain import load_faiss_index, invoke_llm, search_by_vectors, priority_adr_hits, has_adr_index
 import config
+import reasoning
 
+# Query used to find standards documents for audit aspect discovery
+STANDARDS_QUERY = "enterprise architecture standards compliance requirements governance policies"
 
-def discover_audit_aspects_from_standards():
+
+def discover_audit_aspects_from_standards(standards_docs=None):
     """
     Auto-discover audit aspects from enterprise standards documents.
     Uses LLM to extract key compliance areas from the knowledge base.
     
+    Args:
+        standards_docs (list, optional): Documents already retrieved for STANDARDS_QUERY.
+                                         If None, they are searched here.
+    
     Returns:
         list: List of discovered audit aspects
     """
     try:
-        # Load FAISS index
-        vectorstore = load_faiss_index()
-        
-        # Search for standards and compliance-related documents
-        query = "enterprise architecture standards compliance requirements governance policies"
-        standards_docs = vectorstore.similarity_search(query, k=10)
+        if standards_docs is None:
+            # Load FAISS index
+            vectorstore = load_faiss_index()
+            
+            # Search for standards and compliance-related documents
+            standards_docs = vectorstore.similarity_search(STANDARDS_QUERY, k=10)
         
         if not standards_docs:
             return []
@@ -61,13 +68,16 @@ Audit aspects:"""
         return []
 
 
-def get_hybrid_audit_aspects():
+def get_hybrid_audit_aspects(standards_docs=None):
     """
     Get audit aspects using hybrid approach:
     1. Start with configured aspects from config.env
     2. Add auto-discovered aspects from standards documents
     3. Deduplicate and return combined list
     
+    Args:
+        standards_docs (list, optional): Pre-fetched standards documents for discovery
+    
     Returns:
         list: Combined list of audit aspects
     """
@@ -75,7 +85,7 @@ def get_hybrid_audit_aspects():
     configured_aspects = config.AUDIT_ASPECTS
     
     # Get auto-discovered aspects
-    discovered_aspects = discover_audit_aspects_from_standards()
+    discovered_aspects = discover_audit_aspects_from_standards(standards_docs)
     
     # Combine and deduplicate (case-insensitive)
     all_aspects = []
@@ -108,32 +118,35 @@ def run_audit(design_text):
     Returns:
         str: Markdown table with audit results (Feature, Compliance, Required Action)
     """
-    # Load FAISS index if not already loaded
-    vectorstore = load_faiss_index()
-    
-    # Retrieve relevant standards and ADRs from FAISS
+    # Retrieve relevant standards and ADRs from FAISS, together with the
+    # standards used for audit aspect discovery, in one batched search
     # Use higher k value to get comprehensive coverage of standards
+    # Only search the configured document types (e.g. standards and ADRs)
     k = 15
-    relevant_docs = vectorstore.similarity_search(design_text, k=k)
-    
-    # Filter to prioritize configured priority ADRs
+    filters = {'doc_type': config.AUDIT_DOC_TYPES} if config.AUDIT_DOC_TYPES else None
+    vectorstore = load_faiss_index()
+    design_vector, standards_vector = vectorstore.embedding_function.embed_queries([design_text, STANDARDS_QUERY])
+    design_hits, standards_hits = search_by_vectors([design_vector, standards_vector], k, vectorstore, filters)
+    relevant_docs = [doc for doc, score in design_hits]
+    standards_docs = [doc for doc, score in standards_hits[:10]]
+    
+    # Add the chunk of each configured priority ADR that best matches the
+    # design, from the ADR-id index built at ingest time, so every priority
+    # ADR is in context whether or not it made the top k
+    use_adr_index = has_adr_index()
     priority_adrs = []
-    other_standards = []
-    
-    priority_adr_list = config.PRIORITY_ADRS
+    if use_adr_index:
+        priority_adrs = [doc for doc, score in priority_adr_hits(design_vector, vectorstore, filters=filters)]
+    priority_contents = {doc.page_content for doc in priority_adrs}
     
+    other_standards = []
     for doc in relevant_docs:
-        content = doc.page_content
-        source = doc.metadata.get("source", "")
-        
-        # Check if document matches any priority ADR
-        is_priority = False
-        for adr in priority_adr_list:
-            if adr in content or adr in source:
-                is_priority = True
-                break
+        if doc.page_content in priority_contents:
+            continue
         
-        if is_priority:
+        # Indexes built before the ADR-id index: check the hits instead
+        source = doc.metadata.get("source", "")
+        if not use_adr_index and any(adr in doc.page_content or adr in source for adr in config.PRIORITY_ADRS):
             priority_adrs.append(doc)
         else:
             other_standards.append(doc)
@@ -145,7 +158,7 @@ def run_audit(design_text):
     standards_context = "\n\n".join([doc.page_content for doc in combined_docs])
     
     # Get audit aspects using hybrid approach (configured + auto-discovered)
-    audit_aspects = get_hybrid_audit_aspects()
+    audit_aspects = get_hybrid_audit_aspects(standards_docs)
     
     # Construct the audit prompt
     priority_adrs_text = ", ".join(config.PRIORITY_ADRS) if config.PRIORITY_ADRS else "key ADRs"
@@ -210,6 +223,9 @@ def _clean_audit_output(raw_output):
     if not raw_output:
         return "| Feature | Compliance | Required Action |\n|---------|------------|------------------|\n| Error | ❌ Non-Compliant | Audit failed to generate results |"
     
+    # Drop reasoning blocks first, so a draft table inside <think> is never picked
+    raw_output = reasoning.strip_reasoning(raw_output, filter_lines=False)
+    
     lines = raw_output.strip().split('\n')
     table_lines = []
     in_table = False
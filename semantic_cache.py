@@ -0,0 +1,166 @@
+"""
+Semantic Answer Cache Module
+
+Reuse answers for paraphrased questions. Past questions are kept in a
+small in-process FAISS index; a new question is answered from the cache
+when its embedding is within SEMANTIC_CACHE_DISTANCE of a cached one and
+retrieval returned the same set of source chunks for both, so the LLM
+would have seen the same context.
+
+The cache is per process, bounded to SEMANTIC_CACHE_SIZE questions
+(oldest dropped first) and cleared when a new index generation is loaded.
+"""
+
+import os
+import threading
+import time
+from collections import OrderedDict
+import faiss
+import numpy as np
+
+# Nearest cached questions checked for a matching source set
+CANDIDATES = 4
+
+
+def cache_enabled():
+    """Check whether the semantic answer cache is on (SEMANTIC_CACHE env var, default: false)"""
+    return os.getenv('SEMANTIC_CACHE', 'false').lower() in ('1', 'true', 'yes')
+
+
+def get_max_distance():
+    """
+    Get the largest squared L2 distance between question embeddings that
+    still counts as the same question (SEMANTIC_CACHE_DISTANCE, default: 0.1).
+    """
+    return float(os.getenv('SEMANTIC_CACHE_DISTANCE', '0.1'))
+
+
+def source_key(docs):
+    """
+    Identify the set of chunks an answer was built from.
+
+    Args:
+        docs (list): Retrieved Documents
+
+    Returns:
+        frozenset: Chunk ids (content for chunks without an id)
+    """
+    return frozenset(doc.id or doc.page_content for doc in docs)
+
+
+class SemanticCache:
+    """
+    FAISS index of past question embeddings with their answers.
+
+    Safe to share between threads.
+    """
+
+    def __init__(self, max_entries=None, max_distance=None):
+        self.max_entries = max_entries or int(os.getenv('SEMANTIC_CACHE_SIZE', '500'))
+        self.max_distance = max_distance if max_distance is not None else get_max_distance()
+        self.hits = 0
+        self.misses = 0
+
+        self._lock = threading.Lock()
+        self._index = None
+        self._entries = OrderedDict()
+        self._next_id = 0
+        self._generation = None
+
+    def lookup(self, query_vector, sources_key, generation):
+        """
+        Find a cached answer for a near-duplicate question.
+
+        Args:
+            query_vector (list[float]): Embedded question
+            sources_key (frozenset): source_key() of the chunks retrieved for it
+            generation (int): Knowledge-base generation the chunks came from
+
+        Returns:
+            tuple: (answer, sources) from the cache, or None
+        """
+        query = np.array([query_vector], dtype=np.float32)
+        with self._lock:
+            if self._generation != generation or self._index is None or not self._entries:
+                self.misses += 1
+                return None
+
+            distances, ids = self._index.search(query, min(CANDIDATES, len(self._entries)))
+            for distance, entry_id in zip(distances[0], ids[0]):
+                if entry_id == -1 or distance > self.max_distance:
+                    break
+                entry = self._entries[int(entry_id)]
+                if entry['sources_key'] == sources_key:
+                    self.hits += 1
+                    return entry['answer'], [dict(source) for source in entry['sources']]
+
+            self.misses += 1
+            return None
+
+    def store(self, query_vector, question, sources_key, generation, answer, sources):
+        """
+        Remember an answer.
+
+        Args:
+            query_vector (list[float]): Embedded question
+            question (str): The question, kept for debugging
+            sources_key (frozenset): source_key() of the chunks the answer was built from
+            generation (int): Knowledge-base generation the chunks came from
+            answer (str): The LLM's cleaned answer
+            sources (list[dict]): Source metadata returned with the answer
+        """
+        vector = np.array([query_vector], dtype=np.float32)
+        with self._lock:
+            if self._index is None or self._generation != generation or self._index.d != vector.shape[1]:
+                # New knowledge-base generation: old answers may cite removed content
+                self._index = faiss.IndexIDMap2(faiss.IndexFlatL2(vector.shape[1]))
+                self._entries.clear()
+                self._generation = generation
+
+            entry_id = self._next_id
+            self._next_id += 1
+            self._index.add_with_ids(vector, np.array([entry_id], dtype=np.int64))
+            self._entries[entry_id] = {
+                'question': question,
+                'sources_key': sources_key,
+                'answer': answer,
+                'sources': [dict(source) for source in sources],
+                'created': time.time()
+            }
+
+            while len(self._entries) > self.max_entries:
+                oldest_id, _ = self._entries.popitem(last=False)
+                self._index.remove_ids(np.array([oldest_id], dtype=np.int64))
+
+    def stats(self):
+        """Get hit/miss counters and the number of cached questions"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+                'entries': len(self._entries)
+            }
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_cache():
+    """
+    Get the process-wide semantic cache.
+
+    Returns:
+        SemanticCache: The cache, or None when SEMANTIC_CACHE is off
+    """
+    global _cache
+
+    if not cache_enabled():
+        return None
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = SemanticCache()
+    return _cache
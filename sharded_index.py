@@ -0,0 +1,303 @@
+"""
+Sharded Index Module
+
+Search several FAISS index shards as one knowledge base.
+
+ingest.py writes one shard per source: 'docs' for the local docs/ folder
+and 'confluence-<space>' for each Confluence space, so syncing a space
+only rewrites that space's shard. Queries fan out to all shards in
+parallel threads (FAISS and SQLite release the GIL) and the per-shard
+top-k lists are merged by distance before any chunk text is read.
+"""
+
+import os
+import heapq
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+import chunk_store
+import index_store
+import keyword_index
+
+
+def get_search_workers():
+    """Get the shard fan-out thread count from SHARD_SEARCH_WORKERS (default: CPU count)"""
+    return int(os.getenv('SHARD_SEARCH_WORKERS', str(os.cpu_count() or 4)))
+
+
+class IndexShard:
+    """
+    One FAISS index folder: vectors, chunk store and keyword index.
+    """
+
+    def __init__(self, name, vectorstore, keyword_idx=None):
+        self.name = name
+        self.vectorstore = vectorstore
+        self.keyword_index = keyword_idx
+
+    def search(self, query_vectors, k, filters=None):
+        """
+        Vector search in this shard, without reading chunk text.
+
+        Returns:
+            list[list[tuple]]: For each query, (L2 distance, FAISS id) pairs, best first
+        """
+        id_bitmap = None
+        if filters:
+            id_bitmap = index_store.filter_bitmap(self.vectorstore, filters)
+            if not id_bitmap.any():
+                return [[] for _ in range(len(query_vectors))]
+
+        distances, faiss_ids = index_store.search_vectors(self.vectorstore.index, query_vectors, k, id_bitmap)
+        return [
+            [(float(distance), int(faiss_id)) for distance, faiss_id in zip(row_distances, row_ids) if faiss_id != -1]
+            for row_distances, row_ids in zip(distances, faiss_ids)
+        ]
+
+    def documents(self, faiss_ids):
+        """Read the Documents for FAISS ids of this shard, keyed by FAISS id"""
+        if not faiss_ids:
+            return {}
+        return index_store.get_documents(self.vectorstore, faiss_ids)
+
+    def keyword_search(self, question, k, filters=None, query_vector=None):
+        """
+        BM25 search in this shard.
+
+        Returns:
+            list[tuple]: (Document, BM25 score, L2 distance or None), best first
+        """
+        if self.keyword_index is None:
+            return []
+
+        allowed = None
+        if filters:
+            id_bitmap = index_store.filter_bitmap(self.vectorstore, filters)
+            allowed = lambda faiss_id: chunk_store.bitmap_contains(id_bitmap, faiss_id)
+
+        hits = self.keyword_index.search(question, k=k, allowed=allowed)
+        docs_by_id = index_store.get_documents(self.vectorstore, [faiss_id for faiss_id, score in hits])
+        return [
+            (docs_by_id[faiss_id], score, self.distance_to(faiss_id, query_vector))
+            for faiss_id, score in hits
+            if faiss_id in docs_by_id
+        ]
+
+    def adr_documents(self, adr_id, filters=None, query_vector=None):
+        """
+        Chunks of an ADR from the ADR-id index.
+
+        Returns:
+            list[tuple]: (Document, L2 distance or None) in index order
+        """
+        if self.keyword_index is None:
+            return []
+
+        faiss_ids = self.keyword_index.chunks_for_adr(adr_id)
+        if filters:
+            id_bitmap = index_store.filter_bitmap(self.vectorstore, filters)
+            faiss_ids = [faiss_id for faiss_id in faiss_ids if chunk_store.bitmap_contains(id_bitmap, faiss_id)]
+
+        docs_by_id = index_store.get_documents(self.vectorstore, faiss_ids)
+        return [
+            (docs_by_id[faiss_id], self.distance_to(faiss_id, query_vector))
+            for faiss_id in faiss_ids
+            if faiss_id in docs_by_id
+        ]
+
+    def adr_hits(self, adr_id, k=1, filters=None, query_vector=None):
+        """
+        The chunks of an ADR closest to a query, from the ADR-id index.
+
+        Distances are computed from the stored vectors of every chunk of the
+        ADR, and only the k closest chunks are read from the chunk store.
+
+        Returns:
+            list[tuple]: Up to k (Document, L2 distance or None), best first.
+            Without distances the ADR's first chunks in index order are kept.
+        """
+        if self.keyword_index is None:
+            return []
+
+        faiss_ids = self.keyword_index.chunks_for_adr(adr_id)
+        if filters:
+            id_bitmap = index_store.filter_bitmap(self.vectorstore, filters)
+            faiss_ids = [faiss_id for faiss_id in faiss_ids if chunk_store.bitmap_contains(id_bitmap, faiss_id)]
+        if not faiss_ids:
+            return []
+
+        distances = [None] * len(faiss_ids)
+        stored = index_store.reconstruct_vectors(self.vectorstore.index, faiss_ids) if query_vector is not None else None
+        if stored is not None:
+            distances = np.sum((stored - np.asarray(query_vector, dtype=np.float32)) ** 2, axis=1).tolist()
+            best = heapq.nsmallest(k, zip(distances, faiss_ids))
+        else:
+            best = list(zip(distances, faiss_ids))[:k]
+
+        docs_by_id = index_store.get_documents(self.vectorstore, [faiss_id for distance, faiss_id in best])
+        return [(docs_by_id[faiss_id], distance) for distance, faiss_id in best if faiss_id in docs_by_id]
+
+    def distance_to(self, faiss_id, query_vector):
+        """L2 distance between a query and a stored vector, or None if it can't be reconstructed"""
+        if query_vector is None:
+            return None
+        stored = index_store.reconstruct_vector(self.vectorstore.index, faiss_id)
+        if stored is None:
+            return None
+        return float(np.sum((np.asarray(query_vector, dtype=np.float32) - stored) ** 2))
+
+
+class ShardedIndex:
+    """
+    Knowledge base made of several IndexShards, searched in parallel.
+
+    Offers the similarity_search methods of LangChain's FAISS wrapper so
+    existing callers keep working.
+    """
+
+    def __init__(self, shards, embeddings, max_workers=None, generation=0):
+        self.shards = list(shards)
+        self.embedding_function = embeddings
+        self.generation = generation
+        workers = min(len(self.shards), max_workers or get_search_workers())
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='shard-search') if workers > 1 else None
+
+    @property
+    def has_keyword_index(self):
+        """True if every shard has BM25 postings and an ADR-id index"""
+        return bool(self.shards) and all(shard.keyword_index is not None for shard in self.shards)
+
+    def _fan_out(self, fn):
+        executor = self._executor
+        if executor is not None:
+            try:
+                futures = [executor.submit(fn, shard) for shard in self.shards]
+            except RuntimeError:
+                # Closed by a swap while this query was running
+                executor = None
+        if executor is None:
+            return [fn(shard) for shard in self.shards]
+        return [future.result() for future in futures]
+
+    def close(self):
+        """
+        Stop the fan-out threads once this index has been swapped out.
+
+        Searches already running finish; later ones on this object search
+        the shards one after another.
+        """
+        executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False)
+
+    def search_by_vectors(self, query_vectors, k=6, filters=None):
+        """
+        Search all shards and merge the per-shard top-k by distance.
+
+        Args:
+            query_vectors (list[list[float]]): Embedded queries
+            k (int): Hits per query
+            filters (dict, optional): Metadata filters (see chunk_store.FILTER_KEYS)
+
+        Returns:
+            list[list[tuple]]: For each query, (Document, L2 distance) pairs, best first
+        """
+        query_vectors = np.array(query_vectors, dtype=np.float32)
+        per_shard = self._fan_out(lambda shard: shard.search(query_vectors, k, filters))
+
+        # Merge (distance, shard, FAISS id) first so only the final top k are read
+        merged = []
+        for query_number in range(len(query_vectors)):
+            hits = (
+                (distance, shard_number, faiss_id)
+                for shard_number, shard_hits in enumerate(per_shard)
+                for distance, faiss_id in shard_hits[query_number]
+            )
+            merged.append(heapq.nsmallest(k, hits))
+
+        wanted = {shard.name: set() for shard in self.shards}
+        for hits in merged:
+            for distance, shard_number, faiss_id in hits:
+                wanted[self.shards[shard_number].name].add(faiss_id)
+        docs_by_shard = self._fan_out(lambda shard: shard.documents(wanted[shard.name]))
+
+        return [
+            [
+                (docs_by_shard[shard_number][faiss_id], distance)
+                for distance, shard_number, faiss_id in hits
+                if faiss_id in docs_by_shard[shard_number]
+            ]
+            for hits in merged
+        ]
+
+    def keyword_search(self, question, k=6, filters=None, query_vector=None):
+        """
+        BM25 search across all shards.
+
+        Returns:
+            list[tuple]: (Document, BM25 score, L2 distance or None), best first
+        """
+        per_shard = self._fan_out(lambda shard: shard.keyword_search(question, k, filters, query_vector))
+        hits = [hit for shard_hits in per_shard for hit in shard_hits]
+        return heapq.nlargest(k, hits, key=lambda hit: hit[1])
+
+    def adr_documents(self, adr_id, filters=None, query_vector=None):
+        """
+        Chunks of an ADR from every shard's ADR-id index.
+
+        Returns:
+            list[tuple]: (Document, L2 distance or None)
+        """
+        return [hit for shard in self.shards for hit in shard.adr_documents(adr_id, filters, query_vector)]
+
+    def adr_hits(self, adr_id, k=1, filters=None, query_vector=None):
+        """
+        The chunks of an ADR closest to a query, across all shards.
+
+        Returns:
+            list[tuple]: Up to k (Document, L2 distance or None), best first
+        """
+        per_shard = self._fan_out(lambda shard: shard.adr_hits(adr_id, k, filters, query_vector))
+        hits = [hit for shard_hits in per_shard for hit in shard_hits]
+        return heapq.nsmallest(k, hits, key=lambda hit: hit[1] if hit[1] is not None else float('inf'))
+
+    def adr_id_known(self, adr_id):
+        """Check whether any shard's keyword index has postings for an ADR id"""
+        return any(shard.keyword_index is not None and shard.keyword_index.postings(adr_id) for shard in self.shards)
+
+    def similarity_search_with_score(self, query, k=4, filters=None):
+        """Embed a query and return (Document, L2 distance) pairs, best first"""
+        query_vector = self.embedding_function.embed_query(query)
+        return self.search_by_vectors([query_vector], k, filters)[0]
+
+    def similarity_search(self, query, k=4, filters=None):
+        """Embed a query and return the k most similar Documents"""
+        return [doc for doc, score in self.similarity_search_with_score(query, k, filters)]
+
+
+def load_sharded_index(index_path, embeddings, use_mmap=False):
+    """
+    Load every shard of the live index generation.
+
+    An index written before generations is loaded from index_path itself,
+    and one written before sharding (index.faiss at the top level) as a
+    single shard named 'default'.
+
+    Args:
+        index_path (str): Path to the FAISS index folder
+        embeddings (Embeddings): Embeddings used to vectorize queries
+        use_mmap (bool): Memory-map the shards read-only
+
+    Returns:
+        ShardedIndex: The loaded knowledge base
+    """
+    generation, generation_path = index_store.resolve_index_path(index_path)
+
+    shards = []
+    for name, shard_path in index_store.list_shards(generation_path):
+        vectorstore = index_store.load_index(shard_path, embeddings, use_mmap=use_mmap)
+        shards.append(IndexShard(name, vectorstore, keyword_index.open_keyword_index(shard_path)))
+
+    if not shards:
+        raise FileNotFoundError(f"No FAISS index shards found in: {generation_path}. Please run ingest.py first.")
+
+    return ShardedIndex(shards, embeddings, generation=generation)
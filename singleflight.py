@@ -0,0 +1,152 @@
+"""
+Single-Flight Module
+
+Coalesce identical concurrent requests. The first caller for a key runs
+the request; callers arriving while it is in flight wait on the same
+future and share its result (or exception). Once the request finishes
+the key is forgotten, so later callers run it again (or hit a cache).
+
+Futures are concurrent.futures.Future objects, so threads wait with
+result() and coroutines with asyncio.wrap_future().
+"""
+
+import asyncio
+import threading
+from concurrent.futures import Future
+
+
+class Abandoned(Exception):
+    """The leader stopped before finishing (e.g. a stream closed early); followers must run the request themselves"""
+
+
+class Group:
+    """
+    In-flight requests by key.
+
+    Safe to share between threads.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._flights = {}
+        self.coalesced = 0
+
+    def join(self, key):
+        """
+        Join the request for key, becoming its leader if none is in flight.
+
+        A leader must call finish() exactly once.
+
+        Returns:
+            tuple[Future, bool]: The shared future, and whether the caller leads
+        """
+        with self._lock:
+            future = self._flights.get(key)
+            if future is not None:
+                self.coalesced += 1
+                return future, False
+            future = Future()
+            self._flights[key] = future
+            return future, True
+
+    def finish(self, key, result=None, error=None):
+        """Publish the leader's result (or error) to the followers and forget key"""
+        with self._lock:
+            future = self._flights.pop(key)
+        if error is not None:
+            future.set_exception(error)
+        else:
+            future.set_result(result)
+
+    def do(self, key, func):
+        """
+        Run func once for all concurrent callers with the same key.
+
+        Args:
+            key (hashable): Identity of the request
+            func (callable): The request
+
+        Returns:
+            What func returns, to every caller
+        """
+        while True:
+            future, leader = self.join(key)
+            if leader:
+                break
+            try:
+                return future.result()
+            except Abandoned:
+                continue
+
+        try:
+            result = func()
+        except BaseException as e:
+            self._abort(key, e)
+            raise
+        self.finish(key, result)
+        return result
+
+    async def do_async(self, key, func):
+        """
+        Async variant of do(). Coroutines and threads share flights.
+
+        Args:
+            key (hashable): Identity of the request
+            func (callable): Returns the awaitable request
+
+        Returns:
+            What the awaitable returns, to every caller
+        """
+        while True:
+            future, leader = self.join(key)
+            if leader:
+                break
+            try:
+                # shield: a cancelled follower must not cancel the shared future
+                return await asyncio.shield(asyncio.wrap_future(future))
+            except Abandoned:
+                continue
+
+        try:
+            result = await func()
+        except BaseException as e:
+            self._abort(key, e)
+            raise
+        self.finish(key, result)
+        return result
+
+    def stream(self, key, open_stream):
+        """
+        Coalesce a text stream. The leader's chunks are passed through as
+        they arrive; followers get the whole text as one chunk when it is done.
+
+        Args:
+            key (hashable): Identity of the request
+            open_stream (callable): Returns the chunk generator
+
+        Yields:
+            str: Text chunks
+        """
+        while True:
+            future, leader = self.join(key)
+            if leader:
+                break
+            try:
+                yield future.result()
+                return
+            except Abandoned:
+                continue
+
+        parts = []
+        try:
+            for chunk in open_stream():
+                parts.append(chunk)
+                yield chunk
+        except BaseException as e:
+            self._abort(key, e)
+            raise
+        self.finish(key, "".join(parts))
+
+    def _abort(self, key, error):
+        # Errors are shared; cancellation or a closed generator only abandons the flight
+        self.finish(key, error=error if isinstance(error, Exception) else Abandoned())
@@ -0,0 +1,79 @@
+"""
+Tests for planning incremental docs ingest from the file manifest (doc_manifest, ingest._plan_update)
+"""
+
+import os
+import doc_manifest
+import ingest
+
+
+def _write(path, text, mtime_ns=None):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(text, encoding='utf-8')
+    if mtime_ns is not None:
+        os.utime(path, ns=(mtime_ns, mtime_ns))
+
+
+def _manifest_of(docs_path):
+    """Build the manifest a full ingest of docs_path would save"""
+    files = doc_manifest.scan_files(str(docs_path))
+    entries = {}
+    documents = {relative: ingest._load_file(stat['path']) for relative, stat in files.items()}
+    ingest._split_files(documents, files, entries)
+    return {'files': entries}
+
+
+def test_scan_skips_hidden_and_other_files(tmp_path):
+    _write(tmp_path / 'adr' / 'ADR-001.md', "# ADR-001")
+    _write(tmp_path / 'notes.txt', "not markdown")
+    _write(tmp_path / '.draft.md', "hidden file")
+    _write(tmp_path / '.git' / 'README.md', "hidden folder")
+
+    assert list(doc_manifest.scan_files(str(tmp_path))) == ['adr/ADR-001.md']
+
+
+def test_plan_finds_added_modified_and_deleted_files(tmp_path):
+    _write(tmp_path / 'kept.md', "# Kept")
+    _write(tmp_path / 'edited.md', "# Edited")
+    _write(tmp_path / 'removed.md', "# Removed")
+    manifest = _manifest_of(tmp_path)
+    known = manifest['files']
+
+    _write(tmp_path / 'edited.md', "# Edited\n\nWith a new section.", mtime_ns=known['edited.md']['mtime_ns'] + 10**9)
+    (tmp_path / 'removed.md').unlink()
+    _write(tmp_path / 'new' / 'added.md', "# Added")
+
+    entries, stale_ids, changed_docs = ingest._plan_update(manifest, doc_manifest.scan_files(str(tmp_path)))
+
+    assert entries == {'kept.md': known['kept.md']}
+    assert sorted(stale_ids) == sorted(known['edited.md']['chunk_ids'] + known['removed.md']['chunk_ids'])
+    assert sorted(changed_docs) == ['edited.md', 'new/added.md']
+    assert changed_docs['edited.md'].page_content == "# Edited\n\nWith a new section."
+
+
+def test_touched_file_with_same_content_is_not_reindexed(tmp_path):
+    _write(tmp_path / 'touched.md', "# Touched")
+    manifest = _manifest_of(tmp_path)
+    entry = manifest['files']['touched.md']
+
+    # A checkout or copy gives the file a new mtime, but the content hash matches
+    _write(tmp_path / 'touched.md', "# Touched", mtime_ns=entry['mtime_ns'] + 10**9)
+    files = doc_manifest.scan_files(str(tmp_path))
+    assert doc_manifest.compare(manifest, files) == ([], ['touched.md'], [], [])
+
+    entries, stale_ids, changed_docs = ingest._plan_update(manifest, files)
+
+    assert entries == {'touched.md': entry}
+    assert stale_ids == []
+    assert changed_docs == {}
+
+
+def test_unchanged_docs_need_no_update(tmp_path):
+    _write(tmp_path / 'a.md', "# A")
+    _write(tmp_path / 'b.md', "# B")
+    manifest = _manifest_of(tmp_path)
+
+    entries, stale_ids, changed_docs = ingest._plan_update(manifest, doc_manifest.scan_files(str(tmp_path)))
+
+    assert entries == manifest['files']
+    assert not stale_ids and not changed_docs
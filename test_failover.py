@@ -0,0 +1,69 @@
+"""
+Tests for hedging and failover across LLM targets (failover)
+"""
+
+import asyncio
+import time
+import pytest
+import failover
+
+HEDGE_DELAY = 0.5
+TARGETS = [('primary', 'm'), ('hedge', 'm'), ('fallback', 'm')]
+
+
+@pytest.fixture(autouse=True)
+def fresh_health(monkeypatch):
+    monkeypatch.setenv('LLM_HEDGE_DELAY_SECONDS', str(HEDGE_DELAY))
+    monkeypatch.setattr(failover, '_health', {})
+
+
+def test_failed_hedge_fails_over_without_waiting_again(capsys):
+    def call(provider, model_name):
+        if provider == 'primary':
+            time.sleep(3 * HEDGE_DELAY)
+        if provider == 'hedge':
+            raise RuntimeError("hedge down")
+        return provider
+
+    started = time.monotonic()
+    assert failover.invoke(TARGETS, call) == 'fallback'
+
+    # One hedge delay for the slow primary, none after the hedge failed
+    assert time.monotonic() - started < 2 * HEDGE_DELAY
+    output = capsys.readouterr().out
+    assert "primary:m is slow" in output and "hedge:m is slow" not in output
+
+
+def test_failed_async_hedge_fails_over_without_waiting_again():
+    async def call(provider, model_name):
+        if provider == 'primary':
+            await asyncio.sleep(3 * HEDGE_DELAY)
+        if provider == 'hedge':
+            raise RuntimeError("hedge down")
+        return provider
+
+    started = time.monotonic()
+    assert asyncio.run(failover.invoke_async(TARGETS, call)) == 'fallback'
+    assert time.monotonic() - started < 2 * HEDGE_DELAY
+
+
+def test_failed_stream_hedge_fails_over_without_waiting_again():
+    def open_stream(provider, model_name):
+        if provider == 'primary':
+            time.sleep(3 * HEDGE_DELAY)
+        if provider == 'hedge':
+            raise RuntimeError("hedge down")
+        yield provider
+        yield " answer"
+
+    started = time.monotonic()
+    assert list(failover.stream(TARGETS, open_stream)) == ['fallback', " answer"]
+    assert time.monotonic() - started < 2 * HEDGE_DELAY
+
+
+def test_every_target_failing_raises_the_last_error():
+    def call(provider, model_name):
+        raise RuntimeError(f"{provider} down")
+
+    with pytest.raises(RuntimeError, match="fallback down"):
+        failover.invoke(TARGETS, call)
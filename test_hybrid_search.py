@@ -0,0 +1,86 @@
+"""
+Tests for hybrid BM25 + vector retrieval of named ADRs (brain.hybrid_search, keyword_index)
+"""
+
+import pytest
+from langchain_community.embeddings import DeterministicFakeEmbedding
+from langchain_core.documents import Document
+import brain
+import index_store
+import keyword_index
+import sharded_index
+
+CHUNKS = [
+    ("ADR-007: Customer data of Hong Kong users stays in ap-east-1.", 'docs/ADR-007-Data-Residency-HK.md'),
+    ("ADR-008: Services authenticate users with OIDC and authorize with scopes.", 'docs/ADR-008-Auth-N-Auth-Z.md'),
+    ("ADR-008 also requires mTLS between internal services.", 'docs/ADR-008-Auth-N-Auth-Z.md'),
+    ("Containers run on AWS Fargate unless an ADR says otherwise.", 'docs/adr_fargate.md'),
+    ("ADR-006: Services publish domain events to EventBridge.", 'docs/ADR-006-Event-Driven-Architecture.md'),
+    ("Security policy: encrypt all data at rest with KMS keys.", 'docs/security_policy.md'),
+]
+
+
+@pytest.fixture
+def knowledge_base(tmp_path):
+    embeddings = DeterministicFakeEmbedding(size=64)
+    documents = [Document(page_content=text, metadata={'source': source}) for text, source in CHUNKS]
+    vectorstore, meta = index_store.build_vectorstore(documents, embeddings, 'flat', [f"id-{i}" for i in range(len(CHUNKS))])
+    index_store.save_index(vectorstore, index_store.shard_path(str(tmp_path), index_store.DOCS_SHARD), meta)
+    return sharded_index.load_sharded_index(str(tmp_path), embeddings)
+
+
+def test_adr_ids_are_not_split_into_common_parts():
+    terms = keyword_index.tokenize("What does ADR-007 say about ap-east-1?")
+
+    assert 'adr-007' in terms and 'ap-east-1' in terms
+    assert 'adr' not in terms and '007' not in terms and '1' not in terms
+    assert 'east' in terms
+
+
+@pytest.mark.parametrize('question', [
+    "What does ADR-007 say?",
+    "Which region does adr-007 require?",
+])
+def test_named_adr_comes_first(knowledge_base, question):
+    hits = brain.hybrid_search(question, k=6, vectorstore=knowledge_base)
+
+    assert len(hits) == brain.EXACT_MATCH_K
+    assert hits[0][0].metadata['source'].endswith('ADR-007-Data-Residency-HK.md')
+    assert hits[0][1] is not None
+
+
+def test_every_named_adr_is_returned(knowledge_base):
+    hits = brain.hybrid_search("Compare ADR-006 and ADR-007", k=6, vectorstore=knowledge_base)
+    sources = [doc.metadata['source'] for doc, distance in hits]
+
+    assert any(source.endswith('ADR-006-Event-Driven-Architecture.md') for source in sources[:2])
+    assert any(source.endswith('ADR-007-Data-Residency-HK.md') for source in sources[:2])
+
+
+def test_unknown_adr_id_keeps_the_fused_ranking(knowledge_base):
+    hits = brain.hybrid_search("What does ADR-042 say?", k=4, vectorstore=knowledge_base)
+
+    assert len(hits) == 4
+
+
+def test_adr_hits_reads_only_the_closest_chunks(knowledge_base):
+    # The fake embeddings map a text to one fixed vector, so the chunk's own text is distance 0
+    query_vector = knowledge_base.embedding_function.embed_query(CHUNKS[2][0])
+
+    hits = knowledge_base.adr_hits('ADR-008', 1, query_vector=query_vector)
+
+    assert [doc.page_content for doc, distance in hits] == ["ADR-008 also requires mTLS between internal services."]
+    assert hits[0][1] == pytest.approx(0.0, abs=1e-6)
+
+
+def test_only_chunks_of_a_named_adr_are_labelled_exact_matches(knowledge_base, monkeypatch):
+    monkeypatch.setenv('RETRIEVAL_MODE', 'hybrid')
+    monkeypatch.setenv('SEMANTIC_CACHE', 'false')
+    monkeypatch.setattr(brain, 'load_faiss_index', lambda: knowledge_base)
+    monkeypatch.setattr(brain.config, 'PRIORITY_ADRS', [])
+
+    sources = brain._prepare_answer("What does ADR-007 say about AWS Fargate?")['sources']
+    labels = {source['filename']: source['confidence'] for source in sources}
+
+    assert labels.pop('ADR-007-Data-Residency-HK.md') == "Exact match"
+    assert labels and "Exact match" not in labels.values()
@@ -0,0 +1,79 @@
+"""
+Tests for deleting chunks from FAISS indexes and old index generations (index_store)
+"""
+
+import os
+import pytest
+from langchain_community.embeddings import DeterministicFakeEmbedding
+from langchain_core.documents import Document
+import index_store
+
+# Enough chunks to train IVF indexes instead of falling back to flat
+NUM_CHUNKS = 400
+
+
+def _build(index_type, tmp_path):
+    """Build and save a shard of NUM_CHUNKS distinct chunks, then load it for writing"""
+    embeddings = DeterministicFakeEmbedding(size=64)
+    documents = [Document(page_content=f"chunk {i}", metadata={'source': f"doc{i % 20}.md"}) for i in range(NUM_CHUNKS)]
+    ids = [f"id-{i}" for i in range(NUM_CHUNKS)]
+    vectorstore, meta = index_store.build_vectorstore(documents, embeddings, index_type, ids)
+    assert meta['index_type'] == index_type
+
+    shard_path = str(tmp_path / 'shard')
+    index_store.save_index(vectorstore, shard_path, meta)
+    return index_store.load_index(shard_path, embeddings, writable=True), shard_path
+
+
+@pytest.mark.parametrize('index_type, k', [
+    ('flat', 1),
+    ('ivf_flat', 1),
+    ('hnsw', 1),
+    # PQ distances are approximate, so a chunk only has to be among the closest few
+    ('ivf_pq', 5)
+])
+@pytest.mark.parametrize('use_mmap', [False, True])
+def test_deleted_chunks_are_gone_and_the_rest_find_themselves(index_type, k, use_mmap, tmp_path):
+    """After deleting, adding and reloading, every chunk's own vector finds it and deleted chunks are never returned"""
+    vectorstore, shard_path = _build(index_type, tmp_path)
+    deleted = {f"id-{i}" for i in range(0, NUM_CHUNKS, 7)}
+
+    assert index_store.remove_chunks(vectorstore, deleted) == len(deleted)
+    assert vectorstore.index.ntotal == NUM_CHUNKS - len(deleted)
+    vectorstore.add_documents([Document(page_content="added chunk", metadata={'source': 'new.md'})], ids=['id-new'])
+    index_store.save_index(vectorstore, shard_path)
+
+    embeddings = vectorstore.embedding_function
+    reloaded = index_store.load_index(shard_path, embeddings, use_mmap=use_mmap)
+    expected = {f"id-{i}": f"chunk {i}" for i in range(NUM_CHUNKS) if f"id-{i}" not in deleted}
+    expected['id-new'] = "added chunk"
+    assert reloaded.index.ntotal == len(expected)
+
+    for doc_id, text in expected.items():
+        hits = reloaded.similarity_search_by_vector(embeddings.embed_query(text), k=k)
+        assert text in [hit.page_content for hit in hits], f"{index_type}: '{text}' not found by its own vector"
+        assert not {hit.id for hit in hits} & deleted
+
+
+def test_removing_unknown_ids_leaves_the_index_alone(tmp_path):
+    vectorstore, _ = _build('flat', tmp_path)
+
+    assert index_store.remove_chunks(vectorstore, ['missing']) == 0
+    assert vectorstore.index.ntotal == NUM_CHUNKS
+
+
+@pytest.mark.parametrize('grace_seconds, kept', [
+    # Replaced a moment ago, so every generation may still be read
+    ('600', [1, 2, 3, 4, 5]),
+    ('0', [3, 4, 5]),
+])
+def test_old_generations_are_deleted_after_the_grace_period(grace_seconds, kept, tmp_path, monkeypatch):
+    monkeypatch.setenv('GENERATION_GRACE_SECONDS', grace_seconds)
+    index_path = str(tmp_path)
+    for _ in range(5):
+        generation, _ = index_store.stage_generation(index_path)
+        index_store.publish_generation(index_path, generation)
+
+    generations = sorted(int(name) for name in os.listdir(os.path.join(index_path, index_store.GENERATIONS_DIR)))
+    assert generations == kept
+    assert index_store.current_generation(index_path) == 5
@@ -0,0 +1,36 @@
+"""
+Tests for caching LLM responses (llm_cache, brain.invoke_llm_stream)
+"""
+
+import pytest
+import brain
+import failover
+import llm_cache
+
+
+@pytest.fixture
+def cache(tmp_path, monkeypatch):
+    cache = llm_cache.ResponseCache(str(tmp_path / 'llm_cache.sqlite'))
+    monkeypatch.setattr(llm_cache, 'get_cache', lambda: cache)
+    monkeypatch.setattr(failover, 'get_targets', lambda: [('openai', 'gpt')])
+    monkeypatch.setattr(failover, '_health', {})
+    return cache
+
+
+@pytest.mark.parametrize('chunks', [[], [""]])
+def test_empty_streamed_answer_is_not_cached(cache, monkeypatch, chunks):
+    streams = []
+    monkeypatch.setattr(brain, '_open_stream', lambda *args: streams.append(args) or iter(chunks))
+
+    assert "".join(brain.invoke_llm_stream("What does ADR-001 say?")) == ""
+    assert "".join(brain.invoke_llm_stream("What does ADR-001 say?")) == ""
+    assert len(streams) == 2
+
+
+def test_streamed_answer_is_cached(cache, monkeypatch):
+    streams = []
+    monkeypatch.setattr(brain, '_open_stream', lambda *args: streams.append(args) or iter(["Based on ", "ADR-001."]))
+
+    assert "".join(brain.invoke_llm_stream("What does ADR-001 say?")) == "Based on ADR-001."
+    assert "".join(brain.invoke_llm_stream("What does ADR-001 say?")) == "Based on ADR-001."
+    assert len(streams) == 1
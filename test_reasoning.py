@@ -0,0 +1,70 @@
+"""
+Tests for stripping model reasoning from streamed and complete LLM output (reasoning)
+"""
+
+import pytest
+from reasoning import ReasoningStripper, strip_reasoning
+
+ANSWER = (
+    "Based on ADR-001, every service must encrypt data in transit.\n"
+    "1. Use TLS 1.2 or later between services\n"
+    "2. Terminate TLS at the load balancer only for public endpoints"
+)
+
+RESPONSES = [
+    # DeepSeek-R1 style block, opened explicitly
+    ("<think>\nOkay, let's see. The user is asking about encryption.\nWait, ADR-001 covers it.\n</think>\n\n" + ANSWER,
+     False, True),
+    # R1 omitting the opening marker
+    ("Okay, let's see. The user is asking about encryption.\n</think>\n" + ANSWER, True, True),
+    ("<thinking>Looking at the context first.</thinking>" + ANSWER, False, True),
+    # Reasoning-looking preamble lines and an instruction echo, no markers
+    ("Okay, let's see what the standards say.\nSo, the standards apply here.\n" + ANSWER
+     + "\nDo not make up an answer.", False, True),
+    # A block that never ends is shown as if it had no markers
+    ("<think>\n" + ANSWER, False, True),
+    # Only markers and blocks are removed
+    ("<think>Okay, let's see.</think>\nSo, here it is.\n" + ANSWER, False, False),
+]
+
+
+def _stream(text, chunk_size, expect_reasoning_block, filter_lines):
+    stripper = ReasoningStripper(expect_reasoning_block, filter_lines)
+    parts = [stripper.feed(text[start:start + chunk_size]) for start in range(0, len(text), chunk_size)]
+    parts.append(stripper.finish())
+    return "".join(parts).strip()
+
+
+@pytest.mark.parametrize('text, expect_reasoning_block, filter_lines', RESPONSES)
+def test_streamed_output_matches_batch_output(text, expect_reasoning_block, filter_lines):
+    """Every chunking of a response, down to one character per chunk, strips to the same answer"""
+    expected = strip_reasoning(text, expect_reasoning_block, filter_lines)
+
+    for chunk_size in (1, 2, 3, 5, 7, 16, 64, len(text)):
+        assert _stream(text, chunk_size, expect_reasoning_block, filter_lines) == expected, chunk_size
+
+
+@pytest.mark.parametrize('text, expect_reasoning_block, filter_lines', RESPONSES[:4])
+def test_reasoning_is_removed(text, expect_reasoning_block, filter_lines):
+    assert strip_reasoning(text, expect_reasoning_block, filter_lines) == ANSWER
+
+
+def test_think_block_starts_reasoning_with_the_flag_off():
+    """An opening marker is enough; the stripper doesn't need to expect a reasoning block"""
+    text = "<think>\nThe user is asking about encryption. Based on nothing yet.\n</think>\n" + ANSWER
+    stripper = ReasoningStripper(expect_reasoning_block=False)
+
+    shown = [stripper.feed(text[:20]), stripper.feed(text[20:60])]
+    assert not "".join(shown), "reasoning was shown before its block ended"
+    shown += [stripper.feed(text[60:]), stripper.finish()]
+    assert "".join(shown).strip() == ANSWER
+
+
+def test_think_block_after_the_answer_started_is_dropped():
+    stripper = ReasoningStripper()
+    text = ANSWER + "\n<think>Wait, did I miss ADR-002?</think>\nAll data at rest is encrypted too."
+
+    streamed = "".join(stripper.feed(char) for char in text) + stripper.finish()
+
+    assert "ADR-002" not in streamed
+    assert [line for line in streamed.splitlines() if line] == ANSWER.splitlines() + ["All data at rest is encrypted too."]
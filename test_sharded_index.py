@@ -0,0 +1,51 @@
+"""
+Tests for searching several index shards as one knowledge base (sharded_index)
+"""
+
+import numpy as np
+from langchain_community.embeddings import DeterministicFakeEmbedding
+from langchain_core.documents import Document
+import index_store
+import sharded_index
+
+SHARDS = {
+    'docs': [f"docs chunk {i}" for i in range(10)],
+    'confluence-ARCH': [f"confluence chunk {i}" for i in range(10)],
+}
+
+
+def _load(tmp_path):
+    embeddings = DeterministicFakeEmbedding(size=64)
+    for name, texts in SHARDS.items():
+        documents = [Document(page_content=text, metadata={'source': f"{name}.md"}) for text in texts]
+        vectorstore, meta = index_store.build_vectorstore(documents, embeddings, 'flat', [f"{name}-{i}" for i in range(len(texts))])
+        index_store.save_index(vectorstore, index_store.shard_path(str(tmp_path), name), meta)
+    return sharded_index.load_sharded_index(str(tmp_path), embeddings), embeddings
+
+
+def test_only_the_merged_top_k_are_read(tmp_path, monkeypatch):
+    knowledge_base, embeddings = _load(tmp_path)
+    query = embeddings.embed_query("confluence chunk 3")
+    read = []
+    documents = sharded_index.IndexShard.documents
+    monkeypatch.setattr(sharded_index.IndexShard, 'documents',
+                        lambda shard, faiss_ids: read.extend(faiss_ids) or documents(shard, faiss_ids))
+
+    hits = knowledge_base.search_by_vectors([query], k=3)[0]
+
+    texts = [text for shard_texts in SHARDS.values() for text in shard_texts]
+    vectors = np.array(embeddings.embed_documents(texts), dtype=np.float32)
+    expected = [texts[i] for i in np.argsort(np.sum((vectors - np.array(query, dtype=np.float32)) ** 2, axis=1))[:3]]
+    assert [doc.page_content for doc, distance in hits] == expected
+    assert hits[0][1] == 0.0
+    assert len(read) == 3
+
+
+def test_swapped_out_index_keeps_answering_after_close(tmp_path):
+    knowledge_base, embeddings = _load(tmp_path)
+    query = embeddings.embed_query("docs chunk 5")
+    before = knowledge_base.search_by_vectors([query], k=2)
+
+    knowledge_base.close()
+
+    assert knowledge_base.search_by_vectors([query], k=2) == before
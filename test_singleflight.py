@@ -0,0 +1,135 @@
+"""
+Tests for coalescing identical concurrent requests (singleflight)
+"""
+
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+import pytest
+import singleflight
+
+FOLLOWERS = 4
+
+
+def _wait_for_followers(group, count=FOLLOWERS):
+    """Block until count callers in total have joined a flight as followers"""
+    deadline = time.monotonic() + 5
+    while group.coalesced < count:
+        assert time.monotonic() < deadline, "followers never joined the flight"
+        time.sleep(0.001)
+
+
+def _run_concurrently(group, func):
+    """Call group.do('key', func) from a leader and FOLLOWERS threads; return each outcome"""
+    def call():
+        try:
+            return group.do('key', func)
+        except Exception as e:
+            return e
+
+    with ThreadPoolExecutor(max_workers=FOLLOWERS + 1) as executor:
+        leader = executor.submit(call)
+        while not group._flights:
+            time.sleep(0.001)
+        followers = [executor.submit(call) for _ in range(FOLLOWERS)]
+        return [future.result() for future in [leader] + followers]
+
+
+def test_concurrent_callers_share_one_call():
+    group = singleflight.Group()
+    calls = []
+
+    def func():
+        calls.append(1)
+        _wait_for_followers(group)
+        return "answer"
+
+    assert _run_concurrently(group, func) == ["answer"] * (FOLLOWERS + 1)
+    assert len(calls) == 1
+    assert group.coalesced == FOLLOWERS
+
+
+def test_leader_failure_is_shared_and_not_remembered():
+    group = singleflight.Group()
+    calls = []
+    error = RuntimeError("provider down")
+
+    def failing():
+        calls.append(1)
+        _wait_for_followers(group)
+        raise error
+
+    assert _run_concurrently(group, failing) == [error] * (FOLLOWERS + 1)
+    assert len(calls) == 1
+
+    # The failed flight is forgotten: the next caller runs the request again
+    assert group.do('key', lambda: "recovered") == "recovered"
+    assert not group._flights
+
+
+def test_cancelled_async_leader_hands_the_request_to_a_follower():
+    group = singleflight.Group()
+    calls = []
+
+    async def request(result):
+        calls.append(result)
+        await asyncio.sleep(0.05)
+        return result
+
+    async def main():
+        leader = asyncio.ensure_future(group.do_async('key', lambda: request("leader")))
+        await asyncio.sleep(0.01)
+        follower = asyncio.ensure_future(group.do_async('key', lambda: request("follower")))
+        await asyncio.sleep(0.01)
+        leader.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await leader
+        return await follower
+
+    # Cancellation abandons the flight instead of failing it, so the follower runs its own request
+    assert asyncio.run(main()) == "follower"
+    assert calls == ["leader", "follower"]
+
+
+def test_stream_followers_get_the_whole_text_or_the_leader_error():
+    group = singleflight.Group()
+    release = threading.Event()
+
+    def open_stream(fail):
+        yield "Based on "
+        release.wait(5)
+        if fail:
+            raise RuntimeError("stream broke")
+        yield "ADR-001."
+
+    for fail in (False, True):
+        release.clear()
+        leader = group.stream('key', lambda: open_stream(fail))
+        assert next(leader) == "Based on "
+
+        joined = group.coalesced + 1
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            follower = executor.submit(lambda: list(group.stream('key', lambda: open_stream(False))))
+            _wait_for_followers(group, joined)
+            release.set()
+            if fail:
+                with pytest.raises(RuntimeError):
+                    list(leader)
+                with pytest.raises(RuntimeError):
+                    follower.result()
+            else:
+                assert list(leader) == ["ADR-001."]
+                assert follower.result() == ["Based on ADR-001."]
+
+
+def test_closed_stream_leader_hands_the_request_to_a_follower():
+    group = singleflight.Group()
+    leader = group.stream('key', lambda: iter(["partial ", "text"]))
+    assert next(leader) == "partial "
+
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        follower = executor.submit(lambda: list(group.stream('key', lambda: iter(["own ", "stream"]))))
+        _wait_for_followers(group, 1)
+        leader.close()
+        assert follower.result() == ["own ", "stream"]